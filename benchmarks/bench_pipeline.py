@@ -0,0 +1,422 @@
+"""
+⏱️ Benchmark procesu czyszczenia: etapy i cała ścieżka dla różnych rozmiarów, trybów i treści
+
+Dla każdego wejścia (1-200 MP; RGB JPEG, RGBA PNG, L PNG, P PNG, CMYK JPEG;
+zdjęcie lub grafika liniowa) mierzy czas, szczytowe RSS i rozmiar wyniku
+każdego etapu. Każdy etap liczony jest w osobnym procesie, więc pomiar
+pamięci nie zależy od poprzednich etapów. Wyniki trafiają do pliku JSON,
+który można porównać z wynikami innego commita (--compare).
+
+Użycie:
+    python benchmarks/bench_pipeline.py --sizes 1,10 -o wyniki.json
+    python benchmarks/bench_pipeline.py --compare main.json -o wyniki.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import papercraft
+from papercraft.core import (
+    reduce_to_2_colors, remove_white_to_transparent, binarize_to_transparent,
+    flatten_to_white_background, convert_image_to_bytes,
+)
+from papercraft.streaming import PNG_PRESETS, encode_pbm, encode_clean_png
+from papercraft.batch import clean_image_bytes
+from papercraft.morphology import remove_small_components, fill_small_holes, binary_opening, binary_closing
+from papercraft.adaptive import LOCAL_METHODS, local_threshold_mask
+from papercraft.parts import find_parts
+from papercraft.resize import fast_resize
+from papercraft.palette import ColorHistogram, fit_palette, palette_lut, quantize_array, quantize_image_bytes
+from bench_vectorize import make_line_art
+
+Image.MAX_IMAGE_PIXELS = None
+
+DEFAULT_SIZES = (1, 10, 50, 200)
+THRESHOLD = 128
+PALETTE_COLORS = 8
+
+# ============================================================================
+# WEJŚCIA SYNTETYCZNE
+# ============================================================================
+
+# Źródło -> (rozszerzenie, tryb, parametry zapisu)
+SOURCES = {
+    "rgb-jpeg": ("jpg", "RGB", {"quality": 90}),
+    "rgba-png": ("png", "RGBA", {"compress_level": 1}),
+    "l-png": ("png", "L", {"compress_level": 1}),
+    "p-png": ("png", "P", {"compress_level": 1}),
+    "cmyk-jpeg": ("jpg", "CMYK", {"quality": 90}),
+}
+CONTENTS = ("photo", "lineart")
+
+def make_photo(megapixels, seed=0, band_rows=1024):
+    """Syntetyczne "zdjęcie": gładkie plamy koloru + szum ziarna (generowane pasami)"""
+    width = int((megapixels * 1e6 * 1.5) ** 0.5)
+    height = int(megapixels * 1e6 / width)
+    rng = np.random.default_rng(seed)
+    small = Image.fromarray(rng.integers(0, 256, (max(height // 64, 2), max(width // 64, 2), 3), dtype=np.uint8))
+    sy = small.height / height
+
+    out = np.empty((height, width, 3), dtype=np.uint8)
+    for top in range(0, height, band_rows):
+        bottom = min(top + band_rows, height)
+        band = small.resize((width, bottom - top), Image.BICUBIC, box=(0, top * sy, small.width, bottom * sy))
+        grain = rng.integers(-12, 13, (bottom - top, width, 1), dtype=np.int16)
+        out[top:bottom] = np.clip(np.asarray(band, dtype=np.int16) + grain, 0, 255)
+    return Image.fromarray(out)
+
+def to_source_mode(img, mode):
+    """Obraz treści (L lub RGB) w trybie danego źródła"""
+    if mode == 'RGBA':
+        rgba = img.convert('RGBA')
+        # Kanał alfa nie jest stały - gradient od przezroczystego do kryjącego
+        rgba.putalpha(Image.linear_gradient('L').resize(img.size))
+        return rgba
+    if mode == 'P':
+        return img.convert('RGB').convert('P', dither=Image.Dither.NONE)
+    return img.convert(mode)
+
+def ensure_inputs(workdir, sizes, sources, contents, seed=0):
+    """Generuje brakujące pliki wejściowe (deterministycznie, z cache na dysku)"""
+    os.makedirs(workdir, exist_ok=True)
+    inputs = []
+    for megapixels in sizes:
+        for content in contents:
+            base = None
+            for source in sources:
+                extension, mode, save_args = SOURCES[source]
+                path = os.path.join(workdir, f"{content}-{source}-{megapixels:g}mp-s{seed}.{extension}")
+                if not os.path.exists(path):
+                    if base is None:
+                        print(f"Generuję {content} {megapixels:g} MP...", file=sys.stderr, flush=True)
+                        base = make_photo(megapixels, seed) if content == "photo" else make_line_art(megapixels, seed)
+                    to_source_mode(base, mode).save(path + '.tmp', format='JPEG' if extension == 'jpg' else 'PNG', **save_args)
+                    os.replace(path + '.tmp', path)
+                inputs.append({"source": source, "content": content, "megapixels": megapixels, "path": path})
+            base = None
+    return inputs
+
+# ============================================================================
+# ETAPY
+# ============================================================================
+
+def _decode(path):
+    img = Image.open(path)
+    img.load()
+    return img
+
+def _gray(path):
+    img = _decode(path)
+    return np.asarray(img.convert('L') if img.mode != 'L' else img)
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _mask(path):
+    return _gray(path) <= THRESHOLD
+
+def _palette_input(path):
+    rgb = np.asarray(_decode(path).convert('RGB'))
+    return rgb, palette_lut(fit_palette(ColorHistogram.from_image(Image.fromarray(rgb)), PALETTE_COLORS))
+
+# Etap -> (przygotowanie wejścia poza pomiarem, mierzona funkcja)
+STAGES = {
+    "decode": (lambda path: path, _decode),
+    "reduce_to_2_colors": (_decode, lambda img: reduce_to_2_colors(img, THRESHOLD)),
+    "remove_white_to_transparent": (lambda path: reduce_to_2_colors(_decode(path), THRESHOLD), remove_white_to_transparent),
+    "binarize_to_transparent": (_decode, lambda img: binarize_to_transparent(img, THRESHOLD)),
+    "flatten_to_white_background": (lambda path: binarize_to_transparent(_decode(path), THRESHOLD), flatten_to_white_background),
+    "convert_png": (lambda path: binarize_to_transparent(_decode(path), THRESHOLD), lambda img: convert_image_to_bytes(img, 'PNG')),
+    "convert_pbm": (lambda path: binarize_to_transparent(_decode(path), THRESHOLD), lambda img: convert_image_to_bytes(img, 'PBM')),
+    "encode_pbm": (_gray, lambda gray: encode_pbm(gray, THRESHOLD)),
+    # Czyszczenie maski (despeckle i morfologia) - czas na MP w kolumnie ms/MP
+    "remove_specks": (_mask, lambda mask: remove_small_components(mask, 16)),
+    "fill_holes": (_mask, lambda mask: fill_small_holes(mask, 16)),
+    "opening": (_mask, lambda mask: binary_opening(mask, 1)),
+    "closing": (_mask, lambda mask: binary_closing(mask, 2)),
+    # Wykrywanie części arkusza (etykietowanie składowych na seriach)
+    "find_parts": (_gray, lambda gray: find_parts(gray, THRESHOLD)),
+    # Próg lokalny względem globalnego: sama maska i cała ścieżka
+    "global_mask": (_gray, lambda gray: gray <= THRESHOLD),
+    **{
+        f"local_{method}": (_gray, lambda gray, method=method: local_threshold_mask(gray, method))
+        for method in LOCAL_METHODS
+    },
+    # Zmiana rozmiaru 4x (np. 1200 -> 300 DPI): reduce + resample względem samego LANCZOS
+    "resize_fast": (_decode, lambda img: fast_resize(img, (img.width // 4, img.height // 4))),
+    "resize_lanczos": (_decode, lambda img: img.resize((img.width // 4, img.height // 4), Image.LANCZOS)),
+    # Redukcja kolorów: histogram raz na plik, dobór palety, mapowanie pikseli przez LUT
+    "color_histogram": (_decode, ColorHistogram.from_image),
+    "fit_palette": (lambda path: ColorHistogram.from_image(_decode(path)), lambda hist: fit_palette(hist, PALETTE_COLORS)),
+    "palette_map": (_palette_input, lambda prepared: quantize_array(*prepared)),
+    # Zapis PNG z jasności wg presetów - "png_rgba" to dotychczasowy RGBA 8-bit
+    **{
+        f"png_{preset}": (_gray, lambda gray, preset=preset: encode_clean_png(gray, THRESHOLD, preset))
+        for preset in PNG_PRESETS
+    },
+    # Cała ścieżka: bajty pliku -> bajty wyniku (jak batch i CLI)
+    "clean_png": (_read, lambda data: clean_image_bytes(data, THRESHOLD, 'PNG')[0]),
+    "clean_pbm": (_read, lambda data: clean_image_bytes(data, THRESHOLD, 'PBM')[0]),
+    "clean_pbm_sauvola": (_read, lambda data: clean_image_bytes(data, THRESHOLD, 'PBM', local={"method": "sauvola"})[0]),
+    "clean_pbm_quarter": (_read, lambda data: clean_image_bytes(
+        data, THRESHOLD, 'PBM', resize={"dpi": 300, "source_dpi": 1200}
+    )[0]),
+    "clean_palette_png": (_read, lambda data: quantize_image_bytes(data, PALETTE_COLORS)),
+}
+
+def output_size(result):
+    """Rozmiar wyniku w bajtach - plik dla kodowania, bufor pikseli dla obrazu"""
+    if isinstance(result, (bytes, bytearray)):
+        return len(result)
+    if isinstance(result, Image.Image):
+        return result.width * result.height * len(result.getbands())
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    return 0
+
+# ============================================================================
+# POMIAR PAMIĘCI
+# ============================================================================
+
+def _proc_status_mb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    return None
+
+def reset_peak_rss():
+    """Zeruje szczyt RSS procesu (Linux: /proc/self/clear_refs). False, gdy się nie da."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def current_rss_mb():
+    try:
+        return _proc_status_mb('VmRSS')
+    except OSError:
+        return None
+
+def peak_rss_mb():
+    try:
+        return _proc_status_mb('VmHWM')
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss: KB na Linuksie, bajty na macOS
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_stage(path, stage, repeats):
+    """Wykonuje etap repeats razy w bieżącym procesie (wołane w świeżym procesie)"""
+    Image.MAX_IMAGE_PIXELS = None
+    prepare, measured = STAGES[stage]
+    state = prepare(path)
+    runs = []
+    for _ in range(repeats):
+        peak_exact = reset_peak_rss()
+        rss_before = current_rss_mb()
+        started = time.perf_counter()
+        result = measured(state)
+        seconds = time.perf_counter() - started
+        runs.append({
+            "seconds": seconds,
+            "peak_rss_mb": peak_rss_mb(),
+            "rss_before_mb": rss_before,
+            "peak_exact": peak_exact,
+            "output_bytes": output_size(result),
+        })
+        del result
+    return runs
+
+# ============================================================================
+# RAPORT I PORÓWNANIE
+# ============================================================================
+
+def environment_info():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root, capture_output=True, text=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pillow": Image.__version__,
+        "papercraft": papercraft.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def summarize(case, stage, runs):
+    times = [run["seconds"] for run in runs]
+    return {
+        "source": case["source"],
+        "content": case["content"],
+        "megapixels": case["megapixels"],
+        "stage": stage,
+        "seconds": statistics.median(times),
+        "seconds_min": min(times),
+        "ms_per_mp": statistics.median(times) * 1000 / case["megapixels"],
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+        "stage_rss_mb": max(run["peak_rss_mb"] - run["rss_before_mb"] for run in runs)
+            if all(run["peak_exact"] for run in runs) else None,
+        "output_bytes": runs[-1]["output_bytes"],
+        "input_bytes": os.path.getsize(case["path"]),
+        "runs": runs,
+    }
+
+def _result_key(result):
+    return (result["source"], result["content"], result["megapixels"], result["stage"])
+
+def compare_results(baseline, results, tolerance, min_seconds=0.01, min_rss_mb=1.0):
+    """Lista regresji (czas lub pamięć gorsze o więcej niż tolerance) względem baseline"""
+    previous = {_result_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(_result_key(result))
+        if old is None:
+            continue
+        if result["seconds"] > old["seconds"] * (1 + tolerance) and result["seconds"] - old["seconds"] > min_seconds:
+            regressions.append((result, "seconds", old["seconds"], result["seconds"]))
+        if result["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance) and result["peak_rss_mb"] - old["peak_rss_mb"] > min_rss_mb:
+            regressions.append((result, "peak_rss_mb", old["peak_rss_mb"], result["peak_rss_mb"]))
+    return regressions
+
+def png_preset_report(results):
+    """Rozmiar i czas presetów PNG 1-bit względem RGBA 8-bit, dla każdego wejścia"""
+    by_case = {}
+    for result in results:
+        if result["stage"].startswith("png_"):
+            case = (result["source"], result["content"], result["megapixels"])
+            by_case.setdefault(case, {})[result["stage"][4:]] = result
+    
+    lines = []
+    for (source, content, megapixels), presets in by_case.items():
+        rgba = presets.get("rgba")
+        if rgba is None:
+            continue
+        for preset, result in presets.items():
+            if preset == "rgba":
+                continue
+            lines.append(
+                f"{source:<10} {content:<8} {megapixels:>5g} {preset:<9} "
+                f"rozmiar {result['output_bytes'] / rgba['output_bytes']:>6.1%} RGBA, "
+                f"czas {result['seconds'] / rgba['seconds']:>6.1%} RGBA "
+                f"({result['output_bytes'] / 1e6:.2f} MB, {result['seconds']:.3f} s)"
+            )
+    return lines
+
+def local_threshold_report(results):
+    """Czas progu lokalnego względem globalnego - sama maska i cała ścieżka PBM"""
+    by_case = {}
+    for result in results:
+        case = (result["source"], result["content"], result["megapixels"])
+        by_case.setdefault(case, {})[result["stage"]] = result
+    
+    lines = []
+    for (source, content, megapixels), stages in by_case.items():
+        pairs = [(f"local_{method}", "global_mask") for method in LOCAL_METHODS]
+        pairs.append(("clean_pbm_sauvola", "clean_pbm"))
+        for stage, reference in pairs:
+            if stage not in stages or reference not in stages:
+                continue
+            result, base = stages[stage], stages[reference]
+            lines.append(
+                f"{source:<10} {content:<8} {megapixels:>5g} {stage:<18} "
+                f"{result['ms_per_mp']:>7.1f} ms/MP, {result['seconds'] / max(base['seconds'], 1e-9):>6.1f}x {reference}"
+            )
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help="megapiksele, po przecinku")
+    parser.add_argument('--sources', default=','.join(SOURCES), help="źródła, po przecinku")
+    parser.add_argument('--contents', default=','.join(CONTENTS), help="photo, lineart")
+    parser.add_argument('--stages', default=','.join(STAGES), help="etapy, po przecinku")
+    parser.add_argument('--repeats', type=int, default=3, help="powtórzenia każdego etapu (mediana)")
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'papercraft-bench'),
+                        help="katalog na wygenerowane wejścia (używany ponownie między uruchomieniami)")
+    parser.add_argument('-o', '--output', default='bench_pipeline.json', help="plik wyników JSON")
+    parser.add_argument('--compare', help="plik JSON z poprzedniego uruchomienia")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="próg regresji (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    sizes = [float(s) for s in args.sizes.split(',')]
+    stages = args.stages.split(',')
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        parser.error(f"nieznane etapy: {', '.join(unknown)}")
+
+    cases = ensure_inputs(args.workdir, sizes, args.sources.split(','), args.contents.split(','))
+
+    # Każdy etap w świeżym procesie - szczyt RSS nie zależy od poprzednich pomiarów
+    context = multiprocessing.get_context('spawn')
+    results = []
+    print(f"{'źródło':<10} {'treść':<8} {'MP':>5} {'etap':<28} {'czas s':>8} {'ms/MP':>7} {'RSS MB':>8} {'wynik MB':>9}")
+    for case in cases:
+        for stage in stages:
+            with context.Pool(1, maxtasksperchild=1) as pool:
+                runs = pool.apply(run_stage, (case["path"], stage, args.repeats))
+            result = summarize(case, stage, runs)
+            results.append(result)
+            print(
+                f"{case['source']:<10} {case['content']:<8} {case['megapixels']:>5g} {stage:<28} "
+                f"{result['seconds']:>8.3f} {result['ms_per_mp']:>7.1f} {result['peak_rss_mb']:>8.0f} {result['output_bytes'] / 1e6:>9.2f}",
+                flush=True
+            )
+
+    report = {"environment": environment_info(), "threshold": THRESHOLD, "repeats": args.repeats, "results": results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+    print(f"Zapisano {len(results)} wyników do {args.output}")
+    
+    report_lines = png_preset_report(results)
+    if report_lines:
+        print("\nPNG 1-bit względem RGBA 8-bit:")
+        print("\n".join(report_lines))
+    
+    report_lines = local_threshold_report(results)
+    if report_lines:
+        print("\nPróg lokalny względem globalnego:")
+        print("\n".join(report_lines))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.tolerance)
+        for result, metric, old, new in regressions:
+            print(
+                f"REGRESJA {result['source']} {result['content']} {result['megapixels']:g} MP "
+                f"{result['stage']}: {metric} {old:.3f} -> {new:.3f}"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"Brak regresji względem {baseline['environment'].get('commit')}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+⏱️ Benchmark wektoryzacji: tracer w procesie vs "eksport PBM + zewnętrzny potrace"
+
+Użycie:
+    python benchmarks/bench_vectorize.py --megapixels 50
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from papercraft.vectorize import mask_to_svg
+
+Image.MAX_IMAGE_PIXELS = None
+
+def make_line_art(megapixels, seed=0):
+    """Syntetyczny arkusz papercraft: okręgi, linie cięcia i napisy"""
+    width = int((megapixels * 1e6 * 1.5) ** 0.5)
+    height = int(megapixels * 1e6 / width)
+    img = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    rng = np.random.default_rng(seed)
+    scale = width / 8660
+    
+    for _ in range(int(400 * scale ** 2)):
+        x, y, r = rng.integers(0, width), rng.integers(0, height), rng.integers(20, 400)
+        draw.ellipse([x - r, y - r, x + r, y + r], outline=0, width=int(rng.integers(2, 8)))
+    for _ in range(int(400 * scale ** 2)):
+        draw.line(
+            [(int(rng.integers(0, width)), int(rng.integers(0, height))),
+             (int(rng.integers(0, width)), int(rng.integers(0, height)))],
+            fill=0, width=int(rng.integers(2, 6))
+        )
+    for _ in range(int(2000 * scale ** 2)):
+        x, y = rng.integers(0, max(width - 200, 1)), rng.integers(0, max(height - 50, 1))
+        draw.text((int(x), int(y)), "Zagnij tutaj 12", fill=0, font_size=int(rng.integers(12, 40)))
+    
+    return img
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+def bench_in_process(gray, threshold, tolerance, bezier):
+    svg, seconds = timed(
+        lambda: mask_to_svg(np.asarray(gray) <= threshold, tolerance=tolerance, bezier=bezier)
+    )
+    return seconds, len(svg)
+
+def bench_external(gray, threshold, potrace):
+    """Dotychczasowy workflow: PBM jak w convert_image_to_bytes, potem potrace -s"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pbm_path = os.path.join(tmp, 'page.pbm')
+        svg_path = os.path.join(tmp, 'page.svg')
+        
+        def export_pbm():
+            binary = gray.point(lambda v: 255 if v > threshold else 0)
+            binary.convert('1').save(pbm_path, format='PPM')
+        
+        _, export_seconds = timed(export_pbm)
+        _, trace_seconds = timed(
+            lambda: subprocess.run([potrace, '-s', pbm_path, '-o', svg_path], check=True)
+        )
+        return export_seconds, trace_seconds, os.path.getsize(svg_path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--megapixels', type=float, default=50)
+    parser.add_argument('--threshold', type=int, default=128)
+    parser.add_argument('--tolerance', type=float, default=1.0)
+    args = parser.parse_args()
+    
+    gray = make_line_art(args.megapixels)
+    print(f"Arkusz: {gray.width} x {gray.height} px ({gray.width * gray.height / 1e6:.1f} MP)")
+    
+    for bezier in (False, True):
+        seconds, size = bench_in_process(gray, args.threshold, args.tolerance, bezier)
+        label = "Bézier" if bezier else "łamane"
+        print(f"vectorize.py ({label}): {seconds:.2f} s, SVG {size / 1e6:.2f} MB")
+    
+    potrace = shutil.which('potrace')
+    if potrace is None:
+        print("potrace: nie znaleziono w PATH - pomijam porównanie z zewnętrznym narzędziem")
+        return
+    
+    export_seconds, trace_seconds, size = bench_external(gray, args.threshold, potrace)
+    print(
+        f"PBM + potrace: {export_seconds + trace_seconds:.2f} s "
+        f"(eksport {export_seconds:.2f} s, potrace {trace_seconds:.2f} s), SVG {size / 1e6:.2f} MB"
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,648 @@
+"""
+🏋️ Test obciążenia: N równoczesnych sesji na jednym serwerze Streamlit
+
+Uruchamia lokalnie `streamlit run` (headless) i łączy się z nim tak jak
+przeglądarka: WebSocket z protobufami Streamlit, upload pliku i pobieranie
+wyników przez HTTP. Każda sesja wgrywa własny obraz, przesuwa suwak progu,
+włącza i wyłącza wycinanie i pobiera wynik w obu formatach. Podgląd liczony
+w tle jest odpytywany jak w przeglądarce (auto-rerun fragmentu), więc czas
+akcji to czas do gotowego podglądu, a nie tylko do końca pierwszego reruna.
+
+Raport dla każdej liczby sesji: percentyle czasu reruna i akcji, reruny i
+akcje na sekundę oraz CPU i RSS serwera (z procesami puli) w czasie.
+Działa bez sieci - potrzebny tylko Streamlit (websockets to jego zależność).
+
+Użycie:
+    python benchmarks/load_test.py --sessions 1,4,8 -o load.json
+    python benchmarks/load_test.py --sessions 8 --megapixels 12 --same-image
+    python benchmarks/load_test.py --app cleaning_tool.py --sessions 4
+"""
+
+import argparse
+import http.client
+import io
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import streamlit
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.sync.client import connect
+
+from bench_pipeline import make_photo, environment_info
+from bench_vectorize import make_line_art
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SESSIONS = (1, 2, 4, 8)
+DEFAULT_TIMEOUT = 300.0
+SAMPLE_SECONDS = 0.5
+# Wartości suwaka (wielokrotności 5 - krok suwaka w cleaning_tool.py)
+SLIDER_VALUES = (100, 115, 130, 145, 160, 175)
+PERCENTILES = (50, 90, 99)
+
+class LoadTestError(Exception):
+    """Sesja nie może kontynuować (brak widżetu, błąd HTTP, zerwane połączenie)"""
+
+# ============================================================================
+# SERWER
+# ============================================================================
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(app, port, log):
+    """`streamlit run` w osobnym procesie - jak wdrożenie, bez przeładowania przy zmianach"""
+    return subprocess.Popen(
+        [
+            sys.executable, '-m', 'streamlit', 'run', app,
+            '--server.headless', 'true',
+            '--server.address', '127.0.0.1',
+            '--server.port', str(port),
+            '--server.fileWatcherType', 'none',
+            '--browser.gatherUsageStats', 'false',
+        ],
+        cwd=ROOT, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+def wait_for_server(process, port, timeout=60.0):
+    """Czeka na /_stcore/health; False, gdy proces zakończył się wcześniej albo minął czas"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/_stcore/health')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+# ============================================================================
+# CPU I RSS SERWERA
+# ============================================================================
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+def _stat_fields(pid):
+    # Pola po nazwie procesu (ta może zawierać spacje i nawiasy)
+    with open(f'/proc/{pid}/stat') as f:
+        return f.read().rsplit(')', 1)[1].split()
+
+def process_tree(root):
+    """PID procesu i wszystkich jego potomków (serwer + pula procesów)"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                children.setdefault(int(_stat_fields(entry)[1]), []).append(int(entry))
+            except OSError:
+                continue
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, ()))
+    return tree
+
+def cpu_ticks(pid):
+    fields = _stat_fields(pid)
+    return int(fields[11]) + int(fields[12])  # utime + stime
+
+def rss_mb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+class ResourceSampler(threading.Thread):
+    """Co interval sekund: CPU (% jednego rdzenia) i suma RSS drzewa procesów serwera.
+
+    Suma RSS liczy strony współdzielone przez procesy puli kilka razy,
+    więc jest górnym oszacowaniem pamięci.
+    """
+
+    def __init__(self, root, started, interval=SAMPLE_SECONDS):
+        super().__init__(daemon=True)
+        self.root = root
+        self.started = started
+        self.interval = interval
+        self.samples = []
+        self._finished = threading.Event()
+
+    def sample(self, previous):
+        ticks, memory = {}, 0.0
+        for pid in process_tree(self.root):
+            try:
+                ticks[pid] = cpu_ticks(pid)
+                memory += rss_mb(pid)
+            except OSError:
+                continue  # proces zakończył się w trakcie odczytu
+        # Nowy proces liczony od zera - jego czas przypada na ten odcinek
+        used = sum(value - previous.get(pid, 0) for pid, value in ticks.items())
+        return ticks, used / CLOCK_TICKS, memory
+
+    def run(self):
+        ticks, _, _ = self.sample({})
+        last = time.perf_counter()
+        while not self._finished.wait(self.interval):
+            ticks, cpu_seconds, memory = self.sample(ticks)
+            now = time.perf_counter()
+            self.samples.append({
+                "t": round(now - self.started, 3),
+                "cpu_percent": round(100 * cpu_seconds / (now - last), 1),
+                "rss_mb": round(memory, 1),
+                "processes": len(ticks),
+            })
+            last = now
+
+    def stop(self):
+        self._finished.set()
+        self.join()
+
+# ============================================================================
+# SESJA (KLIENT JAK PRZEGLĄDARKA)
+# ============================================================================
+
+class SessionClient:
+    """Jedna sesja przeglądarki: stany widżetów, reruny, upload i pobieranie plików.
+
+    Widżety wskazywane są typem i początkiem etykiety z ostatniego pełnego
+    reruna. Stany ustawionych widżetów wysyłane są przy każdym rerunie -
+    tak jak robi to frontend.
+    """
+
+    def __init__(self, ws, port, timeout=DEFAULT_TIMEOUT, think=0.0, rng=None):
+        self.ws = ws
+        self.port = port
+        self.started = time.perf_counter()
+        self.timeout = timeout
+        self.think = think
+        self.rng = rng or np.random.default_rng()
+        self.session_id = None
+        self.elements = {}      # (typ, etykieta) -> proto widżetu
+        self.states = {}        # id widżetu -> WidgetState
+        self.fetched = set()    # adresy obrazów już pobranych (przeglądarka trzyma je w cache)
+        self.reruns = []
+        self.actions = []
+        self.errors = []
+        self._autos = {}        # fragment_id -> co ile sekund odpytywać
+        self._http = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        self._xsrf_cookie = None
+
+    def _clock(self):
+        return round(time.perf_counter() - self.started, 3)
+
+    def _request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self._xsrf_cookie:
+            headers["Cookie"] = self._xsrf_cookie
+            headers["X-Xsrftoken"] = self._xsrf_cookie.split('=', 1)[1]
+        try:
+            self._http.request(method, path, body, headers)
+            response = self._http.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self._http.close()
+            raise LoadTestError(f"{method} {path}: {e}") from e
+        if response.status >= 400:
+            raise LoadTestError(f"{method} {path}: HTTP {response.status}")
+        for name, value in response.getheaders():
+            if name.lower() == 'set-cookie' and value.startswith('_streamlit_xsrf='):
+                self._xsrf_cookie = value.split(';', 1)[0]
+        return data
+
+    def fetch(self, url):
+        """Pobranie pliku z serwera (obraz podglądu, wynik do pobrania)"""
+        return self._request('GET', url)
+
+    def _receive(self):
+        try:
+            data = self.ws.recv(timeout=self.timeout)
+        except TimeoutError:
+            raise LoadTestError(f"brak odpowiedzi serwera przez {self.timeout:g} s") from None
+        except Exception as e:
+            raise LoadTestError(f"połączenie zerwane: {e}") from e
+        msg = ForwardMsg()
+        msg.ParseFromString(data)
+        return msg
+
+    def _send(self, msg):
+        try:
+            self.ws.send(msg.SerializeToString())
+        except Exception as e:
+            raise LoadTestError(f"połączenie zerwane: {e}") from e
+
+    def _send_rerun(self, fragment_id=None, triggers=()):
+        msg = BackMsg()
+        widgets = msg.rerun_script.widget_states.widgets
+        widgets.extend(self.states.values())
+        widgets.extend(triggers)
+        if fragment_id is not None:
+            msg.rerun_script.fragment_id = fragment_id
+            msg.rerun_script.is_auto_rerun = True
+        self._send(msg)
+
+    def _on_element(self, action, element):
+        kind = element.WhichOneof("type")
+        proto = getattr(element, kind)
+        if kind == "exception":
+            self.errors.append({"t": self._clock(), "action": action, "error": f"{proto.type}: {proto.message}"})
+        elif kind == "imgs":
+            # Przeglądarka pobiera obrazy podglądu osobnymi żądaniami HTTP
+            for image in proto.imgs:
+                if image.url.startswith('/') and image.url not in self.fetched:
+                    self.fetch(image.url)
+                    self.fetched.add(image.url)
+        elif getattr(proto, "id", ""):
+            self.elements[(kind, proto.label)] = proto
+
+    def _receive_runs(self, action, sent, fragment):
+        """Odbiera komunikaty do końca reruna (i reruna wywołanego przez st.rerun())"""
+        while True:
+            msg = self._receive()
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                if msg.new_session.HasField("initialize"):
+                    self.session_id = msg.new_session.initialize.session_id
+                if not fragment:
+                    # Pełny rerun rysuje stronę od nowa i ponownie rejestruje odpytywanie
+                    self.elements.clear()
+                    self._autos.clear()
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                self._on_element(action, msg.delta.new_element)
+            elif kind == "auto_rerun":
+                self._autos[msg.auto_rerun.fragment_id] = msg.auto_rerun.interval
+            elif kind == "stop_auto_rerun":
+                for fragment_id in msg.stop_auto_rerun.fragment_ids:
+                    self._autos.pop(fragment_id, None)
+            elif kind == "script_finished":
+                now = time.perf_counter()
+                self.reruns.append({
+                    "t": self._clock(), "action": action,
+                    "kind": "fragment" if fragment else "full", "seconds": now - sent,
+                })
+                if msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return
+                # st.rerun() - serwer sam zaczyna pełny rerun
+                sent, fragment = now, False
+
+    def rerun(self, action, triggers=(), started=None):
+        """Rerun z bieżącymi stanami widżetów; czeka, aż podgląd liczony w tle będzie gotowy"""
+        started = started or time.perf_counter()
+        sent = time.perf_counter()
+        self._send_rerun(triggers=triggers)
+        self._receive_runs(action, sent, fragment=False)
+        while self._autos:
+            fragment_id, interval = next(iter(self._autos.items()))
+            time.sleep(interval)
+            sent = time.perf_counter()
+            self._send_rerun(fragment_id)
+            self._receive_runs(action, sent, fragment=True)
+        self.actions.append({"t": self._clock(), "action": action, "seconds": time.perf_counter() - started})
+        self.pause()
+
+    def pause(self):
+        """Czas "do namysłu" użytkownika między akcjami (think ±50%)"""
+        if self.think > 0:
+            time.sleep(self.think * self.rng.uniform(0.5, 1.5))
+
+    def element(self, kind, label):
+        for (element_kind, element_label), proto in self.elements.items():
+            if element_kind == kind and element_label.startswith(label):
+                return proto
+        raise LoadTestError(f"brak widżetu {kind} '{label}' - czy scenariusz pasuje do aplikacji?")
+
+    def set_value(self, kind, label, value, action):
+        """Zmiana widżetu (slider, checkbox, radio, selectbox, number_input) i rerun"""
+        state = WidgetState(id=self.element(kind, label).id)
+        if kind == "slider":
+            state.double_array_value.data.append(value)
+        elif kind == "checkbox":
+            state.bool_value = value
+        elif kind == "number_input":
+            state.double_value = value
+        else:
+            state.string_value = value  # radio i selectbox - etykieta opcji
+        self.states[state.id] = state
+        self.rerun(action)
+
+    def click(self, kind, label, action, started=None):
+        """Kliknięcie przycisku - wyzwalacz wysyłany tylko w tym jednym rerunie"""
+        trigger = WidgetState(id=self.element(kind, label).id, trigger_value=True)
+        self.rerun(action, triggers=(trigger,), started=started)
+
+    def upload(self, label, name, data, mime, action="upload"):
+        """Plik do st.file_uploader: PUT na serwer, potem stan widżetu z identyfikatorem pliku"""
+        started = time.perf_counter()
+        uploader = self.element("file_uploader", label)
+        if self._xsrf_cookie is None:
+            self.fetch('/_stcore/health')  # ciasteczko XSRF, jak przy wczytaniu strony
+        file_id = uuid.uuid4().hex
+        boundary = uuid.uuid4().hex
+        body = b"".join((
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{name}"\r\n'
+            f'Content-Type: {mime}\r\n\r\n'.encode(),
+            data,
+            f'\r\n--{boundary}--\r\n'.encode(),
+        ))
+        self._request(
+            'PUT', f'/_stcore/upload_file/{self.session_id}/{file_id}', body,
+            {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+        )
+        state = WidgetState(id=uploader.id)
+        info = state.file_uploader_state_value.uploaded_file_info.add()
+        info.file_id, info.name, info.size = file_id, name, len(data)
+        self.states[state.id] = state
+        self.rerun(action, started=started)
+
+    def download(self, label, action):
+        """Pobranie wyniku: plik generowany na żądanie (callable) albo gotowy adres, potem rerun"""
+        started = time.perf_counter()
+        button = self.element("download_button", label)
+        url = button.url
+        if button.deferred_file_id:
+            msg = BackMsg()
+            request = msg.backend_operation_request
+            request.request_id = uuid.uuid4().hex
+            request.session_id = self.session_id
+            request.deferred_file.file_id = button.deferred_file_id
+            self._send(msg)
+            while True:
+                reply = self._receive()
+                if reply.WhichOneof("type") == "backend_operation_response":
+                    response = reply.backend_operation_response
+                    if response.request_id == request.request_id:
+                        break
+            if response.error_msg:
+                raise LoadTestError(f"pobieranie '{label}': {response.error_msg}")
+            url = response.deferred_file.url
+        size = len(self.fetch(url))
+        self.actions.append({
+            "t": self._clock(), "action": f"{action}_file", "seconds": time.perf_counter() - started, "bytes": size,
+        })
+        # Kliknięcie pobierania domyślnie uruchamia też rerun (on_click="rerun")
+        self.click("download_button", label, action)
+
+# ============================================================================
+# SCENARIUSZE
+# ============================================================================
+
+CLEANING_TOOL = "✂️ Czyszczenie i wycinanie"
+
+def cleaning_page_scenario(client, upload, iterations):
+    """streamlit_app.py, narzędzie czyszczenia: upload, suwak, wycinanie, pobranie PNG i PBM"""
+    client.rerun("open")
+    client.set_value("radio", "Wybierz narzędzie", CLEANING_TOOL, "tool")
+    client.upload("📁 Wgraj obraz", *upload)
+    for _ in range(iterations):
+        for value in client.rng.choice(SLIDER_VALUES, 3, replace=False):
+            client.set_value("slider", "Próg binaryzacji", float(value), "threshold")
+        client.set_value("checkbox", "✂️ Wytnij fragment", True, "crop_on")
+        client.set_value("checkbox", "✂️ Wytnij fragment", False, "crop_off")
+        client.download("⬇️ Pobierz PNG", "download_png")
+        client.download("⬇️ Pobierz PBM", "download_pbm")
+
+def cleaning_tool_scenario(client, upload, iterations):
+    """cleaning_tool.py: upload, suwak, przetworzenie i pobranie PNG (aplikacja nie ma wycinania ani PBM)"""
+    client.rerun("open")
+    client.upload("Wybierz plik", *upload)
+    for _ in range(iterations):
+        for value in client.rng.choice(SLIDER_VALUES, 3, replace=False):
+            client.set_value("slider", "Próg binaryzacji", float(value), "threshold")
+        client.click("button", "🚀 Przetwórz obraz", "process")
+        client.download("💾 Pobierz PNG", "download_png")
+
+SCENARIOS = {
+    "streamlit_app.py": cleaning_page_scenario,
+    "cleaning_tool.py": cleaning_tool_scenario,
+}
+
+def make_upload(megapixels, content, seed):
+    """Obraz do wgrania jako (nazwa, bajty, typ MIME) - JPEG jak typowy skan"""
+    img = make_photo(megapixels, seed) if content == "photo" else make_line_art(megapixels, seed)
+    buf = io.BytesIO()
+    img.save(buf, format='JPEG', quality=90)
+    return f"skan-{seed}.jpg", buf.getvalue(), "image/jpeg"
+
+def run_session(index, sessions, port, scenario, upload, args, barrier):
+    """Wątek jednej sesji; wynik (reruny, akcje, błędy) zawsze wraca, także po błędzie"""
+    client = None
+    try:
+        with connect(
+            f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"],
+            max_size=None, open_timeout=args.timeout,
+        ) as ws:
+            client = SessionClient(ws, port, args.timeout, args.think, np.random.default_rng(index))
+            barrier.wait()
+            # Czas w wynikach liczony od wspólnego startu wszystkich sesji
+            client.started = time.perf_counter()
+            time.sleep(args.ramp * index / sessions)
+            scenario(client, upload, args.iterations)
+    except (LoadTestError, OSError, threading.BrokenBarrierError) as e:
+        if client is None:
+            barrier.abort()
+            return {"session": index, "reruns": [], "actions": [], "errors": [{"t": None, "error": str(e)}]}
+        client.errors.append({"t": client._clock(), "action": None, "error": str(e)})
+    return {"session": index, "reruns": client.reruns, "actions": client.actions, "errors": client.errors}
+
+# ============================================================================
+# RAPORT
+# ============================================================================
+
+def percentile(values, p):
+    """Percentyl metodą najbliższej rangi (bez interpolacji - wartość z próby)"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+def latency_summary(values):
+    if not values:
+        return {"count": 0}
+    summary = {"count": len(values)}
+    for p in PERCENTILES:
+        summary[f"p{p}"] = round(percentile(values, p), 4)
+    summary["max"] = round(max(values), 4)
+    return summary
+
+def _by_action(records):
+    groups = {"all": [record["seconds"] for record in records]}
+    for record in records:
+        groups.setdefault(record["action"], []).append(record["seconds"])
+    return {action: latency_summary(values) for action, values in groups.items()}
+
+def summarize_level(sessions, results, duration, samples):
+    reruns = [rerun for result in results for rerun in result["reruns"]]
+    actions = [action for result in results for action in result["actions"]]
+    errors = [dict(error, session=result["session"]) for result in results for error in result["errors"]]
+    cpu = [sample["cpu_percent"] for sample in samples]
+    rss = [sample["rss_mb"] for sample in samples]
+    return {
+        "sessions": sessions,
+        "duration_s": round(duration, 3),
+        "reruns": len(reruns),
+        "fragment_reruns": sum(rerun["kind"] == "fragment" for rerun in reruns),
+        "actions": len(actions),
+        "reruns_per_s": round(len(reruns) / duration, 2) if duration else None,
+        "actions_per_s": round(len(actions) / duration, 2) if duration else None,
+        "download_mb": round(sum(action.get("bytes", 0) for action in actions) / 1e6, 2),
+        "rerun_latency": _by_action(reruns),
+        "action_latency": _by_action(actions),
+        "cpu_mean_percent": round(sum(cpu) / len(cpu), 1) if cpu else None,
+        "cpu_max_percent": max(cpu) if cpu else None,
+        "rss_start_mb": rss[0] if rss else None,
+        "rss_peak_mb": max(rss) if rss else None,
+        "rss_end_mb": rss[-1] if rss else None,
+        "errors": errors,
+        "timeline": samples,
+        "sessions_detail": results,
+    }
+
+def _ms(summary, key):
+    return f"{summary[key] * 1000:>7.0f}" if summary.get("count") else f"{'-':>7}"
+
+def print_level(level):
+    rerun, action = level["rerun_latency"]["all"], level["action_latency"]["all"]
+    print(
+        f"{level['sessions']:>6} {level['reruns_per_s'] or 0:>9.2f} {level['actions_per_s'] or 0:>8.2f} "
+        f"{_ms(rerun, 'p50')} {_ms(rerun, 'p90')} {_ms(rerun, 'p99')} "
+        f"{_ms(action, 'p50')} {_ms(action, 'p90')} {_ms(action, 'p99')} "
+        f"{level['cpu_mean_percent'] or 0:>7.0f} {level['cpu_max_percent'] or 0:>7.0f} "
+        f"{level['rss_peak_mb'] or 0:>8.0f} {len(level['errors']):>6}",
+        flush=True
+    )
+
+def action_report(level):
+    """Percentyle per akcja (ms): rerun i akcja do gotowego podglądu"""
+    lines = [f"  {'akcja':<20} {'n':>4} {'rerun p50':>9} {'p90':>7} {'p99':>7} {'akcja p50':>9} {'p90':>7} {'p99':>7}"]
+    for name, action in level["action_latency"].items():
+        if name == "all":
+            continue
+        rerun = level["rerun_latency"].get(name, {"count": 0})
+        lines.append(
+            f"  {name:<20} {action['count']:>4} {_ms(rerun, 'p50'):>9} {_ms(rerun, 'p90')} {_ms(rerun, 'p99')} "
+            f"{_ms(action, 'p50'):>9} {_ms(action, 'p90')} {_ms(action, 'p99')}"
+        )
+    return lines
+
+def run_level(args, sessions, uploads, scenario):
+    """Świeży serwer, N sesji naraz, próbkowanie CPU/RSS do końca ostatniej sesji"""
+    port = free_port()
+    log = tempfile.TemporaryFile(mode='w+')
+    process = start_server(args.app, port, log)
+    try:
+        if not wait_for_server(process, port):
+            log.seek(0)
+            raise SystemExit(f"Serwer nie wystartował:\n{log.read()[-2000:]}")
+        barrier = threading.Barrier(sessions + 1)
+        results = [None] * sessions
+
+        def worker(index):
+            results[index] = run_session(
+                index, sessions, port, scenario, uploads[0 if args.same_image else index], args, barrier
+            )
+
+        threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(sessions)]
+        for thread in threads:
+            thread.start()
+        try:
+            barrier.wait(args.timeout)
+        except threading.BrokenBarrierError:
+            pass  # sesja nie połączyła się - błąd trafi do jej wyniku
+        # Początek pomiaru: wszystkie sesje połączone, scenariusze ruszają razem
+        started = time.perf_counter()
+        sampler = ResourceSampler(process.pid, started)
+        sampler.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+        sampler.stop()
+    finally:
+        stop_server(process)
+        log.close()
+    return summarize_level(sessions, results, duration, sampler.samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', default='streamlit_app.py', choices=sorted(SCENARIOS), help="testowana aplikacja")
+    parser.add_argument('--sessions', default=','.join(map(str, DEFAULT_SESSIONS)),
+                        help="liczby równoczesnych sesji, po przecinku (każda na świeżym serwerze)")
+    parser.add_argument('--iterations', type=int, default=2, help="powtórzenia scenariusza po wgraniu pliku")
+    parser.add_argument('--megapixels', type=float, default=6, help="rozmiar wgrywanego obrazu")
+    parser.add_argument('--content', default='lineart', choices=('lineart', 'photo'), help="treść obrazu")
+    parser.add_argument('--same-image', action='store_true',
+                        help="wszystkie sesje wgrywają ten sam plik (wspólny cache wyników)")
+    parser.add_argument('--think', type=float, default=0.3, help="przerwa między akcjami w s (±50%%)")
+    parser.add_argument('--ramp', type=float, default=0.0, help="start sesji rozłożony na tyle sekund")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="limit czekania na serwer w s")
+    parser.add_argument('-o', '--output', default='load_test.json', help="plik wyników JSON")
+    args = parser.parse_args()
+
+    levels = [int(s) for s in args.sessions.split(',')]
+    if min(levels) < 1:
+        parser.error("liczba sesji musi być dodatnia")
+    scenario = SCENARIOS[args.app]
+
+    print(f"Generuję {1 if args.same_image else max(levels)} obraz(y) {args.megapixels:g} MP...", file=sys.stderr, flush=True)
+    uploads = [make_upload(args.megapixels, args.content, seed) for seed in range(1 if args.same_image else max(levels))]
+
+    results = []
+    print(f"{'sesje':>6} {'reruny/s':>9} {'akcje/s':>8} {'rerun ms p50':>12} {'p90':>7} {'p99':>7} "
+          f"{'akcja ms p50':>12} {'p90':>7} {'p99':>7} {'CPU %':>7} {'maks.':>7} {'RSS MB':>8} {'błędy':>6}")
+    for sessions in levels:
+        level = run_level(args, sessions, uploads, scenario)
+        results.append(level)
+        print_level(level)
+
+    for level in results:
+        print(f"\n{level['sessions']} sesji - czasy w ms:")
+        print("\n".join(action_report(level)))
+        for error in level["errors"][:5]:
+            print(f"  BŁĄD sesja {error['session']} ({error.get('action')}): {error['error']}")
+
+    environment = environment_info()
+    environment["streamlit"] = streamlit.__version__
+    report = {
+        "environment": environment,
+        "app": args.app,
+        "megapixels": args.megapixels,
+        "content": args.content,
+        "same_image": args.same_image,
+        "iterations": args.iterations,
+        "think_s": args.think,
+        "ramp_s": args.ramp,
+        "levels": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+    print(f"\nZapisano {len(results)} poziomów obciążenia do {args.output}")
+    if any(level["errors"] for level in results):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
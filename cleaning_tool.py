@@ -5,50 +5,45 @@ Wersja web (Streamlit) bazowana na image_processor_gui.py
 
 import streamlit as st
 from PIL import Image
-import numpy as np
 import io
+import hashlib
+import uuid
+
+# Funkcje przetwarzania są wspólne z PapercraftTools (pakiet papercraft)
+from papercraft.core import process_image, convert_image_to_bytes
+from papercraft.cache import CACHE_MAX_MB, PACKED_MASK, ResultCache
 
 # ============================================================================
-# FUNKCJE CORE
+# MAGAZYN WYNIKÓW
 # ============================================================================
 
-def reduce_to_2_colors(img, threshold=128):
-    """Redukuje obraz do 2 kolorów (czarny i biały)"""
-    if img.mode != 'L':
-        img = img.convert('L')
-    
-    img_array = np.array(img)
-    binary = (img_array > threshold).astype(np.uint8) * 255
-    
-    return Image.fromarray(binary, mode='L')
+@st.cache_resource
+def get_image_store():
+    """Wyniki wszystkich sesji w jednym LRU (maski 1-bit, limit CACHE_MAX_MB)"""
+    return ResultCache(max_bytes=CACHE_MAX_MB * 1024 * 1024)
 
-def remove_white_to_transparent(img):
-    """Zamienia biały kolor na przezroczystość"""
-    if img.mode != 'RGBA':
-        img = img.convert('RGBA')
-    
-    data = np.array(img)
-    white_mask = (data[:,:,0] > 250) & (data[:,:,1] > 250) & (data[:,:,2] > 250)
-    data[white_mask] = [255, 255, 255, 0]
-    
-    return Image.fromarray(data, mode='RGBA')
+def get_session_id():
+    """Krótki identyfikator sesji - do statystyk magazynu"""
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex[:8]
+    return st.session_state.session_id
 
-def process_image(img, threshold=128):
-    """Pełny proces: redukcja kolorów + usunięcie tła"""
-    # Krok 1: Redukcja do 2 kolorów
-    img = reduce_to_2_colors(img, threshold=threshold)
-    
-    # Krok 2: Biały -> przezroczysty
-    img = remove_white_to_transparent(img)
-    
-    return img
+def get_upload_digest(uploaded_file):
+    """Hash zawartości wgranego pliku, liczony raz na upload"""
+    digests = st.session_state.setdefault("upload_digests", {})
+    file_key = (uploaded_file.file_id, uploaded_file.size)
+    if file_key not in digests:
+        digests.clear()
+        digests[file_key] = hashlib.blake2b(uploaded_file.getvalue(), digest_size=20).hexdigest()
+    return digests[file_key]
 
-def convert_image_to_bytes(img):
-    """Konwertuje obraz do bytes do pobrania"""
-    buf = io.BytesIO()
-    img.save(buf, format='PNG')
-    buf.seek(0)
-    return buf.getvalue()
+def load_processed(uploaded_file, digest, threshold):
+    """Obraz po obróbce - z magazynu, a po usunięciu z niego liczony od nowa z uploadu"""
+    return get_image_store().get_or_compute(
+        ("processed", digest, threshold),
+        lambda: process_image(Image.open(io.BytesIO(uploaded_file.getvalue())), threshold=threshold),
+        codec=PACKED_MASK, session=get_session_id()
+    )
 
 # ============================================================================
 # STREAMLIT APP
@@ -118,6 +113,20 @@ with st.sidebar:
     3. **Export PNG**  
        Gotowy do użycia!
     """)
+    
+    # Zajętość wspólnego magazynu wyników (wszystkie sesje)
+    with st.expander("📊 Pamięć wyników"):
+        store_stats = get_image_store().stats()
+        session_usage = get_image_store().session_stats().get(get_session_id())
+        st.caption(
+            f"Wpisy: {store_stats['entries']} | "
+            f"{store_stats['bytes'] / 1024**2:.1f} / {store_stats['max_bytes'] / 1024**2:.0f} MB | "
+            f"Usunięte: {store_stats['evictions']}"
+        )
+        st.caption(
+            f"Ta sesja: {session_usage['entries']} wpisów, {session_usage['share'] / 1024**2:.1f} MB"
+            if session_usage else "Ta sesja: brak wyników w pamięci"
+        )
 
 # Main area
 col1, col2 = st.columns(2)
@@ -164,31 +173,38 @@ with col2:
         """, unsafe_allow_html=True)
         
         # Process button
+        upload_digest = get_upload_digest(uploaded_file)
+        
         if st.button("🚀 Przetwórz obraz", type="primary", use_container_width=True):
             with st.spinner("Przetwarzam..."):
-                # Process
-                processed_img = process_image(original_img.copy(), threshold=threshold)
+                load_processed(uploaded_file, upload_digest, threshold)
                 
-                # Save to session state
-                st.session_state.processed_img = processed_img
-                st.session_state.original_filename = uploaded_file.name
+                # W sesji tylko parametry - sam obraz jest we wspólnym magazynie
+                st.session_state.processed = {
+                    "digest": upload_digest,
+                    "threshold": threshold,
+                    "filename": uploaded_file.name,
+                }
             
             st.success("✅ Gotowe!")
         
-        # Show processed if exists
-        if 'processed_img' in st.session_state:
+        # Show processed if exists (dla bieżącego uploadu)
+        processed = st.session_state.get("processed")
+        if processed is not None and processed["digest"] == upload_digest:
             st.markdown("**Po obróbce:**")
             
             # Display with checkered background (żeby pokazać przezroczystość)
-            st.image(st.session_state.processed_img, use_container_width=True)
+            processed_img = load_processed(uploaded_file, upload_digest, processed["threshold"])
+            st.image(processed_img, use_container_width=True)
             
             # Download button
             st.divider()
             
-            processed_bytes = convert_image_to_bytes(st.session_state.processed_img)
+            # Kodowanie PNG dopiero po kliknięciu pobierania (callable)
+            processed_bytes = lambda: convert_image_to_bytes(processed_img)
             
             # Generate filename
-            original_name = st.session_state.original_filename
+            original_name = processed["filename"]
             new_filename = original_name.rsplit('.', 1)[0] + '_cleaned.png'
             
             st.download_button(
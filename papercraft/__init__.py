@@ -0,0 +1,151 @@
+"""
+🛠️ PapercraftTools - biblioteka przetwarzania obrazów (bez Streamlit)
+
+Moduły ładowane są leniwie: `import papercraft` nie wczytuje NumPy ani
+Pillow, dopiero pierwsze użycie funkcji importuje jej moduł.
+"""
+
+import importlib
+
+__version__ = "0.1.0"
+
+# Nazwa publiczna -> moduł, w którym jest zdefiniowana
+_EXPORTS = {
+    # core
+    "reduce_to_2_colors": "core",
+    "remove_white_to_transparent": "core",
+    "binarize_to_transparent": "core",
+    "process_image": "core",
+    "transparency_lut32": "core",
+    "binarize_array": "core",
+    "flatten_to_white_background": "core",
+    "convert_image_to_bytes": "core",
+    # streaming
+    "STREAM_BAND_HEIGHT": "streaming",
+    "STREAMING_MIN_PIXELS": "streaming",
+    "decode_region": "streaming",
+    "iter_gray_bands": "streaming",
+    "PNGStreamWriter": "streaming",
+    "PBMStreamWriter": "streaming",
+    "BilevelPNGStreamWriter": "streaming",
+    "PNG_PRESETS": "streaming",
+    "encode_png_bilevel": "streaming",
+    "encode_clean_png": "streaming",
+    "iter_black_mask": "streaming",
+    "write_pbm": "streaming",
+    "encode_pbm": "streaming",
+    "stream_clean_image": "streaming",
+    # threshold
+    "grayscale_histogram": "threshold",
+    "black_coverage": "threshold",
+    "otsu_threshold": "threshold",
+    "triangle_threshold": "threshold",
+    "percentile_threshold": "threshold",
+    "THRESHOLD_METHODS": "threshold",
+    "suggest_threshold": "threshold",
+    "SWEEP_THRESHOLDS": "threshold",
+    "threshold_sweep": "threshold",
+    # preview
+    "PREVIEW_WIDTH": "preview",
+    "PreviewPyramid": "preview",
+    "build_preview_pyramid": "preview",
+    "scale_box": "preview",
+    # cache
+    "CACHE_MAX_MB": "cache",
+    "estimate_size": "cache",
+    "PackedMask": "cache",
+    "Codec": "cache",
+    "PACKED_MASK": "cache",
+    "ResultCache": "cache",
+    # batch
+    "BATCH_WORKERS": "batch",
+    "list_batch_sources": "batch",
+    "list_path_sources": "batch",
+    "gray_histogram_bands": "batch",
+    "clean_image_bytes": "batch",
+    "batch_output_name": "batch",
+    "process_batch": "batch",
+    "run_batch": "batch",
+    "BATCH_ARCHIVE_DIR": "batch",
+    "BATCH_ARCHIVE_MAX_AGE": "batch",
+    "prune_batch_archives": "batch",
+    "new_batch_archive": "batch",
+    "read_batch_archive": "batch",
+    # profiling
+    "StageMetrics": "profiling",
+    "StageProfiler": "profiling",
+    "ProfiledCache": "profiling",
+    # adaptive
+    "LOCAL_METHODS": "adaptive",
+    "local_threshold_mask": "adaptive",
+    "local_gray": "adaptive",
+    # jobs
+    "JOB_WORKERS": "jobs",
+    "JOB_IDLE_SECONDS": "jobs",
+    "JobExecutor": "jobs",
+    # morphology
+    "pack_mask": "morphology",
+    "unpack_mask": "morphology",
+    "binary_dilation": "morphology",
+    "binary_erosion": "morphology",
+    "binary_opening": "morphology",
+    "binary_closing": "morphology",
+    "mask_runs": "morphology",
+    "union_roots": "morphology",
+    "label_runs": "morphology",
+    "remove_small_components": "morphology",
+    "fill_small_holes": "morphology",
+    "clean_mask": "morphology",
+    "clean_gray": "morphology",
+    # parts
+    "find_parts": "parts",
+    "write_parts_zip": "parts",
+    "clean_parts_bytes": "parts",
+    # palette
+    "PALETTE_METHODS": "palette",
+    "PALETTE_MIN_COLORS": "palette",
+    "PALETTE_MAX_COLORS": "palette",
+    "ColorHistogram": "palette",
+    "fit_palette": "palette",
+    "palette_lut": "palette",
+    "quantize_image": "palette",
+    "quantize_image_bytes": "palette",
+    # resize
+    "PAPER_SIZES_MM": "resize",
+    "image_dpi": "resize",
+    "paper_size_px": "resize",
+    "target_size": "resize",
+    "fast_resize": "resize",
+    "open_resized": "resize",
+    "resize_image_bytes": "resize",
+    # pages
+    "MULTIPAGE_EXTENSIONS": "pages",
+    "page_count": "pages",
+    "open_page": "pages",
+    "page_bytes": "pages",
+    "page_thumbnail": "pages",
+    "iter_gray_pages": "pages",
+    "write_pages_zip": "pages",
+    "write_pages_tiff": "pages",
+    "clean_pages_bytes": "pages",
+    # workers
+    "OFFLOAD_MIN_PIXELS": "workers",
+    "PoolBusy": "workers",
+    "WorkerPool": "workers",
+    # vectorize
+    "mask_to_svg": "vectorize",
+    "image_to_svg": "vectorize",
+}
+
+__all__ = sorted(_EXPORTS)
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'papercraft' has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,135 @@
+"""
+🌓 Próg lokalny - Sauvola, Bradley i średnia minus C dla nierówno oświetlonych skanów
+Średnia (i odchylenie) okna z obrazu całkowego: koszt na piksel nie zależy
+od rozmiaru okna. Obraz liczony pasami wierszy - pamięć rośnie z pasem, nie z obrazem
+"""
+
+import numpy as np
+
+# ============================================================================
+# OBRAZ CAŁKOWY
+# ============================================================================
+
+# Wiersze wyniku liczone naraz (plus promień okna nad i pod pasem)
+BAND_ROWS = 256
+
+def _window_bounds(count, radius):
+    """Początki i końce (wyłączne) okien przyciętych do obrazu, dla każdej pozycji"""
+    positions = np.arange(count)
+    return np.maximum(positions - radius, 0), np.minimum(positions + radius + 1, count)
+
+def _row_window_sums(integral, radius, col_lo, col_hi):
+    """Sumy okien wzdłuż wierszy z sum narastających (kolumna zer na początku)"""
+    width = integral.shape[1] - 1
+    if width <= 2 * radius + 1:
+        return integral[:, col_hi] - integral[:, col_lo]
+    sums = np.empty((integral.shape[0], width), dtype=integral.dtype)
+    # Środek wycinkami, przy brzegach okno przycięte - tam indeksy
+    np.subtract(integral[:, 2 * radius + 1:], integral[:, :width - 2 * radius], out=sums[:, radius:width - radius])
+    sums[:, :radius] = integral[:, col_hi[:radius]]
+    sums[:, width - radius:] = integral[:, -1:] - integral[:, col_lo[width - radius:]]
+    return sums
+
+def _window_sums(slab, rows, radius, col_lo, col_hi, dtype):
+    """Sumy okien (2r+1)^2 dla wierszy rows wycinka slab - obraz całkowy liczony osiami"""
+    lo, hi = _window_bounds(slab.shape[0], radius)
+    column = np.zeros((slab.shape[0] + 1, slab.shape[1]), dtype=dtype)
+    # Wiersz po wierszu - szybciej niż cumsum(axis=0) dla szerokich skanów
+    for index, row in enumerate(slab):
+        np.add(column[index], row, out=column[index + 1])
+    vertical = column[hi[rows]] - column[lo[rows]]
+
+    integral = np.zeros((len(rows), slab.shape[1] + 1), dtype=dtype)
+    np.cumsum(vertical, axis=1, out=integral[:, 1:])
+    return _row_window_sums(integral, radius, col_lo, col_hi), hi[rows] - lo[rows]
+
+def _sum_dtype(peak, radius):
+    """uint32, gdy suma jednego okna się mieści.
+
+    Sumy narastające mogą się przekręcić - różnica modulo 2^32 i tak daje
+    dokładną sumę okna, więc granicą jest okno, a nie szerokość obrazu.
+    """
+    return np.uint32 if peak * (2 * radius + 1) ** 2 < 2 ** 32 else np.uint64
+
+# ============================================================================
+# PROGI LOKALNE
+# ============================================================================
+
+# Metoda -> domyślna czułość k: Sauvola (udział odchylenia), Bradley
+# (o ile ciemniej od średniej, ułamek), średnia - C (poziomy jasności)
+LOCAL_METHODS = {
+    "sauvola": 0.2,
+    "bradley": 0.15,
+    "mean": 10.0,
+}
+DEFAULT_WINDOW = 51
+SAUVOLA_RANGE = 128.0  # R - zakres odchylenia dla jasności 8-bit
+# Próg dla wyniku local_gray (0/255) - dowolny z 0-254 daje to samo
+LOCAL_OUTPUT_THRESHOLD = 128
+
+def local_enabled(local):
+    """Czy ustawienia (słownik, pary (nazwa, wartość) albo None) włączają próg lokalny"""
+    return dict(local or ()).get("method") in LOCAL_METHODS
+
+def local_threshold_mask(gray, method="sauvola", window=DEFAULT_WINDOW, k=None):
+    """Maska czerni (True) z progu liczonego dla okna window x window wokół piksela.
+
+    Sauvola: T = m * (1 + k * (s / R - 1)); Bradley: T = m * (1 - k);
+    mean: T = m - k. Czarny jest piksel <= T (jak w progu globalnym).
+    """
+    if method not in LOCAL_METHODS:
+        raise ValueError(f"Nieznana metoda progu lokalnego: {method}")
+    k = LOCAL_METHODS[method] if k is None else k
+    gray = np.asarray(gray)
+    height, width = gray.shape
+    radius = max(int(window) // 2, 1)
+    col_lo, col_hi = _window_bounds(width, radius)
+    inverse_cols = 1 / (col_hi - col_lo).astype(np.float32)
+    mask = np.empty((height, width), dtype=bool)
+
+    # Pas co najmniej 4 promienie - inaczej zakładki nad i pod pasem dominują
+    band = max(BAND_ROWS, 4 * radius)
+    for top in range(0, height, band):
+        bottom = min(top + band, height)
+        slab_top = max(top - radius, 0)
+        slab = gray[slab_top:min(bottom + radius, height)]
+        rows = np.arange(top - slab_top, bottom - slab_top)
+
+        # Działania w miejscu na float32 - pas jest przeliczany kilkanaście razy
+        sums, row_count = _window_sums(slab, rows, radius, col_lo, col_hi, _sum_dtype(255, radius))
+        inverse_area = np.outer(1 / row_count.astype(np.float32), inverse_cols)
+        local = sums.astype(np.float32)
+        local *= inverse_area
+
+        if method == "sauvola":
+            squares, _ = _window_sums(
+                slab.astype(np.uint32) ** 2, rows, radius, col_lo, col_hi, _sum_dtype(255 ** 2, radius)
+            )
+            deviation = squares.astype(np.float32)
+            deviation *= inverse_area
+            deviation -= local * local
+            np.maximum(deviation, 0, out=deviation)
+            np.sqrt(deviation, out=deviation)
+            deviation *= k / SAUVOLA_RANGE
+            deviation += 1 - k
+            local *= deviation
+        elif method == "bradley":
+            local *= 1 - k
+        else:
+            local -= k
+        np.less_equal(gray[top:bottom], local, out=mask[top:bottom])
+    return mask
+
+def local_gray(gray, local, scale=1.0):
+    """Jasność -> jasność 0/255 po progu lokalnym (None/bez metody - bez zmian).
+
+    local to słownik lub pary: method, window (px pełnej rozdzielczości,
+    przeliczany przez scale dla podglądu) i k. Wynik przechodzi przez
+    LOCAL_OUTPUT_THRESHOLD do encoderów i clean_gray bez zmian.
+    """
+    if not local_enabled(local):
+        return gray
+    local = dict(local)
+    window = max(round(local.get("window", DEFAULT_WINDOW) * scale), 3)
+    mask = local_threshold_mask(gray, local["method"], window, local.get("k"))
+    return np.where(mask, np.uint8(0), np.uint8(255))
@@ -0,0 +1,264 @@
+"""
+🔄 Batch processing - wiele plików (lub ZIP-ów) jednym poleceniem
+Wspólne dla zakładki w aplikacji i dla CLI
+"""
+
+import io
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+from PIL import Image
+
+from .streaming import (
+    STREAMING_MIN_PIXELS, DEFAULT_PNG_PRESET, decode_region, iter_gray_bands, encode_pbm, encode_clean_png,
+    stream_clean_image,
+)
+from .threshold import grayscale_histogram, suggest_threshold
+from .morphology import cleanup_enabled, clean_gray
+from .adaptive import LOCAL_OUTPUT_THRESHOLD, local_enabled, local_gray
+from .resize import image_dpi, resize_enabled, open_resized
+
+# ============================================================================
+# ŹRÓDŁA
+# ============================================================================
+
+BATCH_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+BATCH_WORKERS = os.cpu_count() or 1
+
+def _zip_sources(archive):
+    """(nazwa, loader) dla obrazów wewnątrz otwartego archiwum ZIP"""
+    sources = []
+    for info in archive.infolist():
+        name = info.filename
+        if info.is_dir() or name.startswith('__MACOSX/'):
+            continue
+        if name.lower().endswith(BATCH_IMAGE_EXTENSIONS):
+            sources.append((name, lambda archive=archive, info=info: archive.read(info)))
+    return sources
+
+def list_batch_sources(uploaded_files):
+    """Lista (nazwa, loader) dla wgranych plików i obrazów wewnątrz ZIP-ów.
+
+    Bajty plików z ZIP-a są czytane dopiero przez loader, więc na liście
+    nie ma zdekodowanych ani nawet rozpakowanych obrazów. Wystarczą
+    obiekty z atrybutem name i metodą getvalue() (np. UploadedFile).
+    """
+    sources = []
+    for uploaded in uploaded_files:
+        if uploaded.name.lower().endswith('.zip'):
+            sources.extend(_zip_sources(zipfile.ZipFile(io.BytesIO(uploaded.getvalue()))))
+        else:
+            sources.append((uploaded.name, uploaded.getvalue))
+    return sources
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _raise(exc):
+    raise exc
+
+def list_path_sources(paths):
+    """Lista (nazwa, loader) dla plików na dysku - jak list_batch_sources"""
+    sources = []
+    for path in paths:
+        if path.lower().endswith('.zip'):
+            try:
+                archive = zipfile.ZipFile(path)
+            except (OSError, zipfile.BadZipFile) as exc:
+                # Nieczytelne archiwum zgłaszamy jak każdy inny błędny plik partii
+                sources.append((os.path.basename(path), lambda exc=exc: _raise(exc)))
+            else:
+                sources.extend(_zip_sources(archive))
+        else:
+            sources.append((os.path.basename(path), lambda path=path: _read_file(path)))
+    return sources
+
+# ============================================================================
+# PRZETWARZANIE
+# ============================================================================
+
+def gray_histogram_bands(data):
+    """Histogram jasności liczony pasami - bez pełnego obrazu L w pamięci"""
+    hist = np.zeros(256, dtype=np.int64)
+    for gray in iter_gray_bands(data):
+        hist += np.bincount(gray.ravel(), minlength=256)
+    return hist
+
+def clean_image_bytes(data, threshold=128, format='PNG', threshold_method=None, png_preset=DEFAULT_PNG_PRESET,
+                      box=None, cleanup=None, local=None, resize=None):
+    """Pełny proces dla jednego pliku, bez Streamlit.
+
+    Zwraca (bajty wyniku, megapiksele, użyty próg). Gdy podano
+    threshold_method, próg dobierany jest z histogramu (suggest_threshold).
+    png_preset to klucz PNG_PRESETS (1-bit z tRNS lub "rgba"); box
+    (x1, y1, x2, y2) wycina fragment już przy dekodowaniu. cleanup to
+    ustawienia clean_mask - składowe spójne wymagają całej maski, więc
+    wtedy obraz nie jest przetwarzany pasami. local (method, window, k)
+    zastępuje próg globalny progiem lokalnym (local_gray). resize (jak
+    w target_size) zmniejsza obraz przed progowaniem - box i megapiksele
+    dotyczą wtedy obrazu po zmianie rozmiaru. DPI (z resize albo z pliku)
+    trafia do metadanych wyniku.
+    """
+    img = Image.open(io.BytesIO(data))
+    resized = resize_enabled(resize)
+    if resized:
+        img, dpi = open_resized(data, resize)
+    else:
+        dpi = image_dpi(img)
+    width, height = img.size
+    if box is not None:
+        width, height = box[2] - box[0], box[3] - box[1]
+
+    if local_enabled(local):
+        threshold = LOCAL_OUTPUT_THRESHOLD
+    elif threshold_method is not None:
+        hist = grayscale_histogram(img) if resized else gray_histogram_bands(data)
+        threshold = suggest_threshold(hist, threshold_method)
+
+    # Po zmianie rozmiaru obraz jest już w pamięci (i zwykle mały) - bez pasów
+    whole_mask = resized or cleanup_enabled(cleanup) or local_enabled(local)
+    if width * height >= STREAMING_MIN_PIXELS and not whole_mask:
+        buf = io.BytesIO()
+        stream_clean_image(data, buf, threshold=threshold, format=format, box=box, png_preset=png_preset, dpi=dpi)
+        output = buf.getvalue()
+    else:
+        if box is not None:
+            img = img.crop(box) if resized else decode_region(data, box)
+        gray = np.asarray(img.convert('L') if img.mode != 'L' else img)
+        gray = clean_gray(local_gray(gray, local), threshold, cleanup)
+        if format == 'PBM':
+            output = encode_pbm(gray, threshold, dpi)
+        else:
+            output = encode_clean_png(gray, threshold, png_preset, dpi)
+
+    return output, width * height / 1e6, threshold
+
+def batch_output_name(source_name, format, used_names):
+    """Nazwa pliku wyniku (jak w narzędziu czyszczenia), unikalna w partii"""
+    extension = '.png' if format == 'PNG' else '.pbm'
+    base = source_name.rsplit('.', 1)[0] + '_processed'
+    name = base + extension
+    counter = 2
+    while name in used_names:
+        name = f"{base}_{counter}{extension}"
+        counter += 1
+    used_names.add(name)
+    return name
+
+def process_batch(sources, on_result, threshold=128, format='PNG', threshold_method=None,
+                  max_workers=BATCH_WORKERS, on_progress=None, executor=None, png_preset=DEFAULT_PNG_PRESET,
+                  cleanup=None, local=None, resize=None):
+    """Przetwarza pliki równolegle i oddaje każdy wynik do on_result(nazwa, bajty).
+
+    W locie jest najwyżej 2 * max_workers plików, więc pamięć nie rośnie
+    z liczbą plików. on_progress(done, total, summary) wołane po każdym pliku.
+    Domyślnie wątki (NumPy i Pillow zwalniają GIL); CLI podaje pulę procesów.
+    """
+    summary = {"done": 0, "failed": [], "megapixels": 0.0, "seconds": 0.0}
+    started = time.perf_counter()
+    pending = {}
+    queue = iter(sources)
+
+    def finish(name, error=None):
+        if error is not None:
+            summary["failed"].append((name, str(error)))
+        summary["done"] += 1
+        summary["seconds"] = time.perf_counter() - started
+        if on_progress is not None:
+            on_progress(summary["done"], len(sources), summary)
+
+    def submit_next(pool):
+        for name, loader in queue:
+            # Brak pliku albo uszkodzony wpis ZIP-a to błąd tego pliku, nie całej partii
+            try:
+                data = loader()
+            except Exception as exc:
+                finish(name, exc)
+                continue
+            future = pool.submit(
+                clean_image_bytes, data, threshold, format, threshold_method, png_preset,
+                cleanup=cleanup, local=local, resize=resize
+            )
+            pending[future] = name
+            return True
+        return False
+
+    pool = executor if executor is not None else ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while len(pending) < 2 * max_workers and submit_next(pool):
+            pass
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = pending.pop(future)
+                try:
+                    output, megapixels, _ = future.result()
+                except Exception as exc:
+                    finish(name, exc)
+                else:
+                    on_result(name, output)
+                    summary["megapixels"] += megapixels
+                    finish(name)
+                submit_next(pool)
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+    return summary
+
+def run_batch(sources, zip_fp, threshold=128, format='PNG', threshold_method=None,
+              max_workers=BATCH_WORKERS, on_progress=None, executor=None, png_preset=DEFAULT_PNG_PRESET,
+              cleanup=None, local=None, resize=None):
+    """Przetwarza pliki równolegle i od razu dopisuje wyniki do ZIP-a"""
+    used_names = set()
+    # PNG jest już skompresowany - w ZIP-ie tylko go przechowujemy
+    compression = zipfile.ZIP_STORED if format == 'PNG' else zipfile.ZIP_DEFLATED
+
+    with zipfile.ZipFile(zip_fp, 'w', compression=compression) as archive:
+        def write_entry(name, output):
+            archive.writestr(batch_output_name(name, format, used_names), output)
+
+        return process_batch(sources, write_entry, threshold, format, threshold_method,
+                             max_workers, on_progress, executor, png_preset, cleanup, local, resize)
+
+# ============================================================================
+# ARCHIWA NA DYSKU
+# ============================================================================
+
+# Archiwa partii z aplikacji trzymamy w osobnym katalogu - po zamkniętych sesjach sprząta je wiek pliku
+BATCH_ARCHIVE_DIR = os.environ.get("PAPERCRAFT_BATCH_DIR", os.path.join(tempfile.gettempdir(), "papercraft-batch"))
+BATCH_ARCHIVE_MAX_AGE = float(os.environ.get("PAPERCRAFT_BATCH_MAX_AGE", "3600"))
+
+def prune_batch_archives(directory=BATCH_ARCHIVE_DIR, max_age=BATCH_ARCHIVE_MAX_AGE):
+    """Usuwa archiwa starsze niż max_age sekund; zwraca liczbę usuniętych"""
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass  # inna sesja zdążyła usunąć
+    return removed
+
+def new_batch_archive(directory=BATCH_ARCHIVE_DIR, max_age=BATCH_ARCHIVE_MAX_AGE):
+    """Nowy plik .zip na wynik partii (do zamknięcia przez wołającego); przy okazji sprząta stare archiwa"""
+    os.makedirs(directory, exist_ok=True)
+    prune_batch_archives(directory, max_age)
+    return tempfile.NamedTemporaryFile(suffix='.zip', dir=directory, delete=False)
+
+def read_batch_archive(path):
+    """Bajty gotowego archiwum - czytane dopiero przy pobraniu"""
+    with open(path, 'rb') as archive:
+        return archive.read()
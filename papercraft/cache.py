@@ -0,0 +1,180 @@
+"""
+💾 Cache wyników - LRU z limitem pamięci, wspólny dla wszystkich sesji
+Wyniki trzymane są w zwartej postaci (maski 1-bit, bajty), nie jako RGBA
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from .core import transparency_lut32
+
+# ============================================================================
+# LIMIT I ROZMIAR WPISÓW
+# ============================================================================
+
+# Limit pamięci cache (MB), konfigurowalny zmienną środowiskową
+CACHE_MAX_MB = int(os.environ.get("PAPERCRAFT_CACHE_MB", "512"))
+
+def estimate_size(value):
+    """Przybliżony rozmiar wartości w bajtach (obraz PIL, bytes, obiekty z nbytes)"""
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    if hasattr(value, "nbytes"):
+        # np.ndarray, PreviewPyramid, PackedMask
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    return 0
+
+# ============================================================================
+# ZWARTE KODOWANIA
+# ============================================================================
+
+# Indeks 0 = białe przezroczyste, 1 = czarne nieprzezroczyste
+_MASK_LUT32 = transparency_lut32(0)[[255, 0]]
+
+class PackedMask:
+    """Wynik binarize_to_transparent jako maska 1 bit/px (czarny = 1).
+
+    Wynik ma tylko dwa kolory, więc zapis jest bezstratny, a maska
+    zajmuje 32x mniej niż obraz RGBA.
+    """
+
+    def __init__(self, bits, size):
+        self.bits = bits
+        self.size = size
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    @classmethod
+    def from_image(cls, img):
+        """Pakuje obraz RGBA (czarne/przezroczyste) - czarne to piksele z alfą > 0"""
+        return cls(np.packbits(np.asarray(img.getchannel('A')) > 0, axis=1), img.size)
+
+    def to_image(self):
+        """Odtwarza obraz RGBA identyczny z binarize_to_transparent"""
+        width, height = self.size
+        mask = np.unpackbits(self.bits, axis=1, count=width)
+        return Image.fromarray(_MASK_LUT32[mask].view(np.uint8).reshape(height, width, 4), mode='RGBA')
+
+class Codec:
+    """Para encode/decode - co cache trzyma zamiast wartości i jak ją odtwarza"""
+
+    def __init__(self, encode, decode):
+        self.encode = encode
+        self.decode = decode
+
+# Obrazy po binaryzacji (RGBA) trzymane jako maska 1-bit
+PACKED_MASK = Codec(PackedMask.from_image, PackedMask.to_image)
+
+# ============================================================================
+# CACHE WYNIKÓW
+# ============================================================================
+
+class ResultCache:
+    """Cache LRU wyników przetwarzania z limitem rozmiaru w bajtach.
+
+    Klucze zaczynają się od hasha wgranego pliku, więc ten sam obraz
+    wgrany w różnych sesjach trafia w te same wpisy. Wartości są
+    współdzielone - nie wolno ich modyfikować w miejscu.
+
+    Z codec wpis trzymany jest w zwartej postaci (codec.encode), a każde
+    trafienie odtwarza wartość (codec.decode). Wpisy pamiętają sesje,
+    które ich użyły (session_stats); usunięty wpis liczy się od nowa
+    przy następnym odczycie.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute, codec=None, session=None):
+        """Zwraca wartość z cache albo liczy ją i zapamiętuje"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if session is not None:
+                    entry[2].add(session)
+            else:
+                self.misses += 1
+        
+        if entry is not None:
+            # Dekodowanie poza blokadą - wpis jest niezmienny
+            return codec.decode(entry[0]) if codec is not None else entry[0]
+        
+        # Liczymy poza blokadą - inne sesje nie czekają na nasz obraz
+        value = compute()
+        stored = codec.encode(value) if codec is not None else value
+        size = estimate_size(stored)
+        
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = [stored, size, {session} if session is not None else set()]
+                self.current_bytes += size
+                while self.current_bytes > self.max_bytes:
+                    _, (_, old_size, _) = self._entries.popitem(last=False)
+                    self.current_bytes -= old_size
+                    self.evictions += 1
+        
+        return value
+
+    def peek(self, key, codec=None, session=None, count=True):
+        """Wartość z cache albo None - bez liczenia (np. przed zleceniem w tle).
+
+        count=False tylko sprawdza (odpytywanie w pętli): bez trafienia
+        w licznikach, przesunięcia w LRU i przypisania sesji.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if count:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if session is not None:
+                    entry[2].add(session)
+        return codec.decode(entry[0]) if codec is not None else entry[0]
+
+    def stats(self):
+        """Liczniki trafień/chybień i zajętość cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def session_stats(self):
+        """{sesja: entries, bytes, share} - wpisy używane przez sesję.
+
+        bytes liczy pełny rozmiar każdego wpisu, share dzieli go po równo
+        między sesje, które go używają (suma share = zajętość cache).
+        """
+        with self._lock:
+            entries = [(size, tuple(owners)) for _, size, owners in self._entries.values()]
+        result = {}
+        for size, owners in entries:
+            for owner in owners:
+                usage = result.setdefault(owner, {"entries": 0, "bytes": 0, "share": 0.0})
+                usage["entries"] += 1
+                usage["bytes"] += size
+                usage["share"] += size / len(owners)
+        return result
@@ -0,0 +1,302 @@
+"""
+⌨️ CLI - przetwarzanie bez przeglądarki (cron, skrypty, workery)
+
+Użycie:
+    papercraft clean in/*.jpg --threshold 150 --format pbm -j 8
+    papercraft clean skany.zip --auto otsu --zip wyniki.zip
+    papercraft clean zdjecia/*.jpg --local sauvola --window 75
+    papercraft vectorize logo.png --threshold 140 -o svg/
+    papercraft parts arkusz.png --min-area 400 --padding 8 -o czesci/
+    papercraft palette wzor.png --colors 6 --method median_cut -o kolory/
+    papercraft resize skany/*.tif --source-dpi 1200 --dpi 300 -o male/
+    papercraft clean skany/*.tif --source-dpi 1200 --dpi 300 --format pbm
+"""
+
+import argparse
+import os
+import sys
+
+# NumPy i Pillow importowane są dopiero w komendach - `papercraft --help`
+# i błędy argumentów nie płacą za ich ładowanie
+
+# ============================================================================
+# KOMENDY
+# ============================================================================
+
+def _progress_printer(quiet):
+    """on_progress dla process_batch - jedna linia na plik na stderr"""
+    def on_progress(done, total, summary):
+        if quiet:
+            return
+        seconds = max(summary["seconds"], 1e-9)
+        print(
+            f"\r[{done}/{total}] {done / seconds:.1f} plików/s, "
+            f"{summary['megapixels'] / seconds:.1f} MP/s",
+            end="\n" if done == total else "", file=sys.stderr, flush=True
+        )
+    return on_progress
+
+def _color_count(value):
+    """Typ argparse dla --colors: liczba 2-256 (PALETTE_MIN_COLORS-PALETTE_MAX_COLORS w palette.py)"""
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"nieprawidłowa liczba: {value!r}")
+    if not 2 <= count <= 256:
+        raise argparse.ArgumentTypeError(f"liczba kolorów musi być w zakresie 2-256, podano {count}")
+    return count
+
+def _make_executor(jobs):
+    """Pula procesów dla -j > 1 (obrazy liczone równolegle na wszystkich rdzeniach)"""
+    if jobs <= 1:
+        return None
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('spawn'))
+
+def cmd_clean(args):
+    from .batch import list_path_sources, batch_output_name, process_batch, run_batch
+
+    sources = list_path_sources(args.paths)
+    if not sources:
+        print("Brak obrazów do przetworzenia", file=sys.stderr)
+        return 1
+
+    format = args.format.upper()
+    cleanup = {
+        "min_component": args.min_component, "max_hole": args.max_hole,
+        "open_radius": args.open, "close_radius": args.close,
+    }
+    local = {"method": args.local, "window": args.window, "k": args.k} if args.local else None
+    options = dict(
+        threshold=args.threshold, format=format, threshold_method=args.auto,
+        max_workers=args.jobs, on_progress=_progress_printer(args.quiet), png_preset=args.png_preset,
+        cleanup=cleanup, local=local, resize=_resize_settings(args),
+    )
+    executor = _make_executor(args.jobs)
+    try:
+        if args.zip:
+            with open(args.zip, 'wb') as zip_fp:
+                summary = run_batch(sources, zip_fp, executor=executor, **options)
+        else:
+            os.makedirs(args.output_dir, exist_ok=True)
+            used_names = set()
+
+            def write_file(name, output):
+                out_name = batch_output_name(os.path.basename(name), format, used_names)
+                with open(os.path.join(args.output_dir, out_name), 'wb') as f:
+                    f.write(output)
+
+            summary = process_batch(sources, write_file, executor=executor, **options)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    for name, error in summary["failed"]:
+        print(f"✗ {name}: {error}", file=sys.stderr)
+    if not args.quiet:
+        print(
+            f"Gotowe: {summary['done'] - len(summary['failed'])}/{len(sources)} plików, "
+            f"{summary['megapixels']:.1f} MP w {summary['seconds']:.2f} s",
+            file=sys.stderr
+        )
+    return 1 if summary["failed"] else 0
+
+def _resize_settings(args):
+    """Ustawienia resize z --paper/--dpi/--source-dpi/--width (None, gdy bez zmiany rozmiaru)"""
+    resize = {"paper": args.paper, "dpi": args.dpi, "source_dpi": args.source_dpi, "width": args.width}
+    return resize if any((args.paper, args.dpi, args.width)) else None
+
+def cmd_resize(args):
+    from .resize import resize_image_bytes
+
+    resize = _resize_settings(args)
+    if resize is None:
+        print("Podaj --dpi, --paper albo --width", file=sys.stderr)
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+    format = args.format.upper()
+    extension = {'PNG': '.png', 'JPEG': '.jpg', 'TIFF': '.tif'}[format]
+    failed = 0
+    for path in args.paths:
+        out_path = os.path.join(args.output_dir, os.path.splitext(os.path.basename(path))[0] + '_resized' + extension)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            output = resize_image_bytes(data, resize, format)
+        except Exception as exc:
+            print(f"✗ {path}: {exc}", file=sys.stderr)
+            failed += 1
+            continue
+        with open(out_path, 'wb') as f:
+            f.write(output)
+        if not args.quiet:
+            print(f"✓ {out_path}", file=sys.stderr)
+    return 1 if failed else 0
+
+def cmd_vectorize(args):
+    from .vectorize import image_to_svg
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    failed = 0
+    for path in args.paths:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            svg = image_to_svg(
+                data, args.threshold, tolerance=args.tolerance,
+                min_area=args.min_area, bezier=not args.no_bezier
+            )
+        except Exception as exc:
+            print(f"✗ {path}: {exc}", file=sys.stderr)
+            failed += 1
+            continue
+        out_path = os.path.join(args.output_dir, os.path.splitext(os.path.basename(path))[0] + '.svg')
+        with open(out_path, 'w', encoding='utf-8') as f:
+            f.write(svg)
+        if not args.quiet:
+            print(f"✓ {out_path}", file=sys.stderr)
+    return 1 if failed else 0
+
+def cmd_parts(args):
+    from .parts import write_parts_zip
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    format = args.format.upper()
+    local = {"method": args.local, "window": args.window, "k": args.k} if args.local else None
+    failed = 0
+    for path in args.paths:
+        base_name = os.path.splitext(os.path.basename(path))[0]
+        out_path = os.path.join(args.output_dir, base_name + '_parts.zip')
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            with open(out_path, 'wb') as zip_fp:
+                boxes = write_parts_zip(
+                    data, zip_fp, base_name, args.threshold, format, args.png_preset,
+                    min_area=args.min_area, padding=args.padding, local=local
+                )
+        except Exception as exc:
+            print(f"✗ {path}: {exc}", file=sys.stderr)
+            failed += 1
+            continue
+        if not args.quiet:
+            print(f"✓ {out_path}: {len(boxes)} części", file=sys.stderr)
+    return 1 if failed else 0
+
+def cmd_palette(args):
+    from .palette import quantize_image_bytes
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    failed = 0
+    for path in args.paths:
+        out_path = os.path.join(args.output_dir, os.path.splitext(os.path.basename(path))[0] + '_palette.png')
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            output = quantize_image_bytes(
+                data, args.colors, args.method, transparent_background=not args.no_transparent
+            )
+        except Exception as exc:
+            print(f"✗ {path}: {exc}", file=sys.stderr)
+            failed += 1
+            continue
+        with open(out_path, 'wb') as f:
+            f.write(output)
+        if not args.quiet:
+            print(f"✓ {out_path}", file=sys.stderr)
+    return 1 if failed else 0
+
+# ============================================================================
+# ARGUMENTY
+# ============================================================================
+
+def _add_resize_arguments(parser):
+    parser.add_argument("--dpi", type=int, help="docelowe DPI (z --source-dpi albo DPI z pliku)")
+    parser.add_argument("--source-dpi", type=int, help="DPI źródła (zamiast zapisanego w pliku)")
+    parser.add_argument("--paper", choices=["A4", "A3", "Letter"], help="wpasuj w arkusz przy --dpi (domyślnie 300)")
+    parser.add_argument("--width", type=int, help="szerokość wyniku w px (proporcje zachowane)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="papercraft", description="PapercraftTools - obróbka obrazów bez przeglądarki"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    clean = subparsers.add_parser("clean", help="redukcja do 2 kolorów + usunięcie tła")
+    clean.add_argument("paths", nargs="+", help="obrazy (PNG, JPG, BMP) lub archiwa ZIP")
+    clean.add_argument("--threshold", type=int, default=128, help="próg jasności 0-255 (domyślnie 128)")
+    clean.add_argument("--auto", choices=["otsu", "triangle"], help="dobierz próg automatycznie dla każdego pliku")
+    clean.add_argument(
+        "--local", choices=["sauvola", "bradley", "mean"],
+        help="próg lokalny (dla nierówno oświetlonych zdjęć) zamiast --threshold/--auto"
+    )
+    clean.add_argument("--window", type=int, default=51, help="okno progu lokalnego w px (domyślnie 51)")
+    clean.add_argument("--k", type=float, help="czułość progu lokalnego (domyślnie zależna od metody)")
+    clean.add_argument("--format", choices=["png", "pbm"], default="png", help="format wyniku")
+    clean.add_argument(
+        "--png-preset", choices=["fast", "balanced", "smallest", "rgba"], default="balanced",
+        help="PNG 1-bit z przezroczystością: fast/balanced/smallest; rgba = 8-bit RGBA"
+    )
+    clean.add_argument("--min-component", type=int, default=0, metavar="N", help="usuń plamki mniejsze niż N px")
+    clean.add_argument("--max-hole", type=int, default=0, metavar="N", help="wypełnij dziurki mniejsze niż N px")
+    clean.add_argument("--open", type=int, default=0, metavar="R", help="otwarcie maski promieniem R px")
+    clean.add_argument("--close", type=int, default=0, metavar="R", help="zamknięcie maski promieniem R px")
+    _add_resize_arguments(clean)
+    clean.add_argument("-o", "--output-dir", default=".", help="katalog wyników (domyślnie bieżący)")
+    clean.add_argument("--zip", help="zapisz wszystkie wyniki do jednego archiwum ZIP")
+    clean.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="liczba procesów")
+    clean.add_argument("-q", "--quiet", action="store_true", help="bez postępu na stderr")
+    clean.set_defaults(func=cmd_clean)
+
+    vectorize = subparsers.add_parser("vectorize", help="wektoryzacja maski progu do SVG")
+    vectorize.add_argument("paths", nargs="+", help="obrazy wejściowe")
+    vectorize.add_argument("--threshold", type=int, default=128, help="próg jasności 0-255")
+    vectorize.add_argument("--tolerance", type=float, default=1.0, help="tolerancja upraszczania (px)")
+    vectorize.add_argument("--min-area", type=float, default=2, help="pomijaj kontury mniejsze niż (px²)")
+    vectorize.add_argument("--no-bezier", action="store_true", help="same wielokąty, bez krzywych")
+    vectorize.add_argument("-o", "--output-dir", default=".", help="katalog wyników")
+    vectorize.add_argument("-q", "--quiet", action="store_true", help="bez komunikatów na stderr")
+    vectorize.set_defaults(func=cmd_vectorize)
+
+    parts = subparsers.add_parser("parts", help="podział arkusza na osobne części (ZIP na plik)")
+    parts.add_argument("paths", nargs="+", help="obrazy arkuszy")
+    parts.add_argument("--threshold", type=int, default=128, help="próg jasności 0-255")
+    parts.add_argument("--local", choices=["sauvola", "bradley", "mean"], help="próg lokalny zamiast --threshold")
+    parts.add_argument("--window", type=int, default=51, help="okno progu lokalnego w px")
+    parts.add_argument("--k", type=float, help="czułość progu lokalnego")
+    parts.add_argument("--min-area", type=int, default=400, help="pomijaj składowe mniejsze niż (px)")
+    parts.add_argument("--padding", type=int, default=8, help="margines wokół części (px)")
+    parts.add_argument("--format", choices=["png", "pbm"], default="png", help="format części")
+    parts.add_argument(
+        "--png-preset", choices=["fast", "balanced", "smallest", "rgba"], default="balanced",
+        help="zapis PNG jak w clean"
+    )
+    parts.add_argument("-o", "--output-dir", default=".", help="katalog wyników")
+    parts.add_argument("-q", "--quiet", action="store_true", help="bez komunikatów na stderr")
+    parts.set_defaults(func=cmd_parts)
+
+    palette = subparsers.add_parser("palette", help="redukcja do N kolorów (PNG z paletą)")
+    palette.add_argument("paths", nargs="+", help="obrazy wejściowe")
+    palette.add_argument("--colors", type=_color_count, default=8, help="liczba kolorów 2-256")
+    palette.add_argument(
+        "--method", choices=["kmeans", "median_cut"], default="kmeans", help="dobór palety z histogramu"
+    )
+    palette.add_argument("--no-transparent", action="store_true", help="tło (prawie białe) nieprzezroczyste")
+    palette.add_argument("-o", "--output-dir", default=".", help="katalog wyników")
+    palette.add_argument("-q", "--quiet", action="store_true", help="bez komunikatów na stderr")
+    palette.set_defaults(func=cmd_palette)
+
+    resize = subparsers.add_parser("resize", help="zmiana rozmiaru i DPI (bez progowania)")
+    resize.add_argument("paths", nargs="+", help="obrazy wejściowe")
+    _add_resize_arguments(resize)
+    resize.add_argument("--format", choices=["png", "jpeg", "tiff"], default="png", help="format wyniku")
+    resize.add_argument("-o", "--output-dir", default=".", help="katalog wyników")
+    resize.add_argument("-q", "--quiet", action="store_true", help="bez komunikatów na stderr")
+    resize.set_defaults(func=cmd_resize)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,90 @@
+"""
+🧹 Czyszczenie - redukcja do 2 kolorów, usuwanie tła i zapis wyniku
+"""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+# ============================================================================
+# REDUKCJA KOLORÓW I PRZEZROCZYSTOŚĆ
+# ============================================================================
+
+def reduce_to_2_colors(img, threshold=128):
+    """Redukuje obraz do 2 kolorów (czarny i biały)"""
+    if img.mode != 'L':
+        img = img.convert('L')
+    
+    img_array = np.array(img)
+    binary = (img_array > threshold).astype(np.uint8) * 255
+    
+    return Image.fromarray(binary, mode='L')
+
+def remove_white_to_transparent(img):
+    """Zamienia biały kolor na przezroczystość"""
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    
+    data = np.array(img)
+    white_mask = (data[:,:,0] > 250) & (data[:,:,1] > 250) & (data[:,:,2] > 250)
+    data[white_mask] = [255, 255, 255, 0]
+    
+    return Image.fromarray(data, mode='RGBA')
+
+# Tablica przejść: indeks = jasność piksela, wartość = piksel RGBA wyniku
+_BLACK_OPAQUE = np.array([0, 0, 0, 255], dtype=np.uint8)
+_WHITE_TRANSPARENT = np.array([255, 255, 255, 0], dtype=np.uint8)
+
+def binarize_to_transparent(img, threshold=128):
+    """Redukcja do 2 kolorów + usunięcie białego tła w jednym przebiegu.
+
+    Daje identyczny wynik jak reduce_to_2_colors + remove_white_to_transparent,
+    ale bez pośredniego obrazu L i kopii RGBA - jedna alokacja wyniku przez LUT.
+    """
+    if img.mode != 'L':
+        img = img.convert('L')
+    
+    return Image.fromarray(binarize_array(np.asarray(img), threshold), mode='RGBA')
+
+def process_image(img, threshold=128):
+    """Pełny proces: redukcja kolorów + usunięcie tła"""
+    return binarize_to_transparent(img, threshold=threshold)
+
+def transparency_lut32(threshold):
+    """LUT jasność -> piksel RGBA spakowany w uint32"""
+    lut = np.where((np.arange(256) > threshold)[:, None], _WHITE_TRANSPARENT, _BLACK_OPAQUE)
+    # Piksel RGBA jako jeden uint32 - indeksowanie 1D jest dużo szybsze niż (256, 4)
+    return np.ascontiguousarray(lut, dtype=np.uint8).view(np.uint32).ravel()
+
+def binarize_array(gray, threshold=128, lut32=None):
+    """Tablica jasności (H, W) uint8 -> tablica RGBA (H, W, 4) wyniku"""
+    if lut32 is None:
+        lut32 = transparency_lut32(threshold)
+    return lut32[gray].view(np.uint8).reshape(gray.shape + (4,))
+
+# ============================================================================
+# ZAPIS
+# ============================================================================
+
+def flatten_to_white_background(img):
+    """Spłaszcza obraz na białe tło (dla PBM)"""
+    if img.mode == 'RGBA':
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])
+        return background
+    return img
+
+def convert_image_to_bytes(img, format='PNG'):
+    """Konwertuje obraz do bytes do pobrania"""
+    buf = io.BytesIO()
+    
+    if format == 'PBM':
+        img_flat = flatten_to_white_background(img)
+        img_bw = img_flat.convert('L').convert('1')
+        img_bw.save(buf, format='PPM')
+    else:  # PNG
+        img.save(buf, format='PNG')
+    
+    buf.seek(0)
+    return buf.getvalue()
@@ -0,0 +1,181 @@
+"""
+⏳ Zadania w tle - przetwarzanie podglądu poza wątkiem skryptu Streamlit
+Nowe parametry tej samej sesji zastępują (i anulują) poprzednie zadanie
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ============================================================================
+# ZADANIA
+# ============================================================================
+
+# Wspólna pula dla wszystkich sesji i opóźnienie startu (suwak w ruchu)
+JOB_WORKERS = int(os.environ.get("PAPERCRAFT_JOB_WORKERS", str(os.cpu_count() or 1)))
+JOB_DEBOUNCE_SECONDS = float(os.environ.get("PAPERCRAFT_JOB_DEBOUNCE", "0.15"))
+# Właściciel bez żadnego wywołania przez tyle sekund (np. zamknięta sesja) jest zapominany
+JOB_IDLE_SECONDS = float(os.environ.get("PAPERCRAFT_JOB_IDLE", "600"))
+
+class Job:
+    """Jedno zlecenie: parametry, stan i wynik (albo błąd)"""
+
+    def __init__(self, params, compute):
+        self.params = params
+        self.compute = compute
+        self.state = "queued"  # queued -> running -> done / failed / cancelled
+        self.value = None
+        self.error = None
+        self.submitted = time.perf_counter()
+        self._stop = threading.Event()
+        self.future = None
+
+    @property
+    def stale(self):
+        """Zastąpione nowszym zleceniem - wynik nie trafi do sesji"""
+        return self._stop.is_set()
+
+class JobExecutor:
+    """Pula wątków z jednym aktualnym zleceniem na właściciela.
+
+    Właściciel to np. (sesja, "preview"). submit() z nowymi parametrami
+    anuluje zlecenie czekające w kolejce, a liczone oznacza jako nieaktualne
+    (jego wynik jest odrzucany). Start opóźniony jest o `debounce` sekund,
+    więc pośrednie wartości przeciąganego suwaka nic nie liczą. latest()
+    oddaje ostatni gotowy wynik bez czekania.
+
+    Wyniki trzymane są poza limitem ResultCache, więc właściciele
+    nieużywani dłużej niż `idle` sekund są usuwani przy kolejnym submit()
+    lub settle() - Streamlit nie zgłasza zamknięcia sesji.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, debounce=JOB_DEBOUNCE_SECONDS, idle=JOB_IDLE_SECONDS):
+        self.debounce = debounce
+        self.idle = idle
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="papercraft-job")
+        self._current = {}  # właściciel -> ostatnie zlecenie
+        self._latest = {}   # właściciel -> (parametry, wynik) ostatniego ukończonego
+        self._used = {}     # właściciel -> czas ostatniego wywołania (monotonic)
+        self._lock = threading.Lock()
+        self._counts = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "superseded": 0, "expired": 0}
+
+    def submit(self, owner, params, compute):
+        """Zleca compute() dla właściciela; te same parametry nie liczą się drugi raz"""
+        with self._lock:
+            self._expire_idle()
+            self._used[owner] = time.monotonic()
+            current = self._current.get(owner)
+            if current is not None and current.params == params and not current.stale:
+                return current
+            if current is not None:
+                self._supersede(current)
+            job = Job(params, compute)
+            self._current[owner] = job
+            self._counts["submitted"] += 1
+        job.future = self._pool.submit(self._run, owner, job)
+        return job
+
+    def settle(self, owner, params, value):
+        """Wynik dostępny od ręki (np. z cache) - zastępuje zlecenie w toku"""
+        with self._lock:
+            self._expire_idle()
+            self._used[owner] = time.monotonic()
+            current = self._current.pop(owner, None)
+            if current is not None and current.params != params:
+                self._supersede(current)
+            self._latest[owner] = (params, value)
+
+    def latest(self, owner):
+        """(parametry, wynik) ostatniego ukończonego zlecenia albo None"""
+        with self._lock:
+            if owner in self._used:
+                self._used[owner] = time.monotonic()
+            return self._latest.get(owner)
+
+    def pending(self, owner):
+        """Czy właściciel ma zlecenie w kolejce lub w trakcie liczenia"""
+        with self._lock:
+            current = self._current.get(owner)
+            return current is not None and current.state in ("queued", "running")
+
+    def error(self, owner):
+        """Błąd ostatniego zlecenia właściciela (jeśli się nie udało)"""
+        with self._lock:
+            current = self._current.get(owner)
+            return current.error if current is not None else None
+
+    def forget(self, owner):
+        """Zapomina właściciela (np. nowy plik) - zlecenie w toku jest anulowane"""
+        with self._lock:
+            self._forget(owner)
+
+    def stats(self):
+        """Głębokość kolejki, liczone teraz i liczniki od startu procesu"""
+        with self._lock:
+            jobs = list(self._current.values())
+            counts = dict(self._counts)
+            owners = len(self._used)
+        counts["queued"] = sum(job.state == "queued" for job in jobs)
+        counts["running"] = sum(job.state == "running" for job in jobs)
+        counts["owners"] = owners
+        return counts
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            for job in self._current.values():
+                self._supersede(job)
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _forget(self, owner):
+        # Wołane pod blokadą
+        current = self._current.pop(owner, None)
+        if current is not None:
+            self._supersede(current)
+        self._latest.pop(owner, None)
+        self._used.pop(owner, None)
+
+    def _expire_idle(self):
+        # Wołane pod blokadą; koszt liniowy w liczbie właścicieli (sesji)
+        cutoff = time.monotonic() - self.idle
+        for owner in [owner for owner, used in self._used.items() if used < cutoff]:
+            self._forget(owner)
+            self._counts["expired"] += 1
+
+    def _supersede(self, job):
+        # Wołane pod blokadą; czekające w kolejce wypada od razu
+        if job.state in ("done", "failed", "cancelled") or job.stale:
+            return
+        job._stop.set()
+        if job.state == "queued":
+            job.state = "cancelled"
+            self._counts["cancelled"] += 1
+            if job.future is not None:
+                job.future.cancel()
+        else:
+            self._counts["superseded"] += 1
+
+    def _run(self, owner, job):
+        # Debounce: nowsze zlecenie w tym czasie budzi i kończy to od razu
+        delay = job.submitted + self.debounce - time.perf_counter()
+        if delay > 0 and job._stop.wait(delay):
+            return
+        with self._lock:
+            if job.stale:
+                return
+            job.state = "running"
+
+        try:
+            value = job.compute()
+        except Exception as exc:
+            with self._lock:
+                job.state, job.error = "failed", exc
+                self._counts["failed"] += 1
+            return
+
+        with self._lock:
+            job.state, job.value = "done", value
+            if job.stale:
+                return
+            self._counts["completed"] += 1
+            self._latest[owner] = (job.params, value)
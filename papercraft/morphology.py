@@ -0,0 +1,281 @@
+"""
+🧽 Czyszczenie maski - usuwanie plamek, wypełnianie dziurek, otwarcie i zamknięcie
+Maska czerni: bool (H, W) albo bity spakowane wierszami (np.packbits, axis=1).
+Tylko NumPy - składowe spójne liczone na seriach pikseli, nie piksel po pikselu
+"""
+
+import numpy as np
+
+# ============================================================================
+# BITY
+# ============================================================================
+
+def pack_mask(mask):
+    """Maska bool (H, W) -> bity spakowane wierszami (8 px na bajt)"""
+    return np.packbits(mask, axis=1)
+
+def unpack_mask(bits, width):
+    """Bity spakowane wierszami -> maska bool (H, W)"""
+    return np.unpackbits(bits, axis=1, count=width).view(bool)
+
+def _clear_padding(bits, width):
+    # Bity za ostatnią kolumną (dopełnienie do bajtu) zawsze zerowe
+    spare = bits.shape[1] * 8 - width
+    if spare:
+        bits[:, -1] &= np.uint8((0xFF << spare) & 0xFF)
+    return bits
+
+def _shift_columns(bits, shift):
+    """Przesunięcie pikseli w wierszach o shift kolumn (> 0 w prawo), z zerami na brzegu"""
+    out = np.zeros_like(bits)
+    nbytes = bits.shape[1]
+    byte_shift, bit_shift = divmod(abs(shift), 8)
+    if byte_shift >= nbytes:
+        return out
+    if shift >= 0:
+        src = bits[:, :nbytes - byte_shift]
+        if bit_shift:
+            out[:, byte_shift:] = src >> bit_shift
+            out[:, byte_shift + 1:] |= src[:, :-1] << (8 - bit_shift)
+        else:
+            out[:, byte_shift:] = src
+    else:
+        src = bits[:, byte_shift:]
+        if bit_shift:
+            out[:, :nbytes - byte_shift] = src << bit_shift
+            out[:, :nbytes - byte_shift - 1] |= src[:, 1:] >> (8 - bit_shift)
+        else:
+            out[:, :nbytes - byte_shift] = src
+    return out
+
+def _shift_rows(bits, shift):
+    """Przesunięcie wierszy o shift (> 0 w dół), z zerami na brzegu"""
+    out = np.zeros_like(bits)
+    if abs(shift) >= bits.shape[0]:
+        return out
+    if shift >= 0:
+        out[shift:] = bits[:bits.shape[0] - shift]
+    else:
+        out[:shift] = bits[-shift:]
+    return out
+
+def _window_or(bits, radius, shift):
+    """OR po oknie [-radius, radius] wzdłuż jednej osi - log2(okna) przesunięć zamiast okna.
+
+    Każdy kierunek osobno: przesunięcie z powrotem odzyskałoby piksele,
+    które wyszły poza obraz (w dopełnienie bajtu).
+    """
+    length = radius + 1
+    result = None
+    for direction in (1, -1):
+        acc = bits.copy()
+        span = 1
+        while span * 2 <= length:
+            acc |= shift(acc, direction * span)
+            span *= 2
+        if span < length:
+            acc |= shift(acc, direction * (length - span))
+        result = acc if result is None else result | acc
+    return result
+
+# ============================================================================
+# MORFOLOGIA (kwadrat 2r+1 x 2r+1)
+# ============================================================================
+
+def _as_bits(mask, width):
+    if mask.dtype == bool:
+        return pack_mask(mask), mask.shape[1], True
+    if width is None:
+        raise ValueError("Dla spakowanej maski podaj width")
+    return mask, width, False
+
+def _as_mask(bits, width, unpack):
+    return unpack_mask(bits, width) if unpack else bits
+
+def _dilate_bits(bits, width, radius):
+    bits = _window_or(bits, radius, _shift_columns)
+    bits = _window_or(bits, radius, _shift_rows)
+    return _clear_padding(bits, width)
+
+def _erode_bits(bits, width, radius):
+    # Erozja = dopełnienie dylatacji dopełnienia; poza obrazem jest "czarno",
+    # więc kształty przy krawędzi nie są zjadane
+    inverted = _clear_padding(~bits, width)
+    return _clear_padding(~_dilate_bits(inverted, width, radius), width)
+
+def binary_dilation(mask, radius, width=None):
+    """Dylatacja (pogrubienie) czerni; mask bool albo spakowana (wtedy width)"""
+    bits, width, unpack = _as_bits(mask, width)
+    if radius <= 0:
+        return mask.copy()
+    return _as_mask(_dilate_bits(bits, width, radius), width, unpack)
+
+def binary_erosion(mask, radius, width=None):
+    """Erozja (odchudzenie) czerni; mask bool albo spakowana (wtedy width)"""
+    bits, width, unpack = _as_bits(mask, width)
+    if radius <= 0:
+        return mask.copy()
+    return _as_mask(_erode_bits(bits, width, radius), width, unpack)
+
+def binary_opening(mask, radius, width=None):
+    """Otwarcie: erozja + dylatacja - znikają kropki i cienkie wypustki węższe niż 2r+1"""
+    bits, width, unpack = _as_bits(mask, width)
+    if radius <= 0:
+        return mask.copy()
+    return _as_mask(_dilate_bits(_erode_bits(bits, width, radius), width, radius), width, unpack)
+
+def binary_closing(mask, radius, width=None):
+    """Zamknięcie: dylatacja + erozja - zalepia szczeliny i dziurki węższe niż 2r+1"""
+    bits, width, unpack = _as_bits(mask, width)
+    if radius <= 0:
+        return mask.copy()
+    return _as_mask(_erode_bits(_dilate_bits(bits, width, radius), width, radius), width, unpack)
+
+# ============================================================================
+# SKŁADOWE SPÓJNE
+# ============================================================================
+
+def mask_runs(mask):
+    """Serie True w wierszach maski: (wiersz, początek, koniec) - koniec wyłączny"""
+    height, width = mask.shape
+    # Kolumna zer za każdym wierszem - serie nie przechodzą między wierszami
+    padded = np.zeros((height, width + 1), dtype=bool)
+    padded[:, :width] = mask
+    flat = padded.reshape(-1)
+    edges = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    if flat[0]:
+        edges = np.concatenate(([0], edges))
+    starts, ends = edges[0::2], edges[1::2]
+    rows = starts // (width + 1)
+    offset = rows * (width + 1)
+    return rows, starts - offset, ends - offset
+
+def _run_links(rows, starts, ends, width, connectivity):
+    """Pary (a, b) serii z sąsiednich wierszy, które się stykają"""
+    reach = 1 if connectivity == 8 else 0
+    stride = width + 2
+    start_key = rows * stride + starts
+    end_key = rows * stride + ends
+    # Dla serii b z wiersza y: serie a z wiersza y-1, gdzie koniec_a > początek_b - reach
+    # i początek_a < koniec_b + reach - to spójny zakres w posortowanych seriach
+    above = (rows - 1) * stride
+    lo = np.searchsorted(end_key, above + starts - reach, side='right')
+    hi = np.searchsorted(start_key, above + ends + reach, side='left')
+    counts = np.maximum(hi - lo, 0)
+    total = int(counts.sum())
+    first = np.cumsum(counts) - counts
+    b = np.repeat(np.arange(len(rows)), counts)
+    a = np.repeat(lo - first, counts) + np.arange(total)
+    return a, b
+
+def union_roots(count, a, b):
+    """Korzeń (najmniejszy indeks) każdego z count elementów po złączeniu par (a[i], b[i]).
+
+    Union-find na tablicach - dla serii maski (label_runs) i dla prostokątów części (parts).
+    """
+    parent = np.arange(count)
+    while len(a):
+        root_a, root_b = parent[a], parent[b]
+        pending = root_a != root_b
+        if not pending.any():
+            break
+        a, b = a[pending], b[pending]
+        root_a, root_b = root_a[pending], root_b[pending]
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+        # Skracanie ścieżek do korzenia
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return parent
+
+def label_runs(rows, starts, ends, width, connectivity=8):
+    """Korzeń składowej dla każdej serii (serie posortowane wierszami, jak z mask_runs)"""
+    a, b = _run_links(rows, starts, ends, width, connectivity)
+    return union_roots(len(rows), a, b)
+
+def run_components(mask, connectivity=8):
+    """Serie maski i korzeń składowej każdej z nich: (wiersze, początki, końce, korzenie)"""
+    rows, starts, ends = mask_runs(mask)
+    return rows, starts, ends, label_runs(rows, starts, ends, mask.shape[1], connectivity)
+
+def paint_runs(mask, rows, starts, ends, value):
+    """Ustawia piksele serii na value (w miejscu) - koszt rośnie z liczbą pikseli serii"""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if not total:
+        return mask
+    first = rows * mask.shape[1] + starts
+    offsets = np.cumsum(lengths) - lengths
+    mask.reshape(-1)[np.repeat(first - offsets, lengths) + np.arange(total)] = value
+    return mask
+
+def remove_small_components(mask, min_size, connectivity=8):
+    """Usuwa składowe czerni mniejsze niż min_size pikseli (plamki, kurz)"""
+    mask = np.ascontiguousarray(mask, dtype=bool)
+    if min_size <= 1:
+        return mask.copy()
+    rows, starts, ends, roots = run_components(mask, connectivity)
+    sizes = np.bincount(roots, weights=ends - starts, minlength=len(roots))
+    drop = sizes[roots] < min_size
+    return paint_runs(mask.copy(), rows[drop], starts[drop], ends[drop], False)
+
+def fill_small_holes(mask, max_size, connectivity=8):
+    """Wypełnia dziurki (tło otoczone czernią) mniejsze niż max_size pikseli.
+
+    Tło łączy się dopełniającą spójnością (4 dla czerni 8-spójnej), więc
+    dziurka przy ukośnej szczelinie nadal jest dziurką.
+    """
+    mask = np.ascontiguousarray(mask, dtype=bool)
+    if max_size <= 1:
+        return mask.copy()
+    height, width = mask.shape
+    rows, starts, ends, roots = run_components(~mask, 4 if connectivity == 8 else 8)
+    sizes = np.bincount(roots, weights=ends - starts, minlength=len(roots))
+    # Tło stykające się z krawędzią obrazu to nie dziurka
+    border = (rows == 0) | (rows == height - 1) | (starts == 0) | (ends == width)
+    touches_border = np.zeros(len(roots), dtype=bool)
+    touches_border[roots[border]] = True
+    fill = ~touches_border[roots] & (sizes[roots] < max_size)
+    return paint_runs(mask.copy(), rows[fill], starts[fill], ends[fill], True)
+
+# ============================================================================
+# ETAP CZYSZCZENIA
+# ============================================================================
+
+# Ustawienia etapu: rozmiary w pikselach pełnej rozdzielczości, 0 = wyłączone
+CLEANUP_OPTIONS = ("min_component", "max_hole", "open_radius", "close_radius")
+
+def cleanup_enabled(cleanup):
+    """Czy ustawienia (słownik, pary (nazwa, wartość) albo None) cokolwiek włączają"""
+    cleanup = dict(cleanup or ())
+    return any(cleanup.get(name, 0) > 0 for name in CLEANUP_OPTIONS)
+
+def clean_mask(mask, min_component=0, max_hole=0, open_radius=0, close_radius=0, scale=1.0):
+    """Cały etap na masce bool: plamki -> dziurki -> otwarcie -> zamknięcie.
+
+    scale przelicza rozmiary dla zmniejszonego podglądu (szerokość
+    podglądu / pełna szerokość): pola przez scale², promienie przez scale.
+    """
+    if min_component > 0:
+        mask = remove_small_components(mask, round(min_component * scale * scale))
+    if max_hole > 0:
+        mask = fill_small_holes(mask, round(max_hole * scale * scale))
+    if open_radius > 0:
+        mask = binary_opening(mask, round(open_radius * scale))
+    if close_radius > 0:
+        mask = binary_closing(mask, round(close_radius * scale))
+    return mask
+
+def clean_gray(gray, threshold, cleanup, scale=1.0):
+    """Jasność -> jasność 0/255 po progu i czyszczeniu maski.
+
+    Wynik przechodzi przez dowolny próg 0-254 bez zmian, więc trafia
+    prosto do encoderów (encode_pbm, encode_clean_png, binarize_array).
+    Bez włączonych ustawień zwraca gray bez zmian.
+    """
+    if not cleanup_enabled(cleanup):
+        return gray
+    mask = clean_mask(np.asarray(gray) <= threshold, scale=scale, **dict(cleanup))
+    return np.where(mask, np.uint8(0), np.uint8(255))
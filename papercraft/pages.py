@@ -0,0 +1,117 @@
+"""
+📚 Pliki wielostronicowe - TIFF, animowane GIF/WebP przetwarzane strona po stronie
+W pamięci jest naraz tylko jedna zdekodowana strona
+"""
+
+import io
+import zipfile
+
+import numpy as np
+from PIL import Image, ImageSequence, TiffImagePlugin, features
+
+from .streaming import DEFAULT_PNG_PRESET, encode_pbm, encode_clean_png
+from .morphology import clean_gray
+from .adaptive import LOCAL_OUTPUT_THRESHOLD, local_enabled, local_gray
+
+# ============================================================================
+# STRONY
+# ============================================================================
+
+MULTIPAGE_EXTENSIONS = ('.tif', '.tiff', '.gif', '.webp')
+THUMBNAIL_WIDTH = 160
+
+def page_count(data):
+    """Liczba stron (klatek) pliku - z nagłówka, bez dekodowania"""
+    return getattr(Image.open(io.BytesIO(data)), "n_frames", 1)
+
+def open_page(data, index):
+    """Jedna strona jako osobny obraz (przeskok do klatki, dekodowana tylko ona)"""
+    img = Image.open(io.BytesIO(data))
+    img.seek(index)
+    img.load()
+    return img.copy() if getattr(img, "n_frames", 1) > 1 else img
+
+# Tryby, które PNG zapisuje bez konwersji (pozostałe, np. CMYK - jako TIFF)
+_PNG_MODES = ('1', 'L', 'LA', 'I', 'I;16', 'P', 'RGB', 'RGBA')
+
+def page_bytes(data, index):
+    """Strona jako osobny plik (PNG, a CMYK itp. TIFF) - wejście dla zwykłego pipeline'u"""
+    page = open_page(data, index)
+    buf = io.BytesIO()
+    if page.mode in _PNG_MODES:
+        page.save(buf, format='PNG', compress_level=1)
+    else:
+        page.save(buf, format='TIFF', compression='tiff_lzw')
+    return buf.getvalue()
+
+def page_thumbnail(data, index, width=THUMBNAIL_WIDTH):
+    """Miniatura strony - liczona dopiero, gdy jest potrzebna"""
+    img = open_page(data, index)
+    if img.mode not in ('L', 'RGB', 'RGBA'):
+        # reduce() nie obsługuje trybów 1-bit, palety ani CMYK
+        img = img.convert('L' if img.mode == '1' else 'RGB')
+    factor = max(1, img.width // (2 * width))
+    if factor > 1:
+        img = img.reduce(factor)
+    img.thumbnail((width, width * 4))
+    return img
+
+def iter_gray_pages(data):
+    """Strony po kolei jako jasność (L) - poprzednia jest zwalniana przed następną"""
+    img = Image.open(io.BytesIO(data))
+    for frame in ImageSequence.Iterator(img):
+        yield frame.convert('L')
+
+# ============================================================================
+# ZAPIS WIELU STRON
+# ============================================================================
+
+def _page_name(base, index, count, extension):
+    return f"{base}_p{index + 1:0{len(str(count))}d}{extension}"
+
+def write_pages_zip(data, zip_fp, base_name, threshold=128, format='PNG', png_preset=DEFAULT_PNG_PRESET,
+                    on_page=None, cleanup=None, local=None):
+    """Każda strona oczyszczona i zapisana do ZIP-a od razu (PNG lub PBM)"""
+    count = page_count(data)
+    if local_enabled(local):
+        threshold = LOCAL_OUTPUT_THRESHOLD
+    extension = '.png' if format == 'PNG' else '.pbm'
+    # PNG jest już skompresowany - w ZIP-ie tylko go przechowujemy
+    compression = zipfile.ZIP_STORED if format == 'PNG' else zipfile.ZIP_DEFLATED
+
+    with zipfile.ZipFile(zip_fp, 'w', compression=compression) as archive:
+        for index, gray in enumerate(iter_gray_pages(data)):
+            gray = clean_gray(local_gray(np.asarray(gray), local), threshold, cleanup)
+            output = encode_pbm(gray, threshold) if format == 'PBM' else encode_clean_png(gray, threshold, png_preset)
+            archive.writestr(_page_name(base_name, index, count, extension), output)
+            if on_page is not None:
+                on_page(index + 1, count)
+
+def write_pages_tiff(data, fp, threshold=128, on_page=None, cleanup=None, local=None):
+    """Wielostronicowy TIFF 1-bit (czarne na białym, jak PBM), strona po stronie.
+
+    fp musi pozwalać na seek i odczyt (plik 'w+b' albo BytesIO).
+    """
+    count = page_count(data)
+    if local_enabled(local):
+        threshold = LOCAL_OUTPUT_THRESHOLD
+    compression = "group4" if features.check('libtiff') else "packbits"
+    with TiffImagePlugin.AppendingTiffWriter(fp) as tiff:
+        for index, gray in enumerate(iter_gray_pages(data)):
+            # Piksel > próg = biały (1), reszta czarna (0) - jak binarize_array
+            gray = clean_gray(local_gray(np.asarray(gray), local), threshold, cleanup)
+            page = Image.fromarray(gray > threshold)
+            page.save(tiff, format='TIFF', compression=compression)
+            tiff.newFrame()
+            if on_page is not None:
+                on_page(index + 1, count)
+
+def clean_pages_bytes(data, threshold=128, format='PNG', png_preset=DEFAULT_PNG_PRESET, base_name="page",
+                      cleanup=None, local=None):
+    """Wszystkie strony jednym plikiem: format 'TIFF' albo ZIP stron PNG/PBM"""
+    buf = io.BytesIO()
+    if format == 'TIFF':
+        write_pages_tiff(data, buf, threshold, cleanup=cleanup, local=local)
+    else:
+        write_pages_zip(data, buf, base_name, threshold, format, png_preset, cleanup=cleanup, local=local)
+    return buf.getvalue()
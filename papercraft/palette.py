@@ -0,0 +1,226 @@
+"""
+🌈 Redukcja do N kolorów - paleta dopasowana do histogramu kolorów, nie do pikseli
+Histogram 32x32x32 liczony raz na obraz; dobór palety (median cut + k-means)
+działa na zajętych kubełkach, a piksele przechodzą przez tablicę kubełek -> indeks
+"""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+from .core import flatten_to_white_background
+
+# ============================================================================
+# HISTOGRAM KOLORÓW
+# ============================================================================
+
+HISTOGRAM_BITS = 5                      # bity na kanał - 32^3 kubełków
+HISTOGRAM_BINS = 1 << (3 * HISTOGRAM_BITS)
+HISTOGRAM_BAND_ROWS = 512               # wiersze liczone naraz
+# Tło (najjaśniejszy kolor palety) przezroczyste, gdy każdy kanał >= progu.
+# Średni kolor papieru rzadko przekracza 250 z remove_white_to_transparent
+BACKGROUND_LEVEL = 220
+
+def _rgb_array(img):
+    # Przezroczyste piksele liczone jak białe tło (jak flatten_to_white_background)
+    if img.mode in ('LA', 'PA', 'P') or 'transparency' in img.info:
+        img = img.convert('RGBA')
+    if img.mode == 'RGBA':
+        img = flatten_to_white_background(img)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    return np.asarray(img)
+
+def color_keys(rgb):
+    """Numer kubełka (uint16) każdego piksela tablicy RGB (H, W, 3)"""
+    # Jedno przesunięcie całej tablicy - szybciej niż osobno dla każdego kanału
+    levels = rgb >> (8 - HISTOGRAM_BITS)
+    keys = levels[..., 0].astype(np.uint16) << (2 * HISTOGRAM_BITS)
+    keys |= levels[..., 1].astype(np.uint16) << HISTOGRAM_BITS
+    keys |= levels[..., 2]
+    return keys
+
+class ColorHistogram:
+    """Liczność i suma kolorów każdego kubełka - średni kolor kubełka bez zaokrąglenia do siatki"""
+
+    def __init__(self, counts, sums):
+        self.counts = counts  # (HISTOGRAM_BINS,) int64
+        self.sums = sums      # (HISTOGRAM_BINS, 3) float64
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes + self.sums.nbytes
+
+    @classmethod
+    def from_image(cls, img):
+        """Histogram obrazu (liczony pasami wierszy - bez kopii całego obrazu w int)"""
+        rgb = _rgb_array(img)
+        counts = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+        sums = np.zeros((HISTOGRAM_BINS, 3))
+        for top in range(0, rgb.shape[0], HISTOGRAM_BAND_ROWS):
+            band = rgb[top:top + HISTOGRAM_BAND_ROWS]
+            keys = color_keys(band).ravel()
+            counts += np.bincount(keys, minlength=HISTOGRAM_BINS)
+            for channel in range(3):
+                sums[:, channel] += np.bincount(keys, weights=band[..., channel].ravel(), minlength=HISTOGRAM_BINS)
+        return cls(counts, sums)
+
+    def occupied(self):
+        """(kubełki, średnie kolory, liczności) niepustych kubełków"""
+        bins = np.flatnonzero(self.counts)
+        weights = self.counts[bins]
+        return bins, self.sums[bins] / weights[:, None], weights
+
+# ============================================================================
+# DOBÓR PALETY
+# ============================================================================
+
+def median_cut(colors, weights, count):
+    """Podział kolorów (ważonych licznością) na count pudełek - średnie pudełek.
+
+    Dzielone jest pudełko o największej ważonej sumie kwadratów odchyleń,
+    wzdłuż kanału o największym rozrzucie.
+    """
+    # Sumy w, w*c i w*c^2 wystarczą na średnią i rozrzut każdego pudełka
+    moments = np.concatenate((weights[:, None], weights[:, None] * colors, weights[:, None] * colors ** 2), axis=1)
+    # Kolejność wzdłuż każdego kanału sortowana raz - pudełko to jej filtr po etykiecie.
+    # Klucz uint16 (1/256 poziomu) - sortowanie pozycyjne zamiast porównań na float
+    keys = np.round(colors * 256).astype(np.uint16)
+    orders = [np.argsort(keys[:, axis], kind='stable') for axis in range(3)]
+    labels = np.zeros(len(colors), dtype=np.int32)
+
+    def spread(total):
+        # Ważona suma kwadratów odchyleń na kanał - szum papieru nie wygrywa z dwoma kolorami w pudełku
+        return np.maximum(total[4:] - total[1:4] ** 2 / total[0], 0)
+
+    sizes = [len(colors)]
+    totals = [moments.sum(axis=0)]
+    while len(totals) < count:
+        scores = [spread(total).sum() if size > 1 else -1 for size, total in zip(sizes, totals)]
+        index = int(np.argmax(scores))
+        if scores[index] <= 0:
+            break
+        total = totals[index]
+        axis = int(np.argmax(spread(total)))
+        box = orders[axis][labels[orders[axis]] == index]
+        # Podział jak próg Otsu wzdłuż osi (największa wariancja międzyklasowa),
+        # a nie w medianie - ta wypada w środku dominującego koloru papieru
+        w = np.cumsum(moments[box, 0])[:-1]
+        m = np.cumsum(moments[box, 1 + axis])[:-1]
+        between = (m * total[0] - w * total[1 + axis]) ** 2 / (w * (total[0] - w))
+        split = int(np.argmax(between)) + 1
+        labels[box[split:]] = len(totals)
+        left = moments[box[:split]].sum(axis=0)
+        sizes[index] = split
+        sizes.append(len(box) - split)
+        totals[index] = left
+        totals.append(total - left)
+    return np.array([total[1:4] / total[0] for total in totals])
+
+def _nearest(colors, palette):
+    # |c - p|^2 bez |c|^2 (stałe w wierszu) - iloczyn macierzy zamiast tablicy (n, k, 3)
+    distances = (palette ** 2).sum(axis=1) - 2 * colors @ palette.T
+    return np.argmin(distances, axis=1)
+
+def kmeans_refine(colors, weights, palette, iterations=8):
+    """Ważony k-means na kolorach kubełków, startujący z palety (np. median cut)"""
+    palette = palette.astype(np.float64)
+    for _ in range(iterations):
+        labels = _nearest(colors, palette)
+        totals = np.bincount(labels, weights=weights, minlength=len(palette))
+        used = totals > 0
+        updated = palette.copy()
+        for channel in range(3):
+            sums = np.bincount(labels, weights=weights * colors[:, channel], minlength=len(palette))
+            updated[used, channel] = sums[used] / totals[used]
+        if np.allclose(updated, palette, atol=0.5):
+            palette = updated
+            break
+        palette = updated
+    return palette
+
+PALETTE_METHODS = ("kmeans", "median_cut")
+# Indeksy palety trzymane są w uint8, a PNG z paletą ma najwyżej 256 kolorów
+PALETTE_MIN_COLORS, PALETTE_MAX_COLORS = 2, 256
+
+def fit_palette(histogram, count, method="kmeans"):
+    """Paleta count kolorów (uint8, (n, 3)) dobrana do histogramu, od najjaśniejszego"""
+    if method not in PALETTE_METHODS:
+        raise ValueError(f"Nieznana metoda palety: {method}")
+    if not PALETTE_MIN_COLORS <= count <= PALETTE_MAX_COLORS:
+        raise ValueError(f"Liczba kolorów {count} poza zakresem {PALETTE_MIN_COLORS}-{PALETTE_MAX_COLORS}")
+    _, colors, weights = histogram.occupied()
+    if not len(colors):
+        return np.full((1, 3), 255, dtype=np.uint8)
+    weights = weights.astype(np.float64)
+    palette = median_cut(colors, weights, count)
+    if method == "kmeans":
+        palette = kmeans_refine(colors, weights, palette)
+    palette = np.clip(np.round(palette), 0, 255).astype(np.uint8)
+    # Kolejność stała (jasność malejąco) - indeks 0 to tło
+    order = np.argsort(-palette.astype(np.int64).sum(axis=1), kind='stable')
+    return palette[order]
+
+# ============================================================================
+# MAPOWANIE PIKSELI
+# ============================================================================
+
+def palette_lut(palette):
+    """Tablica kubełek -> indeks najbliższego koloru palety (dla środka kubełka)"""
+    if len(palette) > PALETTE_MAX_COLORS:
+        raise ValueError(f"Paleta ma {len(palette)} kolorów - najwyżej {PALETTE_MAX_COLORS}")
+    step = 1 << (8 - HISTOGRAM_BITS)
+    levels = np.arange(1 << HISTOGRAM_BITS) * step + step / 2
+    centres = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'), axis=-1).reshape(-1, 3)
+    return _nearest(centres, palette.astype(np.float64)).astype(np.uint8)
+
+def quantize_array(rgb, lut):
+    """Tablica RGB (H, W, 3) -> indeksy palety (H, W) uint8 przez LUT"""
+    return lut[color_keys(rgb)]
+
+def background_index(palette, level=BACKGROUND_LEVEL):
+    """Indeks tła (najjaśniejszy kolor, 0), gdy jest prawie biały - inaczej None"""
+    return 0 if palette[0].min() >= level else None
+
+def palette_image(indices, palette, transparent=None):
+    """Obraz P z paletą; kolor transparent (indeks) zapisywany jako przezroczysty (tRNS)"""
+    img = Image.fromarray(indices, mode='P')
+    img.putpalette(palette.ravel().tolist())
+    if transparent is not None:
+        img.info['transparency'] = transparent
+    return img
+
+def encode_palette_png(indices, palette, transparent=None):
+    """PNG z paletą 1/2/4/8-bit (najmniejsza głębia mieszcząca kolory) i tRNS dla tła"""
+    bits = next(b for b in (1, 2, 4, 8) if len(palette) <= 1 << b)
+    buf = io.BytesIO()
+    img = palette_image(indices, palette, transparent)
+    options = {"transparency": transparent} if transparent is not None else {}
+    img.save(buf, format='PNG', bits=bits, optimize=False, compress_level=6, **options)
+    return buf.getvalue()
+
+def quantize_image(img, palette, transparent_background=True):
+    """Obraz -> obraz P z podaną paletą (tło przezroczyste, gdy prawie białe)"""
+    indices = quantize_array(_rgb_array(img), palette_lut(palette))
+    transparent = background_index(palette) if transparent_background else None
+    return palette_image(indices, palette, transparent)
+
+def quantize_image_bytes(data, colors=8, method="kmeans", palette=None, transparent_background=True):
+    """Pełny proces dla pliku: PNG z paletą N kolorów (bez Streamlit).
+
+    Bez palety histogram liczony jest z pliku; podanie palety (np. z
+    histogramu podglądu) daje wynik zgodny z podglądem.
+    """
+    img = Image.open(io.BytesIO(data))
+    if palette is None:
+        palette = fit_palette(ColorHistogram.from_image(img), colors, method)
+    palette = np.asarray(palette, dtype=np.uint8)
+    rgb = _rgb_array(img)
+    del img
+    lut = palette_lut(palette)
+    indices = np.empty(rgb.shape[:2], dtype=np.uint8)
+    for top in range(0, rgb.shape[0], HISTOGRAM_BAND_ROWS):
+        indices[top:top + HISTOGRAM_BAND_ROWS] = quantize_array(rgb[top:top + HISTOGRAM_BAND_ROWS], lut)
+    transparent = background_index(palette) if transparent_background else None
+    return encode_palette_png(indices, palette, transparent)
@@ -0,0 +1,147 @@
+"""
+🧩 Części arkusza - wykrywanie osobnych elementów szablonu i eksport każdego z nich
+Składowe spójne liczone na seriach pikseli maski zbieranych pasami wierszy:
+pamięć rośnie z liczbą serii, nie z obrazem RGBA
+"""
+
+import io
+import zipfile
+
+import numpy as np
+from PIL import Image
+
+from .streaming import DEFAULT_PNG_PRESET, encode_pbm, encode_clean_png
+from .morphology import mask_runs, label_runs, union_roots, clean_gray
+from .adaptive import LOCAL_OUTPUT_THRESHOLD, local_enabled, local_gray
+
+# ============================================================================
+# WYKRYWANIE CZĘŚCI
+# ============================================================================
+
+# Wiersze maski tworzone naraz przy zbieraniu serii
+RUN_BAND_ROWS = 1024
+DEFAULT_MIN_AREA = 400
+DEFAULT_PADDING = 8
+
+def gray_runs(gray, threshold, band_rows=RUN_BAND_ROWS):
+    """Serie czerni (<= threshold) całego obrazu, liczone pasami: (wiersze, początki, końce)"""
+    gray = np.asarray(gray)
+    parts = []
+    for top in range(0, gray.shape[0], band_rows):
+        rows, starts, ends = mask_runs(gray[top:top + band_rows] <= threshold)
+        parts.append(((rows + top).astype(np.int32), starts.astype(np.int32), ends.astype(np.int32)))
+    if not parts:
+        empty = np.zeros(0, dtype=np.int32)
+        return empty, empty, empty
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+def _component_boxes(rows, starts, ends, roots):
+    """Ramki (x1, y1, x2, y2 - końce wyłączne) i pola składowych, po jednej na korzeń"""
+    is_root = roots == np.arange(len(roots))
+    labels = (np.cumsum(is_root) - 1)[roots]
+    count = int(is_root.sum())
+    boxes = np.empty((count, 4), dtype=np.int64)
+    boxes[:, :2] = np.iinfo(boxes.dtype).max
+    boxes[:, 2:] = 0
+    np.minimum.at(boxes[:, 0], labels, starts)
+    np.minimum.at(boxes[:, 1], labels, rows)
+    np.maximum.at(boxes[:, 2], labels, ends)
+    np.maximum.at(boxes[:, 3], labels, rows + 1)
+    areas = np.bincount(labels, weights=ends - starts, minlength=count).astype(np.int64)
+    return boxes, areas
+
+def _merge_overlapping(boxes, areas, chunk=1024):
+    """Łączy ramki, które się przecinają (np. napisy i linie zgięcia wewnątrz części)"""
+    while len(boxes) > 1:
+        pairs_a, pairs_b = [], []
+        for first in range(0, len(boxes), chunk):
+            block = boxes[first:first + chunk]
+            overlap = (
+                (block[:, None, 0] < boxes[None, :, 2]) & (boxes[None, :, 0] < block[:, None, 2])
+                & (block[:, None, 1] < boxes[None, :, 3]) & (boxes[None, :, 1] < block[:, None, 3])
+            )
+            a, b = np.nonzero(overlap)
+            a += first
+            keep = a < b
+            pairs_a.append(a[keep])
+            pairs_b.append(b[keep])
+        a, b = np.concatenate(pairs_a), np.concatenate(pairs_b)
+        if not len(a):
+            break
+        # Te same korzenie co dla serii - grupa ramek to jedna część
+        roots = union_roots(len(boxes), a, b)
+        groups, labels = np.unique(roots, return_inverse=True)
+        merged = np.empty((len(groups), 4), dtype=boxes.dtype)
+        merged[:, :2] = np.iinfo(boxes.dtype).max
+        merged[:, 2:] = 0
+        np.minimum.at(merged[:, 0], labels, boxes[:, 0])
+        np.minimum.at(merged[:, 1], labels, boxes[:, 1])
+        np.maximum.at(merged[:, 2], labels, boxes[:, 2])
+        np.maximum.at(merged[:, 3], labels, boxes[:, 3])
+        boxes, areas = merged, np.bincount(labels, weights=areas).astype(np.int64)
+    return boxes, areas
+
+def find_parts(gray, threshold=128, min_area=DEFAULT_MIN_AREA, padding=DEFAULT_PADDING, connectivity=8):
+    """Ramki części arkusza (x1, y1, x2, y2) w kolejności czytania.
+
+    Składowe czerni mniejsze niż min_area pikseli (kurz, plamki) są
+    pomijane, a przecinające się ramki łączone w jedną część. Ramka jest
+    dopasowana do czerni (bez białego marginesu) i poszerzona o padding,
+    przycięty do obrazu.
+    """
+    gray = np.asarray(gray)
+    height, width = gray.shape
+    rows, starts, ends = gray_runs(gray, threshold)
+    if not len(rows):
+        return []
+    roots = label_runs(rows, starts, ends, width, connectivity)
+    boxes, areas = _component_boxes(rows, starts, ends, roots)
+    keep = areas >= min_area
+    boxes, areas = _merge_overlapping(boxes[keep], areas[keep])
+
+    boxes[:, :2] = np.maximum(boxes[:, :2] - padding, 0)
+    boxes[:, 2] = np.minimum(boxes[:, 2] + padding, width)
+    boxes[:, 3] = np.minimum(boxes[:, 3] + padding, height)
+    order = np.lexsort((boxes[:, 0], boxes[:, 1]))
+    return [tuple(int(v) for v in box) for box in boxes[order]]
+
+# ============================================================================
+# EKSPORT CZĘŚCI
+# ============================================================================
+
+def _part_name(base, index, count, extension):
+    return f"{base}_part{index + 1:0{max(len(str(count)), 2)}d}{extension}"
+
+def write_parts_zip(data, zip_fp, base_name, threshold=128, format='PNG', png_preset=DEFAULT_PNG_PRESET,
+                    min_area=DEFAULT_MIN_AREA, padding=DEFAULT_PADDING, cleanup=None, local=None, on_part=None):
+    """Każda część arkusza jako osobny plik PNG/PBM w ZIP-ie, zapisywana od razu.
+
+    Progowanie (także local i cleanup) jest liczone raz dla całego
+    arkusza - części są wycinkami tej samej maski. Zwraca listę ramek.
+    """
+    img = Image.open(io.BytesIO(data))
+    gray = np.asarray(img.convert('L') if img.mode != 'L' else img)
+    del img
+    if local_enabled(local):
+        threshold = LOCAL_OUTPUT_THRESHOLD
+    gray = clean_gray(local_gray(gray, local), threshold, cleanup)
+
+    boxes = find_parts(gray, threshold, min_area, padding)
+    extension = '.png' if format == 'PNG' else '.pbm'
+    # PNG jest już skompresowany - w ZIP-ie tylko go przechowujemy
+    compression = zipfile.ZIP_STORED if format == 'PNG' else zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(zip_fp, 'w', compression=compression) as archive:
+        for index, (x1, y1, x2, y2) in enumerate(boxes):
+            part = gray[y1:y2, x1:x2]
+            output = encode_pbm(part, threshold) if format == 'PBM' else encode_clean_png(part, threshold, png_preset)
+            archive.writestr(_part_name(base_name, index, len(boxes), extension), output)
+            if on_part is not None:
+                on_part(index + 1, len(boxes))
+    return boxes
+
+def clean_parts_bytes(data, threshold=128, format='PNG', png_preset=DEFAULT_PNG_PRESET, base_name="sheet",
+                      min_area=DEFAULT_MIN_AREA, padding=DEFAULT_PADDING, cleanup=None, local=None):
+    """ZIP ze wszystkimi częściami arkusza (dla puli procesów i pobierania w aplikacji)"""
+    buf = io.BytesIO()
+    write_parts_zip(data, buf, base_name, threshold, format, png_preset, min_area, padding, cleanup, local)
+    return buf.getvalue()
@@ -0,0 +1,63 @@
+"""
+🔍 Podgląd - piramida rozdzielczości budowana bez pełnego dekodowania
+"""
+
+import io
+
+from PIL import Image
+
+# ============================================================================
+# PODGLĄD - PIRAMIDA ROZDZIELCZOŚCI
+# ============================================================================
+
+PREVIEW_WIDTH = 800        # szerokość podglądu w kolumnie (px)
+PYRAMID_BASE_WIDTH = 1600  # najwyższy poziom piramidy (zapas na zoom przy wycinaniu)
+PYRAMID_MIN_WIDTH = 200    # najmniejszy poziom piramidy
+
+class PreviewPyramid:
+    """Pomniejszone kopie obrazu (kolejne poziomy co 2x) do szybkiego podglądu"""
+
+    def __init__(self, full_size, levels):
+        self.full_size = full_size
+        self.levels = levels  # od największego do najmniejszego
+
+    @property
+    def nbytes(self):
+        return sum(level.width * level.height * len(level.getbands()) for level in self.levels)
+
+    def level_for_width(self, width):
+        """Najmniejszy poziom nie węższy niż width (lub największy dostępny)"""
+        for level in reversed(self.levels):
+            if level.width >= width:
+                return level
+        return self.levels[0]
+
+def build_preview_pyramid(data, base_width=PYRAMID_BASE_WIDTH, min_width=PYRAMID_MIN_WIDTH):
+    """Buduje piramidę podglądu bez dekodowania pełnej rozdzielczości, gdy się da"""
+    img = Image.open(io.BytesIO(data))
+    full_size = img.size
+    
+    # JPEG: dekoder od razu skaluje DCT (1/2, 1/4, 1/8) - tanie wczytanie
+    scale = max(1, full_size[0] // base_width)
+    img.draft(img.mode, (full_size[0] // scale, full_size[1] // scale))
+    
+    if img.mode not in ('L', 'LA', 'RGB', 'RGBA'):
+        has_alpha = img.mode in ('PA', 'La') or 'transparency' in img.info
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+    
+    factor = img.width // base_width
+    base = img.reduce(factor) if factor > 1 else img
+    base.load()
+    
+    levels = [base]
+    while levels[-1].width // 2 >= min_width:
+        levels.append(levels[-1].reduce(2))
+    
+    return PreviewPyramid(full_size, levels)
+
+def scale_box(box, from_size, to_size):
+    """Przelicza prostokąt (x1, y1, x2, y2) między rozdzielczościami"""
+    sx = to_size[0] / from_size[0]
+    sy = to_size[1] / from_size[1]
+    x1, y1, x2, y2 = box
+    return (int(x1 * sx), int(y1 * sy), max(int(x1 * sx) + 1, round(x2 * sx)), max(int(y1 * sy) + 1, round(y2 * sy)))
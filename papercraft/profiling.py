@@ -0,0 +1,158 @@
+"""
+🐞 Profilowanie etapów - czas, rozmiar wyniku i wymiary obrazu dla każdego kroku
+Rekordy trafiają do panelu debug, statystyk procesu (p50/p95) i logu JSON
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+from PIL import Image
+
+from .cache import estimate_size
+from .preview import PreviewPyramid
+
+# Jedna linia JSON na etap - do agregacji p50/p95 poza aplikacją
+STAGE_LOGGER = logging.getLogger("papercraft.stages")
+
+# ============================================================================
+# POMIAR
+# ============================================================================
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def rss_bytes():
+    """Bieżące RSS całego procesu (Linux, /proc/self/statm) albo None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+def describe(value):
+    """Wymiary i rozmiar wyniku etapu (obraz, piramida, tablica, bajty)"""
+    info = {"bytes": estimate_size(value)}
+    if isinstance(value, Image.Image):
+        info["width"], info["height"] = value.size
+        info["mode"] = value.mode
+    elif isinstance(value, PreviewPyramid):
+        info["width"], info["height"] = value.full_size
+    elif isinstance(value, np.ndarray) and value.ndim >= 2:
+        info["height"], info["width"] = value.shape[:2]
+    return info
+
+class StageMetrics:
+    """Statystyki etapów dla całego procesu - ostatnie `window` pomiarów na etap"""
+
+    def __init__(self, window=1000):
+        self._durations = defaultdict(lambda: deque(maxlen=window))
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self._durations[record["stage"]].append(record["ms"])
+            self._counts[record["stage"]] += 1
+
+    def summary(self):
+        """{etap: count, p50_ms, p95_ms, max_ms} - percentyle z okna pomiarów"""
+        with self._lock:
+            snapshot = {stage: (self._counts[stage], list(values)) for stage, values in self._durations.items()}
+        result = {}
+        for stage, (count, values) in sorted(snapshot.items()):
+            p50, p95 = np.percentile(values, [50, 95])
+            result[stage] = {"count": count, "p50_ms": float(p50), "p95_ms": float(p95), "max_ms": max(values)}
+        return result
+
+class StageProfiler:
+    """Mierzy etapy jednej sesji; rekordy trafiają też do StageMetrics i logu.
+
+    Etapy mogą się zagnieżdżać (eksport liczy dekodowanie i binaryzację) -
+    rekord zapamiętuje etap nadrzędny w polu "parent".
+
+    "process_rss_delta" to zmiana RSS całego procesu w czasie etapu - obejmuje
+    inne wątki i sesje oraz zwalnianie pamięci przez alokator, więc bywa zerem
+    albo ujemna. To nie są bajty zaalokowane przez etap: trafia tylko do logu
+    JSON, nie do StageMetrics ani panelu debug.
+    """
+
+    def __init__(self, metrics=None, context=None, keep=50, logger=STAGE_LOGGER):
+        self.metrics = metrics
+        self.context = context or {}
+        self.records = deque(maxlen=keep)
+        self.logger = logger
+        self._local = threading.local()
+
+    def measure(self, stage, compute, **fields):
+        """Wywołuje compute() i zapisuje czas, rozmiar i wymiary wyniku (plus zmianę RSS procesu)"""
+        stack = self._local.__dict__.setdefault("stack", [])
+        record = {"stage": stage, "parent": stack[-1] if stack else None, **fields}
+        stack.append(stage)
+        rss_before = rss_bytes()
+        started = time.perf_counter()
+        try:
+            value = compute()
+        except Exception as exc:
+            record["error"] = type(exc).__name__
+            raise
+        else:
+            record.update(describe(value))
+            return value
+        finally:
+            stack.pop()
+            record["ms"] = (time.perf_counter() - started) * 1000
+            rss_after = rss_bytes()
+            if rss_before is not None and rss_after is not None:
+                record["process_rss_delta"] = rss_after - rss_before
+            self._emit(record)
+
+    def _emit(self, record):
+        self.records.append(record)
+        if self.metrics is not None:
+            self.metrics.add(record)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(json.dumps({"event": "stage", **self.context, **record}, default=str))
+
+class ProfiledCache:
+    """ResultCache, w którym każde liczenie (chybienie) jest mierzonym etapem.
+
+    Nazwa etapu to pierwszy element klucza ("gray", "processed", ...);
+    trafienia w cache nie są mierzone - nic nie liczą. Wpisy przypisywane
+    są sesji z kontekstu profilera (ResultCache.session_stats).
+    """
+
+    def __init__(self, cache, profiler):
+        self.cache = cache
+        self.profiler = profiler
+        self.session = profiler.context.get("session")
+
+    def get_or_compute(self, key, compute, codec=None):
+        return self.cache.get_or_compute(
+            key, lambda: self.profiler.measure(key[0], compute), codec=codec, session=self.session
+        )
+
+    def peek(self, key, codec=None, count=True):
+        return self.cache.peek(key, codec=codec, session=self.session, count=count)
+
+    def measure(self, stage, compute, **fields):
+        return self.profiler.measure(stage, compute, **fields)
+
+    def stats(self):
+        return self.cache.stats()
+
+    def session_stats(self):
+        return self.cache.session_stats()
+
+def configure_stage_log(target):
+    """Podpina log etapów: "-" = stderr, inaczej ścieżka pliku (JSON lines)"""
+    if not target or STAGE_LOGGER.handlers:
+        return
+    handler = logging.StreamHandler() if target == "-" else logging.FileHandler(target, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    STAGE_LOGGER.addHandler(handler)
+    STAGE_LOGGER.setLevel(logging.INFO)
+    STAGE_LOGGER.propagate = False
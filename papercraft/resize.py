@@ -0,0 +1,149 @@
+"""
+📐 Zmiana rozmiaru i DPI - skalowanie z zachowaniem proporcji, formaty papieru
+Szybka ścieżka: JPEG skalowany już przy dekodowaniu (DCT), potem Image.reduce
+o całkowity współczynnik i jedno próbkowanie wysokiej jakości dla reszty
+"""
+
+import io
+
+from PIL import Image
+
+from .core import flatten_to_white_background
+
+# ============================================================================
+# ROZMIARY
+# ============================================================================
+
+MM_PER_INCH = 25.4
+# Format -> (szerokość, wysokość) w mm, orientacja pionowa
+PAPER_SIZES_MM = {
+    "A4": (210.0, 297.0),
+    "A3": (297.0, 420.0),
+    "Letter": (215.9, 279.4),
+}
+DEFAULT_DPI = 300
+# Mniej to nie DPI, tylko brak jednostki (TIFF bez ResolutionUnit daje 1)
+MIN_VALID_DPI = 20
+# Zabezpieczenie przed pomyłką w DPI źródła (np. 150x powiększenie)
+MAX_OUTPUT_PIXELS = 200_000_000
+RESIZE_FORMATS = ('PNG', 'JPEG', 'TIFF')
+
+def image_dpi(img, default=None):
+    """DPI z metadanych obrazu (pHYs, JFIF, TIFF) albo default"""
+    dpi = img.info.get('dpi')
+    if not dpi or not dpi[0] or dpi[0] < MIN_VALID_DPI:
+        return default
+    # pHYs zapisuje piksele na metr - 300 DPI wraca jako 299.9994
+    return round(float(dpi[0]), 1)
+
+def paper_size_px(paper, dpi, landscape=False):
+    """Rozmiar arkusza w pikselach dla danego DPI"""
+    if paper not in PAPER_SIZES_MM:
+        raise ValueError(f"Nieznany format papieru: {paper}")
+    width, height = (round(mm * dpi / MM_PER_INCH) for mm in PAPER_SIZES_MM[paper])
+    return (height, width) if landscape else (width, height)
+
+def fit_size(size, box):
+    """Największy rozmiar o proporcjach size mieszczący się w box (szerokość, wysokość)"""
+    scale = min(box[0] / size[0], box[1] / size[1])
+    return max(round(size[0] * scale), 1), max(round(size[1] * scale), 1)
+
+def resize_enabled(resize):
+    """Czy ustawienia (słownik, pary (nazwa, wartość) albo None) zmieniają rozmiar"""
+    resize = dict(resize or ())
+    return any(resize.get(name) for name in ("paper", "dpi", "width"))
+
+def target_size(size, resize, source_dpi=None):
+    """Rozmiar wyniku i jego DPI dla ustawień resize.
+
+    paper + dpi: obraz wpasowany w arkusz (orientacja jak obrazu);
+    dpi: przeskalowanie z source_dpi (z ustawień lub z pliku) do dpi;
+    width: szerokość w px z zachowaniem proporcji. Zwraca ((w, h), dpi).
+    """
+    resize = dict(resize or ())
+    dpi = resize.get("dpi")
+    if resize.get("paper"):
+        dpi = dpi or DEFAULT_DPI
+        box = paper_size_px(resize["paper"], dpi, landscape=size[0] > size[1])
+        return fit_size(size, box), dpi
+    if dpi:
+        source_dpi = resize.get("source_dpi") or source_dpi
+        if not source_dpi:
+            raise ValueError("Plik nie ma zapisanego DPI - podaj DPI źródła")
+        scale = dpi / source_dpi
+        return (max(round(size[0] * scale), 1), max(round(size[1] * scale), 1)), dpi
+    if resize.get("width"):
+        width = int(resize["width"])
+        height = max(round(size[1] * width / size[0]), 1)
+        dpi = source_dpi * width / size[0] if source_dpi else None
+        return (width, height), dpi
+    return tuple(size), source_dpi
+
+# ============================================================================
+# SKALOWANIE
+# ============================================================================
+
+def fast_resize(img, size, resample=Image.LANCZOS):
+    """Skalowanie do size: reduce o całkowity współczynnik, potem jedno resample.
+
+    reduce uśrednia bloki factor x factor (dokładnie dla 1200 -> 300 DPI),
+    więc LANCZOS liczy już tylko resztę (< 2x) na małym obrazie.
+    Współczynnik to zaokrąglony stosunek rozmiarów: gdy źródło różni się od
+    size * factor o mniej niż blok (4003 -> 1001, 3001 -> 750), reduce z przyciętym
+    polem daje od razu size - niepełny blok na krawędzi jest uśredniany albo pomijany
+    i resample nie jest potrzebne. Powiększanie idzie od razu przez resample.
+    """
+    size = tuple(size)
+    if img.mode in ('1', 'I;16'):
+        img = img.convert('L')
+    elif img.mode == 'P':
+        img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+    factor = min(round(img.width / size[0]), round(img.height / size[1]))
+    if factor >= 2 and all(abs(source - target * factor) < factor for source, target in zip(img.size, size)):
+        # reduce zaokrągla w górę: pole min(źródło, size * factor) daje dokładnie size
+        box = (0, 0, min(img.width, size[0] * factor), min(img.height, size[1] * factor))
+        return img.reduce(factor, box=box)
+    factor = min(img.width // size[0], img.height // size[1])
+    if factor >= 2:
+        img = img.reduce(factor)
+    if img.size != size:
+        img = img.resize(size, resample)
+    return img
+
+def open_resized(data, resize):
+    """Obraz z pliku po zmianie rozmiaru i jego DPI: (obraz, dpi).
+
+    JPEG dekodowany jest od razu w 1/2, 1/4 albo 1/8 rozdzielczości
+    (draft), nie mniej niż rozmiar docelowy - reszta przez fast_resize.
+    """
+    img = Image.open(io.BytesIO(data))
+    size, dpi = target_size(img.size, resize, image_dpi(img))
+    if size[0] * size[1] > MAX_OUTPUT_PIXELS:
+        raise ValueError(f"Wynik {size[0]} x {size[1]} px jest za duży - sprawdź DPI źródła")
+    if img.format == 'JPEG':
+        img.draft(img.mode, size)
+    img.load()
+    return fast_resize(img, size), dpi
+
+def save_options(format, dpi):
+    """Parametry zapisu Pillow (z DPI w metadanych) dla PNG, JPEG i TIFF"""
+    options = {"dpi": (dpi, dpi)} if dpi else {}
+    if format == 'PNG':
+        options["compress_level"] = 1
+    elif format == 'JPEG':
+        options["quality"] = 95
+    elif format == 'TIFF':
+        options["compression"] = 'tiff_lzw'
+    return options
+
+def resize_image_bytes(data, resize, format='PNG'):
+    """Pełny proces dla pliku: bajty obrazu po zmianie rozmiaru, z DPI w metadanych"""
+    if format not in RESIZE_FORMATS:
+        raise ValueError(f"Nieznany format zapisu: {format}")
+    img, dpi = open_resized(data, resize)
+    if format == 'JPEG' and img.mode not in ('L', 'RGB', 'CMYK'):
+        # JPEG bez kanału alfa - przezroczystość na białe tło
+        img = flatten_to_white_background(img.convert('RGBA'))
+    buf = io.BytesIO()
+    img.save(buf, format=format, **save_options(format, dpi))
+    return buf.getvalue()
@@ -0,0 +1,358 @@
+"""
+📜 Przetwarzanie pasami - duże skany bez pełnego obrazu w pamięci
+"""
+
+import io
+import struct
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from .core import binarize_array, transparency_lut32
+
+# ============================================================================
+# PRZETWARZANIE PASAMI (DUŻE SKANY)
+# ============================================================================
+
+STREAM_BAND_HEIGHT = 256            # wysokość pasa w wierszach
+STREAMING_MIN_PIXELS = 40_000_000   # od tylu pikseli eksport idzie pasami
+
+# Tryby, dla których surowe dane (BMP, PPM/PGM, nieskompresowany TIFF)
+# da się odczytać pas po pasie bez dekodowania całego pliku
+_RAW_BAND_MODES = {'1': 1, 'L': 8, 'RGB': 24, 'RGBA': 32, 'CMYK': 32}
+
+def _raw_band_layout(img):
+    """(offset, rawmode, stride, orientation) dla plików z surowymi danymi, inaczej None"""
+    if img.mode not in _RAW_BAND_MODES or len(img.tile) != 1:
+        return None
+    
+    codec, extents, offset, args = img.tile[0]
+    if codec != 'raw' or tuple(extents) != (0, 0) + img.size:
+        return None
+    
+    if isinstance(args, str):
+        args = (args,)
+    rawmode = args[0]
+    stride = args[1] if len(args) > 1 else 0
+    orientation = args[2] if len(args) > 2 else 1
+    
+    if stride == 0:
+        # Dane upakowane bez wyrównania - rozmiar wiersza znamy tylko dla rawmode == mode
+        if rawmode not in (img.mode, '1;I'):
+            return None
+        stride = (img.width * _RAW_BAND_MODES[img.mode] + 7) // 8
+    
+    return offset, rawmode, stride, orientation
+
+def _read_raw_rows(img, data, layout, top, bottom):
+    """Wiersze top..bottom pliku z surowymi danymi, bez dekodowania reszty"""
+    offset, rawmode, stride, orientation = layout
+    rows = bottom - top
+    # Plik "od dołu" (BMP) - wiersze pasa leżą w pliku od bottom-1 w górę
+    first_row = top if orientation > 0 else img.height - bottom
+    start = offset + first_row * stride
+    return Image.frombytes(
+        img.mode, (img.width, rows), memoryview(data)[start:start + rows * stride],
+        'raw', rawmode, stride, orientation
+    )
+
+# Markery SOF (początek klatki JPEG) - w nagłówku jest wysokość obrazu
+_JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Zapas wierszy pod dolną krawędzią - wygładzanie chrominancji sięga do następnego MCU
+JPEG_CONTEXT_ROWS = 32
+
+def _jpeg_with_height(data, height):
+    """Kopia JPEG-a z wysokością w SOF zmniejszoną do height (None, gdy brak SOF)"""
+    pos = 2
+    while pos + 9 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            return data[:pos + 5] + struct.pack('>H', height) + data[pos + 7:]
+        pos += 2 + struct.unpack('>H', data[pos + 2:pos + 4])[0]
+    return None
+
+def open_rows(data, bottom):
+    """Otwiera obraz tak, aby dekoder skończył na wierszu bottom.
+
+    JPEG: dekoder dostaje niższą wysokość w nagłówku (pomija resztę skanu),
+    PNG bez przeplotu: dekodowane są tylko pierwsze wiersze. Wiersze powyżej
+    bottom są identyczne jak przy pełnym dekodowaniu; inne formaty bez zmian.
+    """
+    img = Image.open(io.BytesIO(data))
+    if bottom >= img.height:
+        return img
+    
+    if img.format == 'JPEG':
+        patched = _jpeg_with_height(data, min(img.height, bottom + JPEG_CONTEXT_ROWS))
+        if patched is not None:
+            return Image.open(io.BytesIO(patched))
+    elif (img.format == 'PNG' and len(img.tile) == 1 and not img.info.get('interlace')
+            and not getattr(img, 'is_animated', False)):
+        tile = img.tile[0]
+        truncated = (tile[0], (0, 0, img.width, bottom), tile[2], tile[3])
+        img._size = (img.width, bottom)
+        img.tile = [type(tile)(*truncated) if type(tile) is not tuple else truncated]
+    return img
+
+def decode_region(data, box=None):
+    """Dekoduje tylko fragment box (x1, y1, x2, y2) - piksele jak z open(...).crop(box).
+
+    Surowe formaty czytają same wiersze boxa, JPEG i PNG kończą dekodowanie
+    na dolnej krawędzi boxa; pozostałe formaty dekodowane są w całości.
+    """
+    img = Image.open(io.BytesIO(data))
+    if box is None:
+        img.load()
+        return img
+    
+    x1, y1, x2, y2 = box
+    layout = _raw_band_layout(img)
+    if layout is not None:
+        return _read_raw_rows(img, data, layout, y1, y2).crop((x1, 0, x2, y2 - y1))
+    return open_rows(data, y2).crop(box)
+
+def iter_gray_bands(data, box=None, band_height=STREAM_BAND_HEIGHT):
+    """Dekoduje źródło pasami poziomymi i zwraca kolejne pasy jasności (np.uint8).
+
+    Dla surowych formatów czytane są tylko wiersze z danego pasa (i tylko
+    pasy, których dotyka box). Pozostałe formaty (PNG, JPEG) Pillow umie
+    zdekodować tylko w całości - wtedy pasami liczona jest konwersja do L,
+    a dekodowanie kończy się na dolnej krawędzi boxa (open_rows).
+    """
+    img = Image.open(io.BytesIO(data))
+    width, height = img.size
+    x1, y1, x2, y2 = box if box is not None else (0, 0, width, height)
+    layout = _raw_band_layout(img)
+    if layout is None and y2 < height:
+        img = open_rows(data, y2)
+    
+    for top in range(y1, y2, band_height):
+        bottom = min(top + band_height, y2)
+        
+        if layout is not None:
+            band = _read_raw_rows(img, data, layout, top, bottom).crop((x1, 0, x2, bottom - top))
+        else:
+            band = img.crop((x1, top, x2, bottom))
+        
+        if band.mode != 'L':
+            band = band.convert('L')
+        yield np.asarray(band)
+
+def _png_chunk(tag, payload):
+    return struct.pack('>I', len(payload)) + tag + payload + struct.pack('>I', zlib.crc32(tag + payload))
+
+def _png_dpi_chunk(dpi):
+    """Chunk pHYs z DPI (piksele na metr) - pusty, gdy DPI nieznane"""
+    if not dpi:
+        return b''
+    per_metre = round(dpi / 0.0254)
+    return _png_chunk(b'pHYs', struct.pack('>IIB', per_metre, per_metre, 1))
+
+class PNGStreamWriter:
+    """Przyrostowy zapis PNG RGBA 8-bit - pasy wierszy kompresowane na bieżąco"""
+
+    def __init__(self, fp, width, height, compress_level=6, dpi=None):
+        self.fp = fp
+        self.width = width
+        self._compressor = zlib.compressobj(compress_level)
+        ihdr = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+        fp.write(b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', ihdr) + _png_dpi_chunk(dpi))
+
+    def write_rows(self, rgba):
+        """Dopisuje wiersze (N, W, 4) uint8 - każdy z filtrem 0 (None)"""
+        rows = np.empty((rgba.shape[0], 1 + self.width * 4), dtype=np.uint8)
+        rows[:, 0] = 0
+        rows[:, 1:] = rgba.reshape(rgba.shape[0], -1)
+        compressed = self._compressor.compress(rows.tobytes())
+        if compressed:
+            self.fp.write(_png_chunk(b'IDAT', compressed))
+
+    def close(self):
+        self.fp.write(_png_chunk(b'IDAT', self._compressor.flush()) + _png_chunk(b'IEND', b''))
+
+class PBMStreamWriter:
+    """Przyrostowy zapis PBM (P4) - wiersze pakowane bitowo, 1 = czarny"""
+
+    def __init__(self, fp, width, height, dpi=None):
+        self.fp = fp
+        # PBM nie ma pola rozdzielczości - DPI tylko jako komentarz nagłówka
+        comment = b'# dpi %g\n' % dpi if dpi else b''
+        fp.write(b'P4\n%s%d %d\n' % (comment, width, height))
+
+    def write_rows(self, black_mask):
+        """Dopisuje wiersze maski (N, W) bool"""
+        self.fp.write(np.packbits(black_mask, axis=1).tobytes())
+
+    def close(self):
+        pass
+
+# Filtry wierszy PNG (typ filtra w pierwszym bajcie wiersza)
+PNG_FILTERS = {'none': 0, 'sub': 1, 'up': 2, 'average': 3, 'paeth': 4}
+
+def _filter_rows(packed, prev_row, kind):
+    """Filtr PNG dla wierszy bajtów (N, B) - dla 1 bitu na piksel sąsiadem jest poprzedni bajt"""
+    if kind == 'none':
+        return packed
+    up = np.vstack([prev_row[None, :], packed[:-1]])
+    left = np.zeros_like(packed)
+    left[:, 1:] = packed[:, :-1]
+    if kind == 'sub':
+        return packed - left
+    if kind == 'up':
+        return packed - up
+    if kind == 'average':
+        return packed - ((left.astype(np.uint16) + up) >> 1).astype(np.uint8)
+    # Paeth: predykcja z lewego, górnego i lewego-górnego bajtu
+    up_left = np.zeros_like(up)
+    up_left[:, 1:] = up[:, :-1]
+    a, b, c = left.astype(np.int16), up.astype(np.int16), up_left.astype(np.int16)
+    pa, pb, pc = np.abs(b - c), np.abs(a - c), np.abs(a + b - 2 * c)
+    predictor = np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+    return packed - predictor.astype(np.uint8)
+
+class BilevelPNGStreamWriter:
+    """Przyrostowy zapis PNG 1-bit z paletą: czarny kryjący, biały przezroczysty (tRNS).
+
+    Po zdekodowaniu daje te same piksele RGBA co PNGStreamWriter, przy
+    1/32 danych do kompresji. filter: nazwa z PNG_FILTERS albo 'adaptive'
+    (dla każdego wiersza filtr o najmniejszej sumie modułów).
+    """
+
+    def __init__(self, fp, width, height, compress_level=6, filter='none', dpi=None):
+        if filter != 'adaptive' and filter not in PNG_FILTERS:
+            raise ValueError(f"Nieznany filtr PNG: {filter}")
+        self.fp = fp
+        self.filter = filter
+        self._compressor = zlib.compressobj(compress_level)
+        self._prev_row = np.zeros((width + 7) // 8, dtype=np.uint8)
+        ihdr = struct.pack('>IIBBBBB', width, height, 1, 3, 0, 0, 0)
+        fp.write(
+            b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', ihdr) + _png_dpi_chunk(dpi)
+            # Indeks 0 = czarny (kryjący), 1 = biały (przezroczysty)
+            + _png_chunk(b'PLTE', b'\x00\x00\x00\xff\xff\xff') + _png_chunk(b'tRNS', b'\xff\x00')
+        )
+
+    def write_rows(self, black_mask):
+        """Dopisuje wiersze maski (N, W) bool - True = czarny"""
+        packed = np.packbits(~black_mask, axis=1)
+        rows = np.empty((packed.shape[0], 1 + packed.shape[1]), dtype=np.uint8)
+        
+        if self.filter == 'adaptive':
+            candidates = [_filter_rows(packed, self._prev_row, kind) for kind in PNG_FILTERS]
+            scores = np.stack([np.abs(c.view(np.int8).astype(np.int32)).sum(axis=1) for c in candidates])
+            best = scores.argmin(axis=0)
+            for code, candidate in enumerate(candidates):
+                chosen = best == code
+                rows[chosen, 0] = code
+                rows[chosen, 1:] = candidate[chosen]
+        else:
+            rows[:, 0] = PNG_FILTERS[self.filter]
+            rows[:, 1:] = _filter_rows(packed, self._prev_row, self.filter)
+        
+        if len(packed):
+            self._prev_row = packed[-1]
+        compressed = self._compressor.compress(rows.tobytes())
+        if compressed:
+            self.fp.write(_png_chunk(b'IDAT', compressed))
+
+    def close(self):
+        self.fp.write(_png_chunk(b'IDAT', self._compressor.flush()) + _png_chunk(b'IEND', b''))
+
+PBM_CHUNK_ROWS = 1024  # porcja wierszy maski przy zapisie PBM
+
+def iter_black_mask(gray, threshold, chunk_rows=PBM_CHUNK_ROWS):
+    """Maska czerni (gray <= threshold) liczona porcjami wierszy"""
+    for top in range(0, gray.shape[0], chunk_rows):
+        yield gray[top:top + chunk_rows] <= threshold
+
+def write_pbm(fp, width, height, mask_bands, dpi=None):
+    """Zapis PBM (P4) prosto z pasów maski - bez RGBA, spłaszczania i ditheringu"""
+    writer = PBMStreamWriter(fp, width, height, dpi)
+    for band in mask_bands:
+        writer.write_rows(band)
+    writer.close()
+
+def encode_pbm(gray, threshold=128, dpi=None):
+    """Tablica jasności (H, W) -> bajty PBM takie jak z convert_image_to_bytes(..., 'PBM').
+
+    Wyjątek: z dpi nagłówek ma dodatkowy komentarz "# dpi N" (piksele bez zmian).
+    """
+    buf = io.BytesIO()
+    height, width = gray.shape
+    write_pbm(buf, width, height, iter_black_mask(gray, threshold), dpi)
+    return buf.getvalue()
+
+# Ustawienia zapisu PNG wyniku czyszczenia. "rgba" to dotychczasowy RGBA 8-bit,
+# pozostałe zapisują 1-bit z paletą; "smallest" próbuje kilku filtrów i bierze najmniejszy
+PNG_PRESETS = {
+    "fast": {"bilevel": True, "compress_level": 1, "filter": "none"},
+    "balanced": {"bilevel": True, "compress_level": 6, "filter": "none"},
+    "smallest": {"bilevel": True, "compress_level": 9, "filter": ("none", "up")},
+    "rgba": {"bilevel": False, "compress_level": 6},
+}
+DEFAULT_PNG_PRESET = "balanced"
+
+def encode_png_bilevel(gray, threshold=128, compress_level=6, filter='none', dpi=None):
+    """Tablica jasności (H, W) -> PNG 1-bit z tRNS (piksele jak z binarize_to_transparent).
+
+    filter może być krotką nazw - wtedy zapisywany jest każdy wariant
+    i zwracany najmniejszy.
+    """
+    if not isinstance(filter, str):
+        return min((encode_png_bilevel(gray, threshold, compress_level, kind, dpi) for kind in filter), key=len)
+    
+    buf = io.BytesIO()
+    height, width = gray.shape
+    writer = BilevelPNGStreamWriter(buf, width, height, compress_level, filter, dpi)
+    for band in iter_black_mask(gray, threshold):
+        writer.write_rows(band)
+    writer.close()
+    return buf.getvalue()
+
+def encode_clean_png(gray, threshold=128, preset=DEFAULT_PNG_PRESET, dpi=None):
+    """Tablica jasności (H, W) -> PNG wyniku czyszczenia według presetu z PNG_PRESETS"""
+    options = PNG_PRESETS[preset]
+    if options["bilevel"]:
+        return encode_png_bilevel(gray, threshold, options["compress_level"], options["filter"], dpi)
+    buf = io.BytesIO()
+    Image.fromarray(binarize_array(gray, threshold), mode='RGBA').save(
+        buf, format='PNG', compress_level=options["compress_level"], **({"dpi": (dpi, dpi)} if dpi else {})
+    )
+    return buf.getvalue()
+
+def stream_clean_image(data, fp, threshold=128, format='PNG', box=None, band_height=STREAM_BAND_HEIGHT,
+                       png_preset=DEFAULT_PNG_PRESET, dpi=None):
+    """Pełny proces pasami: dekodowanie -> próg + przezroczystość -> zapis do fp.
+
+    Pamięć rośnie z wysokością pasa i szerokością, nie z rozmiarem obrazu.
+    Piksele wyniku są takie same jak z binarize_to_transparent (+ crop).
+    dpi trafia do metadanych (pHYs w PNG, komentarz w PBM).
+    """
+    width, height = Image.open(io.BytesIO(data)).size
+    x1, y1, x2, y2 = box if box is not None else (0, 0, width, height)
+    
+    bands = iter_gray_bands(data, (x1, y1, x2, y2), band_height)
+    
+    if format == 'PBM':
+        write_pbm(fp, x2 - x1, y2 - y1, (gray <= threshold for gray in bands), dpi)
+        return
+    
+    options = PNG_PRESETS[png_preset]
+    if options["bilevel"]:
+        # Pasami nie da się porównać wariantów - z krotki filtrów bierzemy pierwszy
+        filter = options["filter"] if isinstance(options["filter"], str) else options["filter"][0]
+        writer = BilevelPNGStreamWriter(fp, x2 - x1, y2 - y1, options["compress_level"], filter, dpi)
+        for gray in bands:
+            writer.write_rows(gray <= threshold)
+        writer.close()
+        return
+    
+    writer = PNGStreamWriter(fp, x2 - x1, y2 - y1, options["compress_level"], dpi)
+    lut32 = transparency_lut32(threshold)
+    for gray in bands:
+        writer.write_rows(binarize_array(gray, lut32=lut32))
+    writer.close()
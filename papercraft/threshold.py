@@ -0,0 +1,94 @@
+"""
+📊 Histogram jasności, automatyczny dobór progu i porównanie wielu progów
+"""
+
+import numpy as np
+
+# ============================================================================
+# HISTOGRAM I AUTOMATYCZNY PRÓG
+# ============================================================================
+
+def grayscale_histogram(img):
+    """256-kubełkowy histogram jasności (liczony raz na obraz)"""
+    if img.mode != 'L':
+        img = img.convert('L')
+    return np.array(img.histogram(), dtype=np.int64)
+
+def black_coverage(hist, threshold):
+    """Udział pikseli, które reduce_to_2_colors zamieni na czarne (<= threshold)"""
+    total = hist.sum()
+    if total == 0:
+        return 0.0
+    t = int(np.clip(np.floor(threshold), -1, 255))
+    return float(hist[:t + 1].sum() / total)
+
+def otsu_threshold(hist):
+    """Próg Otsu - maksymalizuje wariancję międzyklasową"""
+    p = hist / max(hist.sum(), 1)
+    w0 = np.cumsum(p)
+    mu = np.cumsum(p * np.arange(256))
+    mu_total = mu[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma_b = (mu_total * w0 - mu) ** 2 / (w0 * (1.0 - w0))
+    sigma_b = np.nan_to_num(sigma_b, nan=0.0, posinf=0.0)
+    return int(np.argmax(sigma_b))
+
+def triangle_threshold(hist):
+    """Próg metodą trójkąta - dobra dla skanów z jednym dominującym tłem"""
+    nonzero = np.flatnonzero(hist)
+    if nonzero.size < 2:
+        return 128
+    first, last = nonzero[0], nonzero[-1]
+    peak = int(np.argmax(hist))
+    
+    # Trójkąt rozpinamy w stronę dłuższego ogona (zwykle ciemny tusz na jasnym papierze)
+    if peak - first > last - peak:
+        bins = np.arange(first, peak + 1)
+        end = first
+    else:
+        bins = np.arange(peak, last + 1)
+        end = last
+    
+    # Odległość od prostej (peak, hist[peak]) - (end, 0), bez stałego mianownika
+    h = hist[bins].astype(np.float64)
+    distance = np.abs(hist[peak] * (bins - end) - (peak - end) * h)
+    best = int(bins[np.argmax(distance)])
+    
+    # Próg po stronie ogona, tak aby pik tła trafił w biały
+    return best if end < peak else best - 1
+
+def percentile_threshold(hist, black_percent):
+    """Najniższy próg, przy którym co najmniej black_percent % pikseli jest czarnych"""
+    cumulative = np.cumsum(hist) / max(hist.sum(), 1)
+    return int(min(np.searchsorted(cumulative, black_percent / 100.0), 255))
+
+THRESHOLD_METHODS = {
+    "otsu": otsu_threshold,
+    "triangle": triangle_threshold,
+    "percentile": percentile_threshold,
+}
+
+def suggest_threshold(hist, method="otsu", **kwargs):
+    """Automatyczny dobór progu z histogramu (otsu, triangle, percentile)"""
+    if method not in THRESHOLD_METHODS:
+        raise ValueError(f"Nieznana metoda progowania: {method}")
+    return THRESHOLD_METHODS[method](hist, **kwargs)
+
+# ============================================================================
+# PORÓWNANIE PROGÓW
+# ============================================================================
+
+SWEEP_THRESHOLDS = tuple(range(80, 201, 20))
+
+def sweep_lut(thresholds):
+    """LUT (K, 256): wiersz k to jasność -> 0 (czarny, <= progu k) albo 255"""
+    levels = np.arange(256)
+    return np.where(levels[None, :] <= np.asarray(thresholds)[:, None], 0, 255).astype(np.uint8)
+
+def threshold_sweep(gray, thresholds=SWEEP_THRESHOLDS):
+    """Wynik wielu progów naraz: (K, H, W) uint8 0/255, kafelek k dla progu k.
+
+    Jedno np.take z LUT (K, 256) zamiast K progowań - bez tablic bool
+    i porównań z wektorem progów, wynik od razu ciągły kafelkami.
+    """
+    return np.take(sweep_lut(thresholds), np.asarray(gray), axis=1)
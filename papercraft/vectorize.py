@@ -0,0 +1,335 @@
+"""
+🎨 Wektoryzacja - śledzenie konturów maski binarnej i zapis do SVG
+Bez zewnętrznych programów (potrace itp.) - tylko NumPy
+"""
+
+import io
+
+import numpy as np
+
+# ============================================================================
+# ŚLEDZENIE KONTURÓW
+# ============================================================================
+
+def _cycle_order(nxt):
+    """Rozkład permutacji nxt na cykle (kontury) bez pętli po elementach.
+
+    Zwraca (order, starts): indeksy elementów ułożone cyklami w kolejności
+    obiegu, każdy cykl od swojego najmniejszego indeksu, oraz początki
+    cykli w order. Obie części liczone są skokami wskaźników (pointer
+    jumping) - O(n log n).
+    """
+    n = len(nxt)
+    index_type = np.int32 if n < 2**31 else np.int64
+    nxt = nxt.astype(index_type)
+    index = np.arange(n, dtype=index_type)
+
+    # Minimum po cyklu: okno o rozmiarze 2^k, aż wartość jest stała w cyklu
+    rep = index
+    jump = nxt
+    while not np.array_equal(rep, rep[nxt]):
+        rep = np.minimum(rep, rep[jump])
+        jump = jump[jump]
+
+    # Rozcinamy cykl przed reprezentantem i liczymy odległość do końca listy
+    last = nxt == rep
+    jump = np.where(last, index, nxt)
+    dist = (~last).astype(index_type)
+    while not np.array_equal(jump, jump[jump]):
+        dist = dist + dist[jump]
+        jump = jump[jump]
+
+    # Pozycja w wyniku = przesunięcie cyklu + pozycja w cyklu
+    is_rep = rep == index
+    sizes = dist[is_rep].astype(np.int64) + 1
+    offsets = np.zeros(n, dtype=np.int64)
+    offsets[is_rep] = np.cumsum(sizes) - sizes
+    order = np.empty(n, dtype=np.int64)
+    order[offsets[rep] + (dist[rep] - dist)] = index
+
+    return order, offsets[is_rep]
+
+def _runs(signs):
+    """Maksymalne serie równych, niezerowych wartości w wierszach tablicy.
+
+    Zwraca (wiersz, początek, koniec włącznie, znak) dla każdej serii.
+    """
+    padded = np.pad(signs, ((0, 0), (1, 1)))
+    nonzero = signs != 0
+    rows, first = np.nonzero(nonzero & (signs != padded[:, :-2]))
+    _, last = np.nonzero(nonzero & (signs != padded[:, 2:]))
+    return rows, first, last, signs[rows, first]
+
+def trace_contours(mask):
+    """Kontury maski (True = czarny) jako zamknięte łamane po krawędziach pikseli.
+
+    Zwraca (points, starts): narożniki wszystkich konturów (N, 2) int64 w
+    kolejności obiegu oraz indeksy początków kolejnych konturów. Czarne
+    piksele stykające się rogiem należą do jednego konturu (8-spójność).
+    """
+    mask = np.asarray(mask, dtype=bool)
+    height, width = mask.shape
+    padded = np.pad(mask, 1).view(np.int8)
+
+    # Odcinki poziome na linii y między wierszami y-1 i y; czarny zawsze po prawej
+    # stronie kierunku obiegu, więc +1 (czarny pod spodem) = ruch w prawo
+    y, first, last, sign = _runs(padded[1:, 1:-1] - padded[:-1, 1:-1])
+    h_start = np.stack([np.where(sign > 0, first, last + 1), y], axis=1)
+    h_end = np.stack([np.where(sign > 0, last + 1, first), y], axis=1)
+
+    # Odcinki pionowe na linii x między kolumnami x-1 i x; -1 (czarny z lewej) = ruch w dół
+    x, first, last, sign = _runs(np.ascontiguousarray((padded[1:-1, 1:] - padded[1:-1, :-1]).T))
+    v_start = np.stack([x, np.where(sign < 0, first, last + 1)], axis=1)
+    v_end = np.stack([x, np.where(sign < 0, last + 1, first)], axis=1)
+
+    n_h = len(h_start)
+    n = n_h + len(v_start)
+    if n == 0:
+        return np.empty((0, 2), dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    start = np.concatenate([h_start, v_start]).astype(np.int64)
+    end = np.concatenate([h_end, v_end]).astype(np.int64)
+    direction = np.sign(end - start)
+
+    # Po odcinku poziomym zawsze następuje pionowy i odwrotnie
+    stride = width + 1
+    start_id = start[:, 1] * stride + start[:, 0]
+    end_id = end[:, 1] * stride + end[:, 0]
+    nxt = np.empty(n, dtype=np.int64)
+    for src, dst, offset in ((slice(0, n_h), slice(n_h, n), n_h), (slice(n_h, n), slice(0, n_h), 0)):
+        order = np.argsort(start_id[dst], kind='stable')
+        sorted_ids = start_id[dst][order]
+        pos = np.searchsorted(sorted_ids, end_id[src])
+        cand1 = order[pos] + offset
+        cand2 = order[np.minimum(pos + 1, len(order) - 1)] + offset
+        saddle = sorted_ids[np.minimum(pos + 1, len(order) - 1)] == end_id[src]
+
+        # Punkt siodłowy (2 wyjścia): skręcamy w lewo, co łączy czarne piksele po skosie
+        d_in, d_out = direction[src], direction[cand1]
+        turn = d_in[:, 0] * d_out[:, 1] - d_in[:, 1] * d_out[:, 0]
+        nxt[src] = np.where(saddle & (turn > 0), cand2, cand1)
+
+    # Cykle liczymy tylko po odcinkach poziomych (następnik co drugi krok) -
+    # o połowę mniej elementów, pionowe wstawiamy potem między nie
+    h_order, h_starts = _cycle_order(nxt[nxt[:n_h]])
+    order = np.empty(2 * n_h, dtype=np.int64)
+    order[0::2] = h_order
+    order[1::2] = nxt[h_order]
+
+    return start[order], 2 * h_starts
+
+# ============================================================================
+# FILTROWANIE I UPRASZCZANIE
+# ============================================================================
+
+def _path_ends(starts, total):
+    """Indeksy końców konturów (włącznie)"""
+    return np.r_[starts[1:], total] - 1
+
+def path_areas(points, starts):
+    """Pole każdego konturu ze wzoru shoelace (znak = kierunek obiegu)"""
+    if len(starts) == 0:
+        return np.empty(0)
+    nxt = np.arange(len(points)) + 1
+    nxt[_path_ends(starts, len(points))] = starts
+    x, y = points[:, 0].astype(np.float64), points[:, 1].astype(np.float64)
+    return 0.5 * np.add.reduceat(x * y[nxt] - x[nxt] * y, starts)
+
+def select_paths(points, starts, keep):
+    """Zostawia wybrane kontury (keep - maska bool po konturach)"""
+    lengths = np.diff(np.r_[starts, len(points)])
+    point_keep = np.repeat(keep, lengths)
+    kept_lengths = lengths[keep]
+    return points[point_keep], np.r_[0, np.cumsum(kept_lengths)[:-1]].astype(np.int64)
+
+def simplify_paths(points, starts, tolerance=1.0):
+    """Upraszcza zamknięte kontury algorytmem Douglasa-Peuckera.
+
+    Wszystkie odcinki są dzielone jednocześnie - każda iteracja to jeden
+    poziom rekurencji DP, liczony tylko dla odcinków, które jeszcze się
+    dzielą. Kontury, z których zostają mniej niż 3 punkty, są usuwane.
+    """
+    if len(starts) == 0:
+        return points.astype(np.float64), starts
+
+    total = len(points)
+    ends = _path_ends(starts, total)
+    # Każdy kontur domykamy kopią pierwszego punktu
+    index = np.insert(np.arange(total), ends + 1, starts)
+    xy = points[index].astype(np.float64)
+    closed_starts = starts + np.arange(len(starts))
+    closing = np.r_[closed_starts[1:], len(xy)] - 1
+
+    keep = np.zeros(len(xy), dtype=bool)
+    keep[closed_starts] = True
+    keep[closing] = True
+    seg_a, seg_b = closed_starts, closing
+
+    while True:
+        inner = seg_b - seg_a - 1
+        seg_a, seg_b, inner = seg_a[inner > 0], seg_b[inner > 0], inner[inner > 0]
+        if len(seg_a) == 0:
+            break
+
+        # Punkty wewnętrzne wszystkich aktywnych odcinków, płasko
+        offsets = np.cumsum(inner) - inner
+        flat = np.arange(inner.sum()) - np.repeat(offsets, inner) + np.repeat(seg_a + 1, inner)
+        a = np.repeat(xy[seg_a], inner, axis=0)
+        chord = np.repeat(xy[seg_b] - xy[seg_a], inner, axis=0)
+        rel = xy[flat] - a
+
+        chord_len = np.hypot(chord[:, 0], chord[:, 1])
+        cross = np.abs(chord[:, 0] * rel[:, 1] - chord[:, 1] * rel[:, 0])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Odcinek zerowej długości (start = koniec konturu) - odległość od punktu
+            dist = np.where(chord_len > 0, cross / chord_len, np.hypot(rel[:, 0], rel[:, 1]))
+
+        seg_max = np.maximum.reduceat(dist, offsets)
+        degenerate = np.all(xy[seg_a] == xy[seg_b], axis=1)
+        split = (seg_max > tolerance) | (degenerate & (seg_max > 0))
+        if not split.any():
+            break
+
+        # Pierwszy punkt z maksymalną odległością w każdym dzielonym odcinku
+        local = np.arange(len(flat)) - np.repeat(offsets, inner)
+        at_max = np.where(dist == np.repeat(seg_max, inner), local, len(flat))
+        farthest = seg_a + 1 + np.minimum.reduceat(at_max, offsets)
+
+        seg_a, seg_b, farthest = seg_a[split], seg_b[split], farthest[split]
+        keep[farthest] = True
+        seg_a, seg_b = np.concatenate([seg_a, farthest]), np.concatenate([farthest, seg_b])
+
+    keep[closing] = False
+    path_of = np.repeat(np.arange(len(starts)), np.diff(np.r_[closed_starts, len(xy)]))
+    counts = np.bincount(path_of[keep], minlength=len(starts))
+    simplified = xy[keep]
+    new_starts = np.r_[0, np.cumsum(counts)[:-1]].astype(np.int64)
+
+    return select_paths(simplified, new_starts, counts >= 3)
+
+# ============================================================================
+# KRZYWE BÉZIERA
+# ============================================================================
+
+def fit_bezier(points, starts, corner_angle=60.0):
+    """Styczne dla gładkich krzywych Béziera (Catmull-Rom) przez punkty konturów.
+
+    W wierzchołkach, gdzie kontur skręca o więcej niż corner_angle stopni,
+    styczna jest zerowa - zostaje ostry narożnik. Zwraca tablicę (N, 2)
+    stycznych; odcinek i -> i+1 ma punkty kontrolne P[i] + T[i]/3 i P[i+1] - T[i+1]/3.
+    """
+    total = len(points)
+    if total == 0:
+        return np.empty((0, 2))
+
+    ends = _path_ends(starts, total)
+    nxt = np.arange(total) + 1
+    nxt[ends] = starts
+    prev = np.arange(total) - 1
+    prev[starts] = ends
+
+    incoming = points - points[prev]
+    outgoing = points[nxt] - points
+    cos_turn = (incoming * outgoing).sum(axis=1) / np.maximum(
+        np.hypot(*incoming.T) * np.hypot(*outgoing.T), 1e-12
+    )
+    smooth = cos_turn >= np.cos(np.radians(corner_angle))
+
+    return np.where(smooth[:, None], (points[nxt] - points[prev]) / 2.0, 0.0)
+
+# ============================================================================
+# ZAPIS SVG
+# ============================================================================
+
+SVG_SUBPIXEL = 10  # krzywe zapisujemy w 1/10 px (viewBox x10) - same liczby całkowite
+
+def paths_to_svg_d(points, starts, tangents=None, scale=1):
+    """Atrybut d ścieżki SVG: współrzędne względne, M + l/c + z na kontur.
+
+    Współrzędne mnożone są przez scale i zaokrąglane do liczb całkowitych
+    (viewBox dokumentu musi używać tej samej skali). Odcinki z zerowymi
+    stycznymi na obu końcach zapisywane są jako proste (l).
+    """
+    total = len(points)
+    if total == 0:
+        return ""
+
+    ends = _path_ends(starts, total)
+    nxt = np.arange(total) + 1
+    nxt[ends] = starts
+    coords = np.rint(points * scale).astype(np.int64)
+    delta = coords[nxt] - coords
+    heads = [f"M{x} {y}" for x, y in coords[starts].tolist()]
+
+    if tangents is None:
+        # Ostatni odcinek konturu domyka "z"
+        kept = np.ones(total, dtype=bool)
+        kept[ends] = False
+        rows = delta[kept].tolist()
+        lengths = np.diff(np.r_[starts, total]) - 1
+        pieces = [f"{dx} {dy}" for dx, dy in rows]
+        parts = []
+        position = 0
+        for head, length in zip(heads, lengths.tolist()):
+            parts.append(head + "l" + " ".join(pieces[position:position + length]) + "z")
+            position += length
+        return "".join(parts)
+
+    # Punkty kontrolne względem początku odcinka: P0 + T0/3 i P1 - T1/3
+    control1 = np.rint(tangents * scale / 3.0).astype(np.int64)
+    control2 = delta - np.rint(tangents[nxt] * scale / 3.0).astype(np.int64)
+    straight = ~(control1.any(axis=1) | (control2 != delta).any(axis=1))
+
+    # Litera polecenia tylko na początku konturu i przy zmianie l <-> c
+    first = np.zeros(total, dtype=bool)
+    first[starts] = True
+    prev_straight = np.r_[False, straight[:-1]]
+    command = np.where(first | (straight != prev_straight), np.where(straight, "l", "c"), " ")
+
+    curve_rows = np.concatenate([control1, control2, delta], axis=1).tolist()
+    line_rows = delta.tolist()
+    pieces = [
+        ("%d %d" % tuple(line_rows[i])) if is_line else ("%d %d %d %d %d %d" % tuple(curve_rows[i]))
+        for i, is_line in enumerate(straight.tolist())
+    ]
+
+    head_of = dict(zip(starts.tolist(), heads))
+    last = set(ends.tolist())
+    return "".join(
+        head_of.get(i, "") + cmd + piece + ("z" if i in last else "")
+        for i, (cmd, piece) in enumerate(zip(command.tolist(), pieces))
+    )
+
+def mask_to_svg(mask, tolerance=1.0, min_area=2, bezier=True, corner_angle=60.0):
+    """Pełna wektoryzacja: maska (True = czarny) -> dokument SVG (tekst).
+
+    tolerance - maksymalne odchylenie uproszczonej ścieżki od konturu (px),
+    min_area - plamki i dziury mniejsze niż tyle pikseli są pomijane,
+    bezier - wygładzanie krzywymi Béziera poza ostrymi narożnikami.
+    """
+    height, width = np.shape(mask)
+    points, starts = trace_contours(mask)
+
+    if min_area > 0 and len(starts):
+        points, starts = select_paths(points, starts, np.abs(path_areas(points, starts)) >= min_area)
+
+    points, starts = simplify_paths(points, starts, tolerance=tolerance)
+    if bezier:
+        scale = SVG_SUBPIXEL
+        d = paths_to_svg_d(points, starts, fit_bezier(points, starts, corner_angle=corner_angle), scale)
+    else:
+        scale = 1
+        d = paths_to_svg_d(points, starts)
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width * scale} {height * scale}">'
+        f'<path fill="#000" fill-rule="evenodd" d="{d}"/></svg>'
+    )
+
+def image_to_svg(data, threshold=128, **options):
+    """Plik obrazu (bajty) -> SVG maski progu; options jak w mask_to_svg"""
+    from PIL import Image  # tylko tutaj - reszta modułu to czysty NumPy
+
+    gray = Image.open(io.BytesIO(data)).convert('L')
+    return mask_to_svg(np.asarray(gray) <= threshold, **options)
@@ -0,0 +1,204 @@
+"""
+🏭 Pula procesów - ciężkie etapy poza procesem serwera Streamlit
+Bajty obrazu trafiają do workera przez pamięć współdzieloną, a zlecenia
+ponad pojemność puli czekają w ograniczonej kolejce (albo są odrzucane)
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+# ============================================================================
+# PULA PROCESÓW
+# ============================================================================
+
+# Liczba procesów i długość kolejki, konfigurowalne zmiennymi środowiskowymi
+WORKER_PROCESSES = int(os.environ.get("PAPERCRAFT_WORKERS", str(os.cpu_count() or 1)))
+WORKER_MAX_QUEUED = int(os.environ.get("PAPERCRAFT_MAX_QUEUED", str(4 * WORKER_PROCESSES)))
+
+# Mniejsze obrazy liczymy na miejscu - start zlecenia w puli kosztuje więcej
+OFFLOAD_MIN_PIXELS = 4_000_000
+
+class PoolBusy(RuntimeError):
+    """Pula i kolejka są pełne - zlecenie odrzucone"""
+
+def _run_shared(func, name, size, args, kwargs):
+    """Wykonywane w workerze: bajty z pamięci współdzielonej -> func(data, ...)"""
+    # Segment usuwa serwer po zakończeniu zlecenia - worker go tylko czyta
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        data = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+    return func(data, *args, **kwargs)
+
+class Ticket:
+    """Zlecenie w puli - wynik (future) i miejsce w kolejce"""
+
+    def __init__(self, pool, owner=None):
+        self.owner = owner
+        self.future = Future()
+        self._pool = pool
+
+    def position(self):
+        """Miejsce w kolejce (1 = następne), 0 gdy już liczone lub gotowe"""
+        return self._pool._position(self)
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+class WorkerPool:
+    """Ograniczona pula procesów (spawn) z kontrolą przyjęć.
+
+    Naraz liczy się max_workers zleceń; kolejne czekają w kolejce FIFO
+    (najwyżej max_queued), a ponad to submit() rzuca PoolBusy (albo
+    czeka na miejsce, gdy block=True). Pierwszy
+    argument funkcji to bajty obrazu - przekazywane przez SharedMemory,
+    nie przez pickle. Funkcja musi być importowalna w workerze.
+    """
+
+    def __init__(self, max_workers=WORKER_PROCESSES, max_queued=WORKER_MAX_QUEUED):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._executor = None
+        self._waiting = deque()
+        self._running = 0
+        self._lock = threading.RLock()
+        self._space = threading.Condition(self._lock)
+        self._counts = {"admitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    def submit(self, func, data, *args, owner=None, block=False, **kwargs):
+        """Zleca func(data, *args, **kwargs); zwraca Ticket albo rzuca PoolBusy"""
+        with self._lock:
+            while self._running >= self.max_workers and len(self._waiting) >= self.max_queued:
+                if not block:
+                    self._counts["rejected"] += 1
+                    raise PoolBusy(f"Serwer jest zajęty ({self._running} w toku, {len(self._waiting)} w kolejce)")
+                self._space.wait()
+            ticket = Ticket(self, owner)
+            self._waiting.append((ticket, func, data, args, kwargs))
+            self._counts["admitted"] += 1
+            self._dispatch()
+        return ticket
+
+    def run(self, func, data, *args, on_wait=None, poll=0.2, **kwargs):
+        """submit() i czekanie na wynik; on_wait(pozycja) co `poll` sekund"""
+        ticket = self.submit(func, data, *args, **kwargs)
+        while True:
+            try:
+                return ticket.result(timeout=poll if on_wait is not None else None)
+            except FutureTimeout:  # do Pythona 3.10 inna klasa niż wbudowany TimeoutError
+                on_wait(ticket.position())
+
+    def as_executor(self, owner=None):
+        """Adapter submit() -> Future dla process_batch; czeka na miejsce w kolejce"""
+        return _PoolExecutor(self, owner)
+
+    def position(self, owner):
+        """Pozycja pierwszego czekającego zlecenia właściciela albo None"""
+        with self._lock:
+            for index, (ticket, *_) in enumerate(self._waiting):
+                if ticket.owner == owner:
+                    return index + 1
+            return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "running": self._running,
+                "queued": len(self._waiting),
+                "max_queued": self.max_queued,
+                **self._counts,
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            while self._waiting:
+                self._waiting.popleft()[0].future.cancel()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _position(self, ticket):
+        with self._lock:
+            for index, (queued, *_) in enumerate(self._waiting):
+                if queued is ticket:
+                    return index + 1
+            return 0
+
+    def _dispatch(self):
+        # Wołane pod blokadą - uruchamia zlecenia z kolejki, póki są wolne procesy
+        while self._running < self.max_workers and self._waiting:
+            ticket, func, data, args, kwargs = self._waiting.popleft()
+            if not ticket.future.set_running_or_notify_cancel():
+                continue
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            executor = self._executor
+            shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+            shm.buf[:len(data)] = data
+            self._running += 1
+            try:
+                future = executor.submit(_run_shared, func, shm.name, len(data), args, kwargs)
+            except Exception as exc:
+                self._finish(ticket, shm, executor, error=exc)
+                continue
+            future.add_done_callback(
+                lambda future, ticket=ticket, shm=shm, executor=executor: self._collect(future, ticket, shm, executor)
+            )
+
+    def _resume(self):
+        # Po awarii puli: kolejka rusza w osobnym wątku, nie w callbacku zepsutej puli
+        with self._lock:
+            self._dispatch()
+            self._space.notify_all()
+
+    def _collect(self, future, ticket, shm, executor):
+        try:
+            value = future.result()
+        except BaseException as exc:
+            self._finish(ticket, shm, executor, error=exc)
+        else:
+            self._finish(ticket, shm, executor, value=value)
+
+    def _finish(self, ticket, shm, executor, value=None, error=None):
+        shm.close()
+        shm.unlink()
+        broken = None
+        with self._lock:
+            self._running -= 1
+            self._counts["failed" if error is not None else "completed"] += 1
+            if isinstance(error, BrokenProcessPool) and self._executor is executor:
+                # Worker padł (np. OOM) - zepsutą pulę zamykamy, nową tworzy dopiero następny dispatch
+                broken, self._executor = executor, None
+            if self._executor is not None:
+                self._dispatch()
+            elif self._waiting:
+                threading.Thread(target=self._resume, name="papercraft-pool-resume", daemon=True).start()
+            self._space.notify_all()
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+        if error is not None:
+            ticket.future.set_exception(error)
+        else:
+            ticket.future.set_result(value)
+
+class _PoolExecutor:
+    """WorkerPool jako executor z concurrent.futures (tylko submit)"""
+
+    def __init__(self, pool, owner):
+        self._pool = pool
+        self._owner = owner
+
+    def submit(self, func, data, *args, **kwargs):
+        return self._pool.submit(func, data, *args, owner=self._owner, block=True, **kwargs).future
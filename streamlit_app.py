@@ -4,56 +4,540 @@ Zestaw narzędzi do obróbki obrazów dla papercraft
 """
 
 import streamlit as st
-from PIL import Image
+from PIL import Image, ImageDraw
 import numpy as np
 import io
+import os
+import hashlib
+import uuid
+
+from papercraft.core import binarize_to_transparent
+from papercraft.streaming import DEFAULT_PNG_PRESET, decode_region, encode_pbm, encode_clean_png
+from papercraft.threshold import SWEEP_THRESHOLDS, grayscale_histogram, black_coverage, suggest_threshold, threshold_sweep
+from papercraft.preview import PREVIEW_WIDTH, build_preview_pyramid, scale_box
+from papercraft.cache import CACHE_MAX_MB, PACKED_MASK, ResultCache
+from papercraft.profiling import StageMetrics, StageProfiler, ProfiledCache, configure_stage_log
+from papercraft.batch import list_batch_sources, clean_image_bytes, run_batch, new_batch_archive, read_batch_archive
+from papercraft.jobs import JobExecutor
+from papercraft.workers import OFFLOAD_MIN_PIXELS, PoolBusy, WorkerPool
+from papercraft.vectorize import image_to_svg, mask_to_svg
+from papercraft.pages import MULTIPAGE_EXTENSIONS, page_count, page_bytes, page_thumbnail, clean_pages_bytes
+from papercraft.morphology import cleanup_enabled, clean_gray
+from papercraft.adaptive import LOCAL_METHODS, LOCAL_OUTPUT_THRESHOLD, DEFAULT_WINDOW, local_gray
+from papercraft.parts import DEFAULT_MIN_AREA, DEFAULT_PADDING, find_parts, clean_parts_bytes
+from papercraft.resize import (
+    PAPER_SIZES_MM, DEFAULT_DPI, RESIZE_FORMATS, MM_PER_INCH, MAX_OUTPUT_PIXELS, image_dpi, target_size,
+    resize_image_bytes,
+)
+from papercraft.palette import PALETTE_METHODS, BACKGROUND_LEVEL, ColorHistogram, fit_palette, quantize_image, quantize_image_bytes
 
 # ============================================================================
-# FUNKCJE POMOCNICZE
+# CACHE WYNIKÓW
 # ============================================================================
 
-def reduce_to_2_colors(img, threshold=128):
-    """Redukuje obraz do 2 kolorów (czarny i biały)"""
-    if img.mode != 'L':
-        img = img.convert('L')
+@st.cache_resource
+def get_result_cache():
+    """Jeden cache na cały proces serwera (wspólny dla wszystkich sesji)"""
+    return ResultCache(max_bytes=CACHE_MAX_MB * 1024 * 1024)
+
+@st.cache_resource
+def get_stage_metrics():
+    """Statystyki etapów (p50/p95) dla całego procesu + log JSON z PAPERCRAFT_STAGE_LOG"""
+    configure_stage_log(os.environ.get("PAPERCRAFT_STAGE_LOG"))
+    return StageMetrics()
+
+@st.cache_resource
+def get_job_executor():
+    """Pula zadań w tle wspólna dla wszystkich sesji (podglądy po zmianie progu)"""
+    return JobExecutor()
+
+@st.cache_resource
+def get_worker_pool():
+    """Pula procesów dla ciężkich etapów - wspólna, z ograniczoną kolejką"""
+    return WorkerPool()
+
+def run_heavy(func, data, *args, owner=None, show_wait=False, **kwargs):
+    """Ciężki etap na dużym obrazie w puli procesów, na małym - od razu.
+
+    Proces serwera tylko czeka, więc inne sesje (także strona główna)
+    nie stają. show_wait pokazuje w skrypcie "w kolejce, pozycja N";
+    w callable pobierania (poza skryptem) musi być False.
+    """
+    width, height = Image.open(io.BytesIO(data)).size
+    if width * height < OFFLOAD_MIN_PIXELS:
+        return func(data, *args, **kwargs)
+    
+    if not show_wait:
+        return get_worker_pool().run(func, data, *args, owner=owner, **kwargs)
+    
+    placeholder = st.empty()
+    
+    def on_wait(position):
+        if position:
+            placeholder.info(f"⏳ W kolejce, pozycja {position}")
+        else:
+            placeholder.info("⚙️ Przetwarzam...")
     
-    img_array = np.array(img)
-    binary = (img_array > threshold).astype(np.uint8) * 255
+    try:
+        return get_worker_pool().run(func, data, *args, owner=owner, on_wait=on_wait, **kwargs)
+    except PoolBusy:
+        placeholder.error("🚦 Serwer jest teraz zajęty innymi obrazami - spróbuj za chwilę")
+        st.stop()
+    finally:
+        placeholder.empty()
+
+# Co ile sekund fragment podglądu sprawdza, czy zadanie w tle się skończyło
+JOB_POLL_SECONDS = 0.25
+
+def get_session_id():
+    """Krótki identyfikator sesji - w logu etapów i statystykach cache"""
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex[:8]
+    return st.session_state.session_id
+
+def get_session_cache():
+    """Wspólny cache wyników, w którym każde liczenie jest mierzone profilerem sesji"""
+    if "profiler" not in st.session_state:
+        st.session_state.profiler = StageProfiler(
+            get_stage_metrics(), context={"session": get_session_id()}
+        )
+    return ProfiledCache(get_result_cache(), st.session_state.profiler)
+
+def get_upload_digest(uploaded_file):
+    """Hash zawartości wgranego pliku, liczony raz na upload"""
+    digests = st.session_state.setdefault("upload_digests", {})
+    file_key = (uploaded_file.file_id, uploaded_file.size)
+    if file_key not in digests:
+        digests.clear()
+        digests[file_key] = hashlib.blake2b(uploaded_file.getvalue(), digest_size=20).hexdigest()
+    return digests[file_key]
+
+def load_gray_cached(cache, digest, uploaded_file, crop_box=None):
+    """Jasność (L) uploadu lub jego wycinka - 1 B/px zamiast RGB/RGBA.
+
+    Eksport i wektoryzacja potrzebują tylko jasności, więc cache nie
+    trzyma zdekodowanych oryginałów w kolorze. Przy wycinku dekoder
+    kończy na jego dolnej krawędzi.
+    """
+    def decode():
+        img = decode_region(uploaded_file.getvalue(), crop_box)
+        return img if img.mode == 'L' else img.convert('L')
+    return cache.get_or_compute(("gray", digest, crop_box), decode)
+
+def load_preview_pyramid(cache, digest, uploaded_file):
+    """Piramida podglądu dla uploadu (budowana raz na plik)"""
+    return cache.get_or_compute(
+        ("pyramid", digest),
+        lambda: run_heavy(build_preview_pyramid, uploaded_file.getvalue(), owner=cache.session, show_wait=True)
+    )
+
+def load_histogram(cache, digest, pyramid):
+    """Histogram jasności podglądu - współczynniki pokrycia i auto-próg w O(256)"""
+    return cache.get_or_compute(
+        ("histogram", digest),
+        lambda: grayscale_histogram(pyramid.levels[0])
+    )
+
+# Szerokość kafelka porównania progów - poziom piramidy nie węższy niż ten
+SWEEP_TILE_WIDTH = 320
+
+def load_threshold_sweep(cache, digest, pyramid, thresholds):
+    """Kafelki (K, H, W) dla wielu progów naraz z małego poziomu piramidy"""
+    img = pyramid.level_for_width(SWEEP_TILE_WIDTH)
     
-    return Image.fromarray(binary, mode='L')
+    def sweep():
+        gray = img.convert('L') if img.mode != 'L' else img
+        return threshold_sweep(gray, thresholds)
+    return cache.get_or_compute(
+        ("threshold_sweep", digest, thresholds, img.size),
+        lambda: cache.measure("threshold_sweep", sweep, tiles=len(thresholds))
+    )
 
-def remove_white_to_transparent(img):
-    """Zamienia biały kolor na przezroczystość"""
-    if img.mode != 'RGBA':
-        img = img.convert('RGBA')
+class PageUpload:
+    """Strona wielostronicowego pliku (albo plik po zmianie rozmiaru) udająca UploadedFile.
+
+    Bajty pochodzą z loadera (cache), więc po usunięciu z cache są
+    wyciągane z pliku od nowa.
+    """
     
-    data = np.array(img)
-    white_mask = (data[:,:,0] > 250) & (data[:,:,1] > 250) & (data[:,:,2] > 250)
-    data[white_mask] = [255, 255, 255, 0]
+    def __init__(self, name, loader):
+        self.name = name
+        self._loader = loader
     
-    return Image.fromarray(data, mode='RGBA')
+    def getvalue(self):
+        return self._loader()
+
+def load_page_count(cache, digest, uploaded_file):
+    """Liczba stron (klatek) uploadu - TIFF, GIF i WebP mogą mieć ich wiele"""
+    if not uploaded_file.name.lower().endswith(MULTIPAGE_EXTENSIONS):
+        return 1
+    return cache.get_or_compute(("pages", digest), lambda: page_count(uploaded_file.getvalue()))
+
+def page_upload(cache, digest, uploaded_file, index):
+    """Jedna strona jako osobny upload - dalej działa zwykły pipeline (piramida, eksport)"""
+    def loader():
+        return cache.get_or_compute(
+            ("page", digest, index),
+            lambda: run_heavy(page_bytes, uploaded_file.getvalue(), index, owner=cache.session)
+        )
+    base = uploaded_file.name.rsplit('.', 1)[0]
+    return PageUpload(f"{base}_p{index + 1}.png", loader)
+
+def load_image_dpi(cache, digest, uploaded_file):
+    """DPI zapisane w pliku (None, gdy brak) - z nagłówka, bez dekodowania"""
+    return cache.get_or_compute(
+        ("dpi", digest), lambda: image_dpi(Image.open(io.BytesIO(uploaded_file.getvalue())))
+    )
+
+def resized_upload(cache, digest, uploaded_file, resize):
+    """Upload po zmianie rozmiaru (PNG z DPI) - etap przed czyszczeniem, jak strona pliku"""
+    def loader():
+        return cache.get_or_compute(
+            ("resized", digest, resize),
+            lambda: run_heavy(resize_image_bytes, uploaded_file.getvalue(), resize, owner=cache.session)
+        )
+    base = uploaded_file.name.rsplit('.', 1)[0]
+    return PageUpload(f"{base}_resized.png", loader)
+
+def make_resize_payload(cache, digest, uploaded_file, resize, format):
+    """Odroczona zmiana rozmiaru pełnej rozdzielczości - dopiero po kliknięciu pobierania"""
+    def payload():
+        return cache.get_or_compute(
+            ("resize_export", digest, resize, format),
+            lambda: run_heavy(resize_image_bytes, uploaded_file.getvalue(), resize, format, owner=cache.session)
+        )
+    return payload
 
-def flatten_to_white_background(img):
-    """Spłaszcza obraz na białe tło (dla PBM)"""
-    if img.mode == 'RGBA':
-        background = Image.new('RGB', img.size, (255, 255, 255))
-        background.paste(img, mask=img.split()[3])
-        return background
-    return img
+def load_page_thumbnail(cache, digest, uploaded_file, index):
+    """Miniatura strony - liczona dopiero, gdy jest wyświetlana"""
+    return cache.get_or_compute(
+        ("thumbnail", digest, index),
+        lambda: run_heavy(page_thumbnail, uploaded_file.getvalue(), index, owner=cache.session)
+    )
 
-def convert_image_to_bytes(img, format='PNG'):
-    """Konwertuje obraz do bytes do pobrania"""
-    buf = io.BytesIO()
+def make_pages_payload(cache, digest, uploaded_file, threshold, format, png_preset=DEFAULT_PNG_PRESET,
+                       cleanup=None, local=None):
+    """Odroczony eksport wszystkich stron (ZIP PNG/PBM albo TIFF) - strona po stronie"""
+    if format != 'PNG':
+        png_preset = None
+    base_name = uploaded_file.name.rsplit('.', 1)[0]
     
-    if format == 'PBM':
-        img_flat = flatten_to_white_background(img)
-        img_bw = img_flat.convert('L').convert('1')
-        img_bw.save(buf, format='PPM')
-    else:  # PNG
-        img.save(buf, format='PNG')
+    def payload():
+        return cache.get_or_compute(
+            ("pages_export", digest, threshold, format, png_preset, cleanup, local),
+            lambda: run_heavy(
+                clean_pages_bytes, uploaded_file.getvalue(), threshold, format,
+                png_preset or DEFAULT_PNG_PRESET, base_name=base_name, cleanup=cleanup, local=local,
+                owner=cache.session
+            )
+        )
+    return payload
+
+# Eksport wszystkich stron: etykieta -> (format clean_pages_bytes, rozszerzenie, MIME)
+PAGES_EXPORT_FORMATS = {
+    "ZIP (PNG)": ("PNG", ".zip", "application/zip"),
+    "ZIP (PBM)": ("PBM", ".zip", "application/zip"),
+    "TIFF wielostronicowy (1-bit)": ("TIFF", ".tif", "image/tiff"),
+}
+
+def set_threshold(value):
+    """Callback przycisków auto-progu - ustawia suwak przed kolejnym rerunem"""
+    st.session_state.threshold = int(value)
+
+def cleanup_settings(min_component, max_hole, open_radius, close_radius):
+    """Ustawienia czyszczenia maski jako krotka par (klucz cache) albo None, gdy wyłączone"""
+    cleanup = (
+        ("min_component", min_component), ("max_hole", max_hole),
+        ("open_radius", open_radius), ("close_radius", close_radius),
+    )
+    return cleanup if cleanup_enabled(cleanup) else None
+
+# Metoda progu: None = globalny (suwak), pozostałe - klucze LOCAL_METHODS
+THRESHOLD_MODE_LABELS = {
+    None: "🎚️ Globalny (suwak)",
+    "sauvola": "🌓 Lokalny - Sauvola",
+    "bradley": "🌗 Lokalny - Bradley",
+    "mean": "🌔 Lokalny - średnia minus C",
+}
+
+def local_settings(method, window, k):
+    """Ustawienia progu lokalnego jako krotka par (klucz cache) albo None dla globalnego"""
+    if method is None:
+        return None
+    return (("method", method), ("window", window), ("k", k))
+
+def process_image_cached(cache, digest, img, threshold, crop_box=None, cleanup=None, scale=1.0, local=None):
+    """Obraz po redukcji kolorów i usunięciu tła (poziom piramidy podglądu).
+
+    crop_box wycina fragment przed konwersją - przetwarzany jest tylko on.
+    local zastępuje próg globalny lokalnym, a cleanup czyści maskę - okno
+    i rozmiary przeliczane przez scale (szerokość poziomu / pełna
+    szerokość). Cache trzyma wynik jako maskę 1-bit (PACKED_MASK), nie RGBA.
+    """
+    def process():
+        src = cache.measure("crop", lambda: img.crop(crop_box)) if crop_box is not None else img
+        gray = cache.measure("grayscale", lambda: src.convert('L')) if src.mode != 'L' else src
+        if local is not None:
+            gray = cache.measure("local_threshold", lambda: Image.fromarray(local_gray(np.asarray(gray), local, scale)))
+        if cleanup is not None:
+            gray = cache.measure(
+                "cleanup", lambda: Image.fromarray(clean_gray(np.asarray(gray), threshold, cleanup, scale))
+            )
+        return cache.measure("binarize", lambda: binarize_to_transparent(gray, threshold=threshold))
+    return cache.get_or_compute(
+        ("processed", digest, threshold, img.size, crop_box, cleanup, local), process, codec=PACKED_MASK
+    )
+
+def process_image_background(cache, jobs, owner, digest, img, threshold, crop_box=None, cleanup=None, scale=1.0,
+                             local=None, poll=False):
+    """Podgląd po obróbce bez blokowania reruna.
+
+    Trafienie w cache wraca od razu. Inaczej liczenie idzie do puli w tle
+    (zastępując poprzednie zlecenie właściciela), a do tego czasu zwracany
+    jest ostatni gotowy wynik dla tego pliku. Zwraca (obraz albo None,
+    próg tego obrazu, czy trwa liczenie).
+
+    poll=True to odpytywanie z fragmentu: gotowe zlecenie sprawdzane jest
+    najpierw w JobExecutor, a cache bez liczenia trafień - trafienie liczy
+    dopiero rerun, który pokazuje wynik.
+    """
+    params = (digest, threshold, img.size, crop_box, cleanup, local)
+    if poll:
+        latest = jobs.latest(owner)
+        if latest is not None and latest[0] == params:
+            return latest[1], threshold, False
+    cached = cache.peek(("processed", *params), codec=PACKED_MASK, count=not poll)
+    if cached is not None:
+        jobs.settle(owner, params, cached)
+        return cached, threshold, False
+    
+    jobs.submit(
+        owner, params, lambda: process_image_cached(cache, digest, img, threshold, crop_box, cleanup, scale, local)
+    )
+    latest = jobs.latest(owner)
+    if latest is None or latest[0][0] != digest:
+        return None, None, jobs.pending(owner)
+    return latest[1], latest[0][1], jobs.pending(owner)
+
+def show_background_preview(cache, jobs, owner, digest, img, threshold, crop_box=None, cleanup=None, scale=1.0,
+                            local=None, caption=None, **image_args):
+    """Podgląd z zadania w tle; póki liczy, fragment odświeża się co JOB_POLL_SECONDS"""
+    def request(poll=False):
+        return process_image_background(
+            cache, jobs, owner, digest, img, threshold, crop_box, cleanup, scale, local, poll
+        )
+    
+    # Zlecenie przed utworzeniem fragmentu - od tego zależy, czy ma się odświeżać.
+    # Wynik nie jest tu używany, więc sprawdzamy bez liczenia trafienia w cache
+    polling = request(poll=True)[2]
     
-    buf.seek(0)
-    return buf.getvalue()
+    def render():
+        # Przebiegi fragmentu co JOB_POLL_SECONDS też nie nabijają trafień -
+        # liczy je tylko przebieg, który pokazuje gotowy wynik
+        image, shown_threshold, pending = request(poll=polling)
+        if polling and not pending:
+            # Gotowe - pełny rerun wyłącza odświeżanie i pokazuje wynik
+            st.rerun()
+        
+        if image is not None:
+            st.image(image, caption=caption, **image_args)
+        elif jobs.error(owner) is not None:
+            st.error(f"❌ Błąd przetwarzania: {jobs.error(owner)}")
+        else:
+            st.info("⏳ Przetwarzam...")
+        if pending and shown_threshold is not None:
+            st.caption(f"⏳ Liczę próg {threshold} (pokazany: {shown_threshold})")
+    
+    st.fragment(render, run_every=JOB_POLL_SECONDS if polling else None)()
+
+def show_crop_preview(cache, jobs, owner, digest, pyramid, box, threshold, cleanup=None, local=None):
+    """Podgląd wycinka z poziomu piramidy dającego ~400 px szerokości wycinka"""
+    full_width = pyramid.full_size[0]
+    level = pyramid.level_for_width(400 * full_width // (box[2] - box[0]))
+    show_background_preview(
+        cache, jobs, owner, digest, level, threshold,
+        crop_box=scale_box(box, pyramid.full_size, level.size),
+        cleanup=cleanup, scale=level.width / full_width, local=local,
+        caption=f"Przycięty: {box[2] - box[0]} x {box[3] - box[1]} px", width=400
+    )
+
+def detect_parts_cached(cache, digest, img, full_size, threshold, min_area, padding, cleanup=None, local=None):
+    """Ramki części arkusza wykryte na poziomie piramidy, przeliczone do pełnej rozdzielczości"""
+    scale = img.width / full_size[0]
+    
+    def detect():
+        gray = np.asarray(img.convert('L') if img.mode != 'L' else img)
+        gray = clean_gray(local_gray(gray, local, scale), threshold, cleanup, scale)
+        boxes = find_parts(gray, threshold, max(round(min_area * scale * scale), 1), round(padding * scale))
+        return [scale_box(box, img.size, full_size) for box in boxes]
+    return cache.get_or_compute(
+        ("parts", digest, img.size, threshold, min_area, padding, cleanup, local),
+        lambda: cache.measure("find_parts", detect)
+    )
+
+def draw_part_boxes(img, boxes, full_size):
+    """Podgląd z ponumerowanymi ramkami części"""
+    preview = img.convert('RGB')
+    draw = ImageDraw.Draw(preview)
+    for index, box in enumerate(boxes):
+        x1, y1, x2, y2 = scale_box(box, full_size, img.size)
+        draw.rectangle((x1, y1, x2 - 1, y2 - 1), outline=(230, 60, 60), width=2)
+        draw.text((x1 + 3, y1 + 2), str(index + 1), fill=(230, 60, 60))
+    return preview
+
+def make_parts_payload(cache, digest, uploaded_file, threshold, format, png_preset=DEFAULT_PNG_PRESET,
+                       min_area=DEFAULT_MIN_AREA, padding=DEFAULT_PADDING, cleanup=None, local=None):
+    """Odroczony eksport wszystkich części (ZIP) - wykrywanie w pełnej rozdzielczości, w puli procesów"""
+    if format != 'PNG':
+        png_preset = None
+    base_name = uploaded_file.name.rsplit('.', 1)[0]
+    
+    def payload():
+        return cache.get_or_compute(
+            ("parts_export", digest, threshold, format, png_preset, min_area, padding, cleanup, local),
+            lambda: run_heavy(
+                clean_parts_bytes, uploaded_file.getvalue(), threshold, format, png_preset or DEFAULT_PNG_PRESET,
+                base_name=base_name, min_area=min_area, padding=padding, cleanup=cleanup, local=local,
+                owner=cache.session
+            )
+        )
+    return payload
+
+def encode_full_resolution(cache, digest, uploaded_file, threshold, crop_box, format,
+                           png_preset=DEFAULT_PNG_PRESET, cleanup=None, local=None):
+    """Eksport w pełnej rozdzielczości - duże skany pasami, bez obrazu RGBA w pamięci"""
+    data = uploaded_file.getvalue()
+    width, height = Image.open(io.BytesIO(data)).size
+    
+    if width * height >= OFFLOAD_MIN_PIXELS:
+        # Duży obraz w puli procesów; od STREAMING_MIN_PIXELS worker liczy go pasami
+        def export():
+            return run_heavy(
+                clean_image_bytes, data, threshold, format, None, png_preset,
+                box=crop_box, cleanup=cleanup, local=local, owner=cache.session
+            )[0]
+        return cache.measure("worker_export", export, width=width, height=height, format=format)
+    
+    # Wycinek już przy dekodowaniu; PBM i PNG prosto z jasności, bez pośredniego RGBA
+    img = load_gray_cached(cache, digest, uploaded_file, crop_box)
+    dpi = load_image_dpi(cache, digest, uploaded_file)
+    gray = np.asarray(img)
+    if local is not None:
+        gray = cache.measure("local_threshold", lambda: local_gray(gray, local))
+    if cleanup is not None:
+        gray = cache.measure("cleanup", lambda: clean_gray(gray, threshold, cleanup))
+    
+    if format == 'PBM':
+        return cache.measure("encode_pbm", lambda: encode_pbm(gray, threshold, dpi), format=format)
+    return cache.measure(
+        "encode_png", lambda: encode_clean_png(gray, threshold, png_preset, dpi),
+        width=img.width, height=img.height, format=format, preset=png_preset
+    )
+
+def encode_image_cached(cache, digest, uploaded_file, threshold, crop_box, format, png_preset=DEFAULT_PNG_PRESET,
+                        cleanup=None, local=None):
+    """Zakodowany plik wynikowy (PNG/PBM) dla danego zestawu parametrów"""
+    if format == 'PBM':
+        png_preset = None  # nie wpływa na PBM - jeden wpis cache
+    return cache.get_or_compute(
+        ("encoded", digest, threshold, crop_box, format, png_preset, cleanup, local),
+        lambda: encode_full_resolution(
+            cache, digest, uploaded_file, threshold, crop_box, format, png_preset, cleanup, local
+        )
+    )
+
+def vectorize_cached(cache, digest, img, threshold, tolerance, min_area, bezier):
+    """SVG z maski progu dla danego poziomu obrazu (podgląd lub pełna rozdzielczość)"""
+    def trace():
+        gray = img.convert('L') if img.mode != 'L' else img
+        return mask_to_svg(np.asarray(gray) <= threshold, tolerance=tolerance, min_area=min_area, bezier=bezier)
+    return cache.get_or_compute(
+        ("svg", digest, threshold, tolerance, min_area, bezier, img.size),
+        trace
+    )
+
+def make_svg_payload(cache, digest, uploaded_file, threshold, tolerance, min_area, bezier):
+    """Odroczona wektoryzacja pełnej rozdzielczości - dopiero po kliknięciu pobierania"""
+    def payload():
+        data = uploaded_file.getvalue()
+        size = Image.open(io.BytesIO(data)).size
+        # Ten sam klucz co vectorize_cached dla pełnej rozdzielczości; duże obrazy w puli procesów
+        return cache.get_or_compute(
+            ("svg", digest, threshold, tolerance, min_area, bezier, size),
+            lambda: run_heavy(
+                image_to_svg, data, threshold, owner=cache.session,
+                tolerance=tolerance, min_area=min_area, bezier=bezier
+            )
+        )
+    return payload
+
+def load_color_histogram(cache, digest, pyramid):
+    """Histogram kolorów podglądu - dobór palety dla każdego N bez ponownego czytania pikseli"""
+    return cache.get_or_compute(
+        ("color_histogram", digest),
+        lambda: cache.measure("color_histogram", lambda: ColorHistogram.from_image(pyramid.levels[0]))
+    )
+
+def fit_palette_cached(cache, digest, histogram, colors, method):
+    """Paleta N kolorów (od najjaśniejszego) - milisekundy, gdy histogram już jest"""
+    return cache.get_or_compute(
+        ("palette", digest, colors, method),
+        lambda: cache.measure("fit_palette", lambda: fit_palette(histogram, colors, method))
+    )
+
+def quantize_preview_cached(cache, digest, img, palette, colors, method, transparent):
+    """Podgląd w kolorach palety dla danego poziomu piramidy"""
+    return cache.get_or_compute(
+        ("palette_preview", digest, colors, method, transparent, img.size),
+        lambda: cache.measure("palette_map", lambda: quantize_image(img, palette, transparent))
+    )
+
+def make_palette_payload(cache, digest, uploaded_file, palette, colors, method, transparent):
+    """Odroczony PNG z paletą w pełnej rozdzielczości - ta sama paleta co w podglądzie"""
+    def payload():
+        return cache.get_or_compute(
+            ("palette_export", digest, colors, method, transparent),
+            lambda: run_heavy(
+                quantize_image_bytes, uploaded_file.getvalue(), palette=palette.tolist(),
+                transparent_background=transparent, owner=cache.session
+            )
+        )
+    return payload
+
+def palette_swatches(palette, transparent):
+    """Kolory palety jako kwadraty HTML (tło przezroczyste oznaczone kratką)"""
+    cells = []
+    for index, (r, g, b) in enumerate(palette.tolist()):
+        see_through = transparent and index == 0 and min(r, g, b) >= BACKGROUND_LEVEL
+        title = f"#{r:02x}{g:02x}{b:02x}" + (" (przezroczyste)" if see_through else "")
+        fill = "repeating-conic-gradient(#ccc 0% 25%, #fff 0% 50%) 50% / 12px 12px" if see_through \
+            else f"rgb({r}, {g}, {b})"
+        cells.append(
+            f"<div title='{title}' style='width: 32px; height: 32px; border-radius: 6px; "
+            f"border: 1px solid #ddd; background: {fill};'></div>"
+        )
+    return "<div style='display: flex; gap: 6px; flex-wrap: wrap;'>" + "".join(cells) + "</div>"
+
+def make_download_payload(cache, digest, uploaded_file, threshold, crop_box, format,
+                          png_preset=DEFAULT_PNG_PRESET, cleanup=None, local=None):
+    """Odroczone kodowanie pliku - wywoływane dopiero po kliknięciu pobierania"""
+    def payload():
+        return encode_image_cached(
+            cache, digest, uploaded_file, threshold, crop_box, format, png_preset, cleanup, local
+        )
+    return payload
+
+# Zapis PNG wyniku - klucze PNG_PRESETS
+PNG_PRESET_LABELS = {
+    "balanced": "⚖️ 1-bit, zbalansowany",
+    "fast": "⚡ 1-bit, najszybszy",
+    "smallest": "📦 1-bit, najmniejszy plik",
+    "rgba": "🎨 RGBA 8-bit (jak dawniej)",
+}
+PNG_PRESET_HELP = (
+    "1-bit z paletą i przezroczystością daje te same piksele co RGBA, "
+    "a plik jest kilka razy mniejszy i szybciej zapisywany"
+)
 
 # ============================================================================
 # KONFIGURACJA STRONY
@@ -92,15 +576,18 @@ with st.sidebar:
         options=[
             "🏠 Strona główna",
             "✂️ Czyszczenie i wycinanie",
-            "🎨 Wektoryzacja (wkrótce)",
-            "📐 Zmiana rozmiaru (wkrótce)",
-            "🔄 Batch processing (wkrótce)"
+            "🎨 Wektoryzacja",
+            "🌈 Redukcja kolorów",
+            "📐 Zmiana rozmiaru",
+            "🔄 Batch processing"
         ],
         label_visibility="collapsed"
     )
     
     st.divider()
     
+    show_debug = st.toggle("🐞 Panel debug", value=False, help="Czas i rozmiar wyników etapów przetwarzania")
+    
     # Mini info
     st.markdown("""
     <div style='background-color: #f0f2f6; padding: 15px; border-radius: 10px; font-size: 14px;'>
@@ -132,7 +619,7 @@ if tool == "🏠 Strona główna":
                     border-left: 5px solid #667eea; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
             <h3 style='margin-top: 0; color: #667eea;'>✂️ Czyszczenie i wycinanie</h3>
             <p style='color: #666; line-height: 1.6;'>
-                • Redukcja kolorów do czarno-białego<br>
+                • Progowanie do czerni i bieli<br>
                 • Usuwanie białego tła<br>
                 • Wycinanie fragmentów obrazu<br>
                 • Export do PNG lub PBM
@@ -155,9 +642,9 @@ if tool == "🏠 Strona główna":
                 • Regulacja dokładności<br>
                 • Podgląd na żywo
             </p>
-            <span style='background-color: #fbbf24; color: white; padding: 5px 12px; 
+            <span style='background-color: #4ade80; color: white; padding: 5px 12px; 
                          border-radius: 20px; font-size: 12px; font-weight: bold;'>
-                🚧 WKRÓTCE
+                ✓ DOSTĘPNE
             </span>
         </div>
         """, unsafe_allow_html=True)
@@ -167,6 +654,24 @@ if tool == "🏠 Strona główna":
     col3, col4 = st.columns(2)
     
     with col3:
+        st.markdown("""
+        <div style='padding: 25px; background-color: #f8f9fa; border-radius: 15px; 
+                    border-left: 5px solid #34d399; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
+            <h3 style='margin-top: 0; color: #34d399;'>🌈 Redukcja kolorów</h3>
+            <p style='color: #666; line-height: 1.6;'>
+                • Redukcja do 2-16 płaskich kolorów<br>
+                • Paleta dobrana do obrazu (k-means lub median cut)<br>
+                • Przezroczyste tło<br>
+                • Export do PNG z paletą
+            </p>
+            <span style='background-color: #4ade80; color: white; padding: 5px 12px; 
+                         border-radius: 20px; font-size: 12px; font-weight: bold;'>
+                ✓ DOSTĘPNE
+            </span>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col4:
         st.markdown("""
         <div style='padding: 25px; background-color: #f8f9fa; border-radius: 15px; 
                     border-left: 5px solid #a78bfa; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
@@ -174,17 +679,21 @@ if tool == "🏠 Strona główna":
             <p style='color: #666; line-height: 1.6;'>
                 • Skalowanie z zachowaniem proporcji<br>
                 • Zmiana DPI<br>
-                • Batch processing wielu plików<br>
-                • Predefiniowane rozmiary
+                • Zmniejszanie skanów przed czyszczeniem<br>
+                • Predefiniowane rozmiary (A4, A3, Letter)
             </p>
-            <span style='background-color: #6b7280; color: white; padding: 5px 12px; 
+            <span style='background-color: #4ade80; color: white; padding: 5px 12px; 
                          border-radius: 20px; font-size: 12px; font-weight: bold;'>
-                📅 PLANOWANE
+                ✓ DOSTĘPNE
             </span>
         </div>
         """, unsafe_allow_html=True)
     
-    with col4:
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    col5, _ = st.columns(2)
+    
+    with col5:
         st.markdown("""
         <div style='padding: 25px; background-color: #f8f9fa; border-radius: 15px; 
                     border-left: 5px solid #f472b6; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
@@ -193,11 +702,11 @@ if tool == "🏠 Strona główna":
                 • Przetwarzanie wielu plików naraz<br>
                 • Automatyczne nazewnictwo<br>
                 • Zapis do ZIP<br>
-                • Podgląd wszystkich
+                • Automatyczny dobór progu
             </p>
-            <span style='background-color: #6b7280; color: white; padding: 5px 12px; 
+            <span style='background-color: #4ade80; color: white; padding: 5px 12px; 
                          border-radius: 20px; font-size: 12px; font-weight: bold;'>
-                📅 PLANOWANE
+                ✓ DOSTĘPNE
             </span>
         </div>
         """, unsafe_allow_html=True)
@@ -240,25 +749,136 @@ elif tool == "✂️ Czyszczenie i wycinanie":
     # Upload
     uploaded_file = st.file_uploader(
         "📁 Wgraj obraz",
-        type=['png', 'jpg', 'jpeg', 'bmp'],
-        help="Obsługiwane formaty: PNG, JPG, BMP"
+        type=['png', 'jpg', 'jpeg', 'bmp', 'tif', 'tiff', 'gif', 'webp'],
+        help="Obsługiwane formaty: PNG, JPG, BMP oraz wielostronicowe TIFF, GIF i WebP"
     )
     
     if uploaded_file is not None:
-        original_img = Image.open(uploaded_file)
+        cache = get_session_cache()
+        upload_digest = get_upload_digest(uploaded_file)
+        jobs = get_job_executor()
+        session_id = get_session_id()
+        
+        # Plik wielostronicowy - dalej pracujemy na jednej wybranej stronie
+        multipage_file, multipage_digest = None, None
+        page_total = load_page_count(cache, upload_digest, uploaded_file)
+        if page_total > 1:
+            multipage_file, multipage_digest = uploaded_file, upload_digest
+            page_number = st.number_input(
+                f"📚 Strona (plik ma {page_total} stron)", min_value=1, max_value=page_total, value=1
+            )
+            
+            if st.checkbox("🗂️ Pokaż miniatury stron"):
+                # Tylko okno 8 stron wokół wybranej - reszta nie jest dekodowana
+                window_start = (page_number - 1) // 8 * 8
+                thumb_columns = st.columns(8)
+                for offset, column in enumerate(thumb_columns):
+                    index = window_start + offset
+                    if index < page_total:
+                        with column:
+                            st.image(
+                                load_page_thumbnail(cache, multipage_digest, multipage_file, index),
+                                caption=f"{index + 1}", use_container_width=True
+                            )
+            
+            uploaded_file = page_upload(cache, multipage_digest, multipage_file, page_number - 1)
+            upload_digest = f"{multipage_digest}:p{page_number}"
+        
+        # Zmniejszenie przed czyszczeniem - próg, podgląd i eksport liczą już mniej pikseli
+        if st.checkbox(
+            "📐 Zmniejsz przed czyszczeniem", value=False,
+            help="Np. skan 1200 DPI do 300 DPI - 16 razy mniej pikseli do progowania"
+        ):
+            col_dpi1, col_dpi2 = st.columns(2)
+            with col_dpi1:
+                prestage_source_dpi = st.number_input(
+                    "DPI skanu", min_value=50, max_value=9600,
+                    value=round(load_image_dpi(cache, upload_digest, uploaded_file) or 1200), step=50,
+                    help="Odczytane z pliku, gdy je zapisuje"
+                )
+            with col_dpi2:
+                prestage_dpi = st.number_input("Docelowe DPI", min_value=50, max_value=9600, value=DEFAULT_DPI, step=50)
+            
+            if prestage_dpi < prestage_source_dpi:
+                resize = (("dpi", prestage_dpi), ("source_dpi", prestage_source_dpi))
+                uploaded_file = resized_upload(cache, upload_digest, uploaded_file, resize)
+                upload_digest = f"{upload_digest}:r{prestage_source_dpi}-{prestage_dpi}"
+                st.caption(f"⚡ Do progowania trafi {(prestage_source_dpi / prestage_dpi) ** 2:.0f} razy mniej pikseli")
+            else:
+                st.warning("⚠️ Docelowe DPI musi być mniejsze niż DPI skanu - obraz bez zmian")
+        
+        # Pełna rozdzielczość dekodowana dopiero przy pobieraniu
+        pyramid = load_preview_pyramid(cache, upload_digest, uploaded_file)
+        full_width, full_height = pyramid.full_size
+        preview_img = pyramid.level_for_width(PREVIEW_WIDTH)
         
         # Parametry
         with st.expander("⚙️ Ustawienia", expanded=True):
             col_set1, col_set2 = st.columns(2)
             
             with col_set1:
+                histogram = load_histogram(cache, upload_digest, pyramid)
+                st.session_state.setdefault("threshold", 128)
+                
+                local_method = st.selectbox(
+                    "Metoda progu",
+                    options=list(THRESHOLD_MODE_LABELS),
+                    format_func=THRESHOLD_MODE_LABELS.get,
+                    help="Lokalny próg liczony jest osobno dla otoczenia każdego piksela - "
+                         "dla zdjęć z cieniem lub nierównym oświetleniem"
+                )
+                
                 threshold = st.slider(
                     "Próg binaryzacji (0-255)",
                     min_value=0,
                     max_value=255,
-                    value=128,
+                    key="threshold",
+                    disabled=local_method is not None,
                     help="Wyższy = więcej białego, Niższy = więcej czarnego"
                 )
+                
+                local = None
+                if local_method is None:
+                    # Pokrycie z histogramu - bez ponownego przetwarzania obrazu
+                    coverage = black_coverage(histogram, threshold)
+                    st.caption(f"⬛ Czarne: {coverage:.1%} | ⬜ Białe (przezroczyste): {1 - coverage:.1%}")
+                else:
+                    col_window, col_k = st.columns(2)
+                    with col_window:
+                        local_window = st.slider(
+                            "Okno (px)", min_value=15, max_value=401, value=DEFAULT_WINDOW, step=2,
+                            help="Bok kwadratu wokół piksela w pełnej rozdzielczości - "
+                                 "kilka razy grubszy niż linie rysunku"
+                        )
+                    with col_k:
+                        local_k = st.number_input(
+                            "Czułość k", min_value=0.0, value=LOCAL_METHODS[local_method],
+                            step=0.05 if local_method != "mean" else 1.0,
+                            help="Większa = mniej czarnego (dla średniej minus C w poziomach jasności)"
+                        )
+                    local = local_settings(local_method, local_window, local_k)
+                
+                col_auto1, col_auto2, col_auto3 = st.columns(3)
+                with col_auto1:
+                    st.button(
+                        "🎯 Otsu", use_container_width=True,
+                        on_click=set_threshold, args=(suggest_threshold(histogram, "otsu"),)
+                    )
+                with col_auto2:
+                    st.button(
+                        "📐 Trójkąt", use_container_width=True,
+                        on_click=set_threshold, args=(suggest_threshold(histogram, "triangle"),)
+                    )
+                with col_auto3:
+                    black_percent = st.number_input(
+                        "% czarnych", min_value=0.0, max_value=100.0, value=10.0, step=1.0,
+                        label_visibility="collapsed"
+                    )
+                    st.button(
+                        "📊 Percentyl", use_container_width=True,
+                        on_click=set_threshold,
+                        args=(suggest_threshold(histogram, "percentile", black_percent=black_percent),)
+                    )
             
             with col_set2:
                 output_format = st.radio(
@@ -267,31 +887,99 @@ elif tool == "✂️ Czyszczenie i wycinanie":
                     horizontal=True,
                     help="PNG - z przezroczystością, PBM - do wektoryzacji"
                 )
+                png_preset = st.selectbox(
+                    "Zapis PNG",
+                    options=list(PNG_PRESET_LABELS),
+                    format_func=PNG_PRESET_LABELS.get,
+                    help=PNG_PRESET_HELP
+                )
+        
+        # Czyszczenie maski - rozmiary w pikselach pełnej rozdzielczości, 0 = wyłączone
+        with st.expander("🧽 Czyszczenie maski"):
+            col_clean1, col_clean2, col_clean3, col_clean4 = st.columns(4)
+            with col_clean1:
+                min_component = st.number_input(
+                    "Usuń plamki < px", min_value=0, value=0, step=4,
+                    help="Czarne kropki i kurz mniejsze niż podana liczba pikseli znikają"
+                )
+            with col_clean2:
+                max_hole = st.number_input(
+                    "Wypełnij dziurki < px", min_value=0, value=0, step=4,
+                    help="Białe dziurki wewnątrz czarnych kształtów mniejsze niż podana liczba pikseli"
+                )
+            with col_clean3:
+                open_radius = st.number_input(
+                    "Otwarcie (promień)", min_value=0, max_value=20, value=0,
+                    help="Usuwa wypustki i kropki węższe niż 2 x promień + 1"
+                )
+            with col_clean4:
+                close_radius = st.number_input(
+                    "Zamknięcie (promień)", min_value=0, max_value=20, value=0,
+                    help="Zalepia szczeliny i przerwy w liniach węższe niż 2 x promień + 1"
+                )
+            cleanup = cleanup_settings(min_component, max_hole, open_radius, close_radius)
+        
+        if local is not None:
+            # Wynik progu lokalnego to czyste 0/255 - jeden stały próg dla wszystkich kluczy cache
+            threshold = LOCAL_OUTPUT_THRESHOLD
+        elif st.checkbox(
+            "🎞️ Porównaj progi", value=False,
+            help="Kilka progów obok siebie, liczone naraz na małym podglądzie - kliknij wybrany"
+        ):
+            col_sweep1, col_sweep2, col_sweep3 = st.columns(3)
+            with col_sweep1:
+                sweep_from = st.number_input("Od", min_value=0, max_value=255, value=SWEEP_THRESHOLDS[0])
+            with col_sweep2:
+                sweep_to = st.number_input("Do", min_value=0, max_value=255, value=SWEEP_THRESHOLDS[-1])
+            with col_sweep3:
+                sweep_step = st.number_input("Krok", min_value=1, max_value=128, value=20)
+            
+            # Najwyżej 16 kafelków - przy szerszym zakresie krok rośnie
+            sweep_step = max(sweep_step, -(-(sweep_to - sweep_from + 1) // 16))
+            thresholds = tuple(range(sweep_from, sweep_to + 1, sweep_step))
+            if thresholds:
+                tiles = load_threshold_sweep(cache, upload_digest, pyramid, thresholds)
+                sweep_columns = 4
+                for row_start in range(0, len(thresholds), sweep_columns):
+                    for column, value, tile in zip(
+                        st.columns(sweep_columns), thresholds[row_start:row_start + sweep_columns],
+                        tiles[row_start:row_start + sweep_columns]
+                    ):
+                        with column:
+                            st.image(tile, use_container_width=True)
+                            st.button(
+                                f"{'✅' if value == threshold else '🎚️'} {value} · ⬛ {black_coverage(histogram, value):.0%}",
+                                key=f"sweep_{value}", use_container_width=True,
+                                on_click=set_threshold, args=(value,)
+                            )
+                st.caption("Podgląd samego progu (bez czyszczenia maski) - kliknięcie ustawia suwak")
+            else:
+                st.error("❌ Próg początkowy musi być mniejszy lub równy końcowemu!")
         
         # Przetwarzanie
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("### 📥 Oryginał")
-            st.image(original_img, use_container_width=True)
-            st.caption(f"📏 {original_img.width} x {original_img.height} px")
+            st.image(preview_img, use_container_width=True)
+            st.caption(f"📏 {full_width} x {full_height} px")
         
         with col2:
             st.markdown("### ✨ Po obróbce")
             
-            with st.spinner("Przetwarzam..."):
-                # Redukcja kolorów
-                processed_img = reduce_to_2_colors(original_img, threshold=threshold)
-                # Usunięcie białego tła
-                processed_img = remove_white_to_transparent(processed_img)
-            
-            st.image(processed_img, use_container_width=True)
-            st.caption(f"✅ {processed_img.width} x {processed_img.height} px")
+            # Redukcja kolorów + usunięcie białego tła (na podglądzie, w tle -
+            # przeciąganie suwaka nie blokuje reruna ani nie mnoży liczenia)
+            show_background_preview(
+                cache, jobs, (session_id, "preview"), upload_digest, preview_img, threshold,
+                cleanup=cleanup, scale=preview_img.width / full_width, local=local, use_container_width=True
+            )
+            st.caption(f"✅ {full_width} x {full_height} px")
         
         # Opcjonalne wycinanie
         st.divider()
         
         enable_crop = st.checkbox("✂️ Wytnij fragment obrazu", value=False)
+        crop_box = None
         
         if enable_crop:
             st.info("💡 Wpisz współrzędne prostokąta do wycięcia")
@@ -299,21 +987,77 @@ elif tool == "✂️ Czyszczenie i wycinanie":
             col_x1, col_y1, col_x2, col_y2 = st.columns(4)
             
             with col_x1:
-                x1 = st.number_input("X1 (lewy)", min_value=0, max_value=processed_img.width, value=0)
+                x1 = st.number_input("X1 (lewy)", min_value=0, max_value=full_width, value=0)
             with col_y1:
-                y1 = st.number_input("Y1 (górny)", min_value=0, max_value=processed_img.height, value=0)
+                y1 = st.number_input("Y1 (górny)", min_value=0, max_value=full_height, value=0)
             with col_x2:
-                x2 = st.number_input("X2 (prawy)", min_value=0, max_value=processed_img.width, value=processed_img.width)
+                x2 = st.number_input("X2 (prawy)", min_value=0, max_value=full_width, value=full_width)
             with col_y2:
-                y2 = st.number_input("Y2 (dolny)", min_value=0, max_value=processed_img.height, value=processed_img.height)
+                y2 = st.number_input("Y2 (dolny)", min_value=0, max_value=full_height, value=full_height)
             
             if x2 > x1 and y2 > y1:
-                cropped_img = processed_img.crop((x1, y1, x2, y2))
-                st.image(cropped_img, caption=f"Przycięty: {cropped_img.width} x {cropped_img.height} px", width=400)
-                processed_img = cropped_img  # Użyj przyciętego do pobrania
+                crop_box = (x1, y1, x2, y2)  # Użyj przyciętego do pobrania
+                show_crop_preview(
+                    cache, jobs, (session_id, "crop"), upload_digest, pyramid, crop_box, threshold, cleanup, local
+                )
             else:
                 st.error("❌ Nieprawidłowe współrzędne!")
         
+        # Części arkusza - składowe spójne maski zamiast ręcznych współrzędnych
+        enable_parts = st.checkbox(
+            "🧩 Wykryj części arkusza", value=False,
+            help="Osobne elementy szablonu: ramki dopasowane do czerni, plamki pomijane"
+        )
+        
+        if enable_parts:
+            col_parts1, col_parts2 = st.columns(2)
+            with col_parts1:
+                parts_min_area = st.number_input(
+                    "Najmniejsza część (px)", min_value=1, value=DEFAULT_MIN_AREA, step=100,
+                    help="Mniejsze skupiska czerni (kurz, plamki) nie są częściami"
+                )
+            with col_parts2:
+                parts_padding = st.number_input("Margines (px)", min_value=0, value=DEFAULT_PADDING)
+            
+            part_boxes = detect_parts_cached(
+                cache, upload_digest, preview_img, pyramid.full_size, threshold,
+                parts_min_area, parts_padding, cleanup, local
+            )
+            st.image(
+                draw_part_boxes(preview_img, part_boxes, pyramid.full_size),
+                caption=f"🧩 Części: {len(part_boxes)} (podgląd - eksport wykrywa je w pełnej rozdzielczości)",
+                use_container_width=True
+            )
+            
+            if part_boxes:
+                part_index = st.selectbox(
+                    "✂️ Wytnij część",
+                    options=[None, *range(len(part_boxes))],
+                    format_func=lambda i: "— cały obraz —" if i is None else (
+                        f"Część {i + 1}: {part_boxes[i][2] - part_boxes[i][0]} x "
+                        f"{part_boxes[i][3] - part_boxes[i][1]} px"
+                    ),
+                    disabled=crop_box is not None,
+                    help="Ustawia wycinek do pobrania (ręczne współrzędne mają pierwszeństwo)"
+                )
+                if part_index is not None and crop_box is None:
+                    crop_box = part_boxes[part_index]
+                    show_crop_preview(
+                        cache, jobs, (session_id, "crop"), upload_digest, pyramid, crop_box, threshold,
+                        cleanup, local
+                    )
+                
+                st.download_button(
+                    label=f"⬇️ Pobierz wszystkie części ({output_format} w ZIP)",
+                    data=make_parts_payload(
+                        cache, upload_digest, uploaded_file, threshold, output_format, png_preset,
+                        parts_min_area, parts_padding, cleanup, local
+                    ),
+                    file_name=uploaded_file.name.rsplit('.', 1)[0] + '_parts.zip',
+                    mime="application/zip",
+                    use_container_width=True
+                )
+        
         # Pobieranie
         st.divider()
         st.markdown("### 💾 Pobierz wynik")
@@ -321,7 +1065,10 @@ elif tool == "✂️ Czyszczenie i wycinanie":
         col_download1, col_download2 = st.columns(2)
         
         with col_download1:
-            output_bytes = convert_image_to_bytes(processed_img, format=output_format)
+            # Kodowanie dopiero przy pobraniu - ruch suwaka kosztuje tylko podgląd
+            output_bytes = make_download_payload(
+                cache, upload_digest, uploaded_file, threshold, crop_box, output_format, png_preset, cleanup, local
+            )
             file_extension = '.png' if output_format == 'PNG' else '.pbm'
             file_name = uploaded_file.name.rsplit('.', 1)[0] + f'_processed{file_extension}'
             
@@ -337,7 +1084,10 @@ elif tool == "✂️ Czyszczenie i wycinanie":
         with col_download2:
             # Zawsze oferuj też drugi format
             alt_format = "PBM" if output_format == "PNG" else "PNG"
-            alt_bytes = convert_image_to_bytes(processed_img, format=alt_format)
+            # Kodowanie dopiero przy pobraniu - ruch suwaka kosztuje tylko podgląd
+            alt_bytes = make_download_payload(
+                cache, upload_digest, uploaded_file, threshold, crop_box, alt_format, png_preset, cleanup, local
+            )
             alt_extension = '.pbm' if alt_format == 'PBM' else '.png'
             alt_name = uploaded_file.name.rsplit('.', 1)[0] + f'_processed{alt_extension}'
             
@@ -348,47 +1098,513 @@ elif tool == "✂️ Czyszczenie i wycinanie":
                 mime=f"image/{alt_format.lower()}",
                 use_container_width=True
             )
+        
+        if multipage_file is not None:
+            # Wszystkie strony - każda dekodowana, czyszczona i zapisywana osobno
+            st.markdown(f"### 📚 Wszystkie strony ({page_total})")
+            pages_label = st.radio("Zapis stron", options=list(PAGES_EXPORT_FORMATS), horizontal=True)
+            pages_format, pages_extension, pages_mime = PAGES_EXPORT_FORMATS[pages_label]
+            st.download_button(
+                label=f"⬇️ Pobierz wszystkie strony ({pages_label})",
+                data=make_pages_payload(
+                    cache, multipage_digest, multipage_file, threshold, pages_format, png_preset, cleanup, local
+                ),
+                file_name=multipage_file.name.rsplit('.', 1)[0] + f'_processed{pages_extension}',
+                mime=pages_mime,
+                use_container_width=True
+            )
+            st.caption("Metoda progu i czyszczenie jak wyżej, bez wycinania - każda strona w pełnej rozdzielczości")
     
     else:
         st.info("👆 Wgraj obraz powyżej, aby rozpocząć")
+    
+    # Statystyki cache (do kontroli działania pod obciążeniem)
+    with st.sidebar:
+        with st.expander("📊 Cache wyników"):
+            cache_stats = get_result_cache().stats()
+            st.caption(
+                f"Trafienia: {cache_stats['hits']} | Chybienia: {cache_stats['misses']} "
+                f"({cache_stats['hit_rate']:.0%})"
+            )
+            st.caption(
+                f"Wpisy: {cache_stats['entries']} | "
+                f"{cache_stats['bytes'] / 1024**2:.1f} / {cache_stats['max_bytes'] / 1024**2:.0f} MB | "
+                f"Usunięte: {cache_stats['evictions']}"
+            )
+            
+            job_stats = get_job_executor().stats()
+            st.caption(
+                f"Zadania w tle: kolejka {job_stats['queued']} | liczone {job_stats['running']} | "
+                f"anulowane {job_stats['cancelled']} | zastąpione {job_stats['superseded']} | "
+                f"sesje {job_stats['owners']} (wygasłe {job_stats['expired']})"
+            )
+            pool_stats = get_worker_pool().stats()
+            st.caption(
+                f"Pula procesów: liczone {pool_stats['running']}/{pool_stats['workers']} | "
+                f"w kolejce {pool_stats['queued']}/{pool_stats['max_queued']} | "
+                f"odrzucone {pool_stats['rejected']}"
+            )
+            
+            # Zajętość per sesja - wpisy współdzielone liczone po równo (udział)
+            session_id = get_session_id()
+            usage = get_result_cache().session_stats()
+            if usage:
+                st.dataframe([
+                    {
+                        "sesja": f"{session} (ta)" if session == session_id else session,
+                        "wpisy": row["entries"],
+                        "MB": round(row["bytes"] / 1024**2, 1),
+                        "udział MB": round(row["share"] / 1024**2, 1),
+                    }
+                    for session, row in sorted(usage.items(), key=lambda item: -item[1]["share"])
+                ], hide_index=True)
 
 # ============================================================================
-# NARZĘDZIE 2: WEKTORYZACJA (PLACEHOLDER)
+# NARZĘDZIE 2: WEKTORYZACJA
 # ============================================================================
 
-elif tool == "🎨 Wektoryzacja (wkrótce)":
+elif tool == "🎨 Wektoryzacja":
     st.markdown("## 🎨 Wektoryzacja obrazu")
+    st.markdown("Zamień obraz na ścieżki SVG - bez zewnętrznych programów")
     
-    st.info("""
-    ### 🚧 To narzędzie jest w przygotowaniu!
+    st.divider()
     
-    **Planowane funkcje:**
-    - Konwersja z PNG/JPG do SVG
-    - Regulacja poziomu detali
-    - Wybór metody wektoryzacji
-    - Podgląd na żywo
-    - Export do różnych formatów wektorowych
+    uploaded_file = st.file_uploader(
+        "📁 Wgraj obraz",
+        type=['png', 'jpg', 'jpeg', 'bmp'],
+        help="Obsługiwane formaty: PNG, JPG, BMP"
+    )
     
-    **Przewidywana data uruchomienia:** Wkrótce!
-    """)
+    if uploaded_file is not None:
+        cache = get_session_cache()
+        upload_digest = get_upload_digest(uploaded_file)
+        pyramid = load_preview_pyramid(cache, upload_digest, uploaded_file)
+        full_width, full_height = pyramid.full_size
+        preview_img = pyramid.level_for_width(PREVIEW_WIDTH)
+        
+        with st.expander("⚙️ Ustawienia", expanded=True):
+            col_set1, col_set2 = st.columns(2)
+            
+            with col_set1:
+                vector_threshold = st.slider(
+                    "Próg binaryzacji (0-255)",
+                    min_value=0,
+                    max_value=255,
+                    value=128,
+                    help="Piksele ciemniejsze lub równe progowi stają się kształtami"
+                )
+                tolerance = st.slider(
+                    "Tolerancja upraszczania (px)",
+                    min_value=0.0,
+                    max_value=5.0,
+                    value=1.0,
+                    step=0.25,
+                    help="Większa = mniej punktów i mniejszy plik, mniejsza = wierniejszy kształt"
+                )
+            
+            with col_set2:
+                min_area = st.number_input(
+                    "Minimalny rozmiar plamki (px)",
+                    min_value=0,
+                    max_value=10000,
+                    value=4,
+                    help="Plamki i dziury mniejsze niż tyle pikseli są pomijane"
+                )
+                bezier = st.checkbox(
+                    "Wygładzanie krzywymi Béziera",
+                    value=True,
+                    help="Łagodne łuki zamiast łamanych, ostre narożniki zostają"
+                )
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("### 📥 Oryginał")
+            st.image(preview_img, use_container_width=True)
+            st.caption(f"📏 {full_width} x {full_height} px")
+        
+        with col2:
+            st.markdown("### ✨ Podgląd SVG")
+            
+            # Podgląd liczony na poziomie piramidy - parametry przeliczone do jego skali
+            ratio = preview_img.width / full_width
+            with st.spinner("Wektoryzuję..."):
+                preview_svg = vectorize_cached(
+                    cache, upload_digest, preview_img, vector_threshold,
+                    tolerance * ratio, int(min_area * ratio * ratio), bezier
+                )
+            
+            st.image(preview_svg, use_container_width=True)
+            st.caption(f"✅ Podgląd: {len(preview_svg) / 1024:.0f} KB SVG")
+        
+        st.divider()
+        
+        st.download_button(
+            label="⬇️ Pobierz SVG",
+            data=make_svg_payload(
+                cache, upload_digest, uploaded_file, vector_threshold, tolerance, min_area, bezier
+            ),
+            file_name=uploaded_file.name.rsplit('.', 1)[0] + '_vector.svg',
+            mime="image/svg+xml",
+            use_container_width=True,
+            type="primary"
+        )
     
-    st.markdown("---")
-    st.markdown("💡 **Chcesz być powiadomiony o uruchomieniu?** Obserwuj tę stronę!")
+    else:
+        st.info("👆 Wgraj obraz powyżej, aby rozpocząć")
 
 # ============================================================================
-# INNE NARZĘDZIA (PLACEHOLDERS)
+# NARZĘDZIE 3: REDUKCJA KOLORÓW
 # ============================================================================
 
-else:
-    st.markdown(f"## {tool}")
+elif tool == "🌈 Redukcja kolorów":
+    st.markdown("## 🌈 Redukcja kolorów")
+    st.markdown("Płaskie kolory do druku i wycinania - od 2 do 16 kolorów, tło przezroczyste")
     
-    st.info("""
-    ### 🚧 To narzędzie jest w przygotowaniu!
+    st.divider()
     
-    Wkrótce pojawi się tutaj nowa funkcjonalność. 
+    uploaded_file = st.file_uploader(
+        "📁 Wgraj obraz",
+        type=['png', 'jpg', 'jpeg', 'bmp'],
+        help="Obsługiwane formaty: PNG, JPG, BMP"
+    )
     
-    Śledź aktualizacje i bądź na bieżąco z nowymi narzędziami!
-    """)
+    if uploaded_file is not None:
+        cache = get_session_cache()
+        upload_digest = get_upload_digest(uploaded_file)
+        pyramid = load_preview_pyramid(cache, upload_digest, uploaded_file)
+        full_width, full_height = pyramid.full_size
+        preview_img = pyramid.level_for_width(PREVIEW_WIDTH)
+        # Histogram liczony raz na plik - zmiana N tylko dobiera paletę od nowa
+        histogram = load_color_histogram(cache, upload_digest, pyramid)
+    
+        with st.expander("⚙️ Ustawienia", expanded=True):
+            col_set1, col_set2 = st.columns(2)
+    
+            with col_set1:
+                palette_colors = st.slider(
+                    "Liczba kolorów",
+                    min_value=2,
+                    max_value=16,
+                    value=6,
+                    help="Ile płaskich kolorów zostanie w wyniku (razem z tłem)"
+                )
+    
+            with col_set2:
+                palette_method = st.selectbox(
+                    "Dobór palety",
+                    options=list(PALETTE_METHODS),
+                    format_func=lambda method: {
+                        "kmeans": "🎯 k-means (dokładniejszy)",
+                        "median_cut": "✂️ Median cut (szybszy)",
+                    }[method],
+                    help="Obie metody liczą na histogramie kolorów, nie na pikselach"
+                )
+                palette_transparent = st.checkbox(
+                    "Przezroczyste tło",
+                    value=True,
+                    help="Najjaśniejszy kolor (papier) staje się przezroczysty, gdy jest prawie biały"
+                )
+    
+        palette = fit_palette_cached(cache, upload_digest, histogram, palette_colors, palette_method)
+    
+        col1, col2 = st.columns(2)
+    
+        with col1:
+            st.markdown("### 📥 Oryginał")
+            st.image(preview_img, use_container_width=True)
+            st.caption(f"📏 {full_width} x {full_height} px")
+    
+        with col2:
+            st.markdown("### ✨ Podgląd")
+            st.image(
+                quantize_preview_cached(
+                    cache, upload_digest, preview_img, palette, palette_colors, palette_method, palette_transparent
+                ),
+                use_container_width=True
+            )
+            st.markdown(palette_swatches(palette, palette_transparent), unsafe_allow_html=True)
+            st.caption(f"🎨 Kolory w palecie: {len(palette)}")
+    
+        st.divider()
+    
+        st.download_button(
+            label="⬇️ Pobierz PNG z paletą",
+            data=make_palette_payload(
+                cache, upload_digest, uploaded_file, palette, palette_colors, palette_method, palette_transparent
+            ),
+            file_name=uploaded_file.name.rsplit('.', 1)[0] + '_palette.png',
+            mime="image/png",
+            use_container_width=True,
+            type="primary"
+        )
+    
+    else:
+        st.info("👆 Wgraj obraz powyżej, aby rozpocząć")
+
+# ============================================================================
+# NARZĘDZIE 4: ZMIANA ROZMIARU
+# ============================================================================
+
+elif tool == "📐 Zmiana rozmiaru":
+    st.markdown("## 📐 Zmiana rozmiaru i DPI")
+    st.markdown("Zmniejsz skan do potrzebnego DPI albo wpasuj go w arkusz - z zachowaniem proporcji")
+    
+    st.divider()
+    
+    uploaded_file = st.file_uploader(
+        "📁 Wgraj obraz",
+        type=['png', 'jpg', 'jpeg', 'bmp', 'tif', 'tiff', 'webp'],
+        help="Obsługiwane formaty: PNG, JPG, BMP, TIFF, WebP"
+    )
+    
+    if uploaded_file is not None:
+        cache = get_session_cache()
+        upload_digest = get_upload_digest(uploaded_file)
+        pyramid = load_preview_pyramid(cache, upload_digest, uploaded_file)
+        full_width, full_height = pyramid.full_size
+        file_dpi = load_image_dpi(cache, upload_digest, uploaded_file)
+    
+        with st.expander("⚙️ Ustawienia", expanded=True):
+            resize_mode = st.radio(
+                "Sposób zmiany rozmiaru",
+                options=["📄 Format papieru", "🎯 Zmiana DPI", "📏 Szerokość w px"],
+                horizontal=True
+            )
+            col_set1, col_set2 = st.columns(2)
+            
+            if resize_mode == "📄 Format papieru":
+                with col_set1:
+                    paper = st.selectbox(
+                        "Arkusz", options=list(PAPER_SIZES_MM),
+                        help="Obraz jest wpasowany w arkusz, orientacja jak obrazu"
+                    )
+                with col_set2:
+                    resize_dpi = st.number_input("DPI", min_value=50, max_value=2400, value=DEFAULT_DPI, step=50)
+                resize = (("paper", paper), ("dpi", resize_dpi))
+            elif resize_mode == "🎯 Zmiana DPI":
+                with col_set1:
+                    resize_source_dpi = st.number_input(
+                        "DPI źródła", min_value=50, max_value=9600, value=round(file_dpi or 1200), step=50,
+                        help="Odczytane z pliku, gdy je zapisuje"
+                    )
+                with col_set2:
+                    resize_dpi = st.number_input("Docelowe DPI", min_value=50, max_value=9600, value=DEFAULT_DPI, step=50)
+                resize = (("dpi", resize_dpi), ("source_dpi", resize_source_dpi))
+            else:
+                with col_set1:
+                    resize_width = st.number_input(
+                        "Szerokość (px)", min_value=1, max_value=50000, value=max(full_width // 4, 1)
+                    )
+                resize = (("width", resize_width),)
+            
+            resize_format = st.radio("Format wyjściowy", options=list(RESIZE_FORMATS), horizontal=True)
+    
+        # Źródło zawsze ma DPI (z pliku albo z pola), więc target_size nie zgłasza braku
+        (target_width, target_height), target_dpi = target_size(pyramid.full_size, resize, file_dpi)
+        too_large = target_width * target_height > MAX_OUTPUT_PIXELS
+    
+        col1, col2 = st.columns(2)
+    
+        with col1:
+            st.markdown("### 📥 Oryginał")
+            st.image(pyramid.level_for_width(PREVIEW_WIDTH), use_container_width=True)
+            source_info = f"📏 {full_width} x {full_height} px"
+            if file_dpi:
+                source_info += (
+                    f" | {file_dpi:.0f} DPI | {full_width * MM_PER_INCH / file_dpi:.0f} x "
+                    f"{full_height * MM_PER_INCH / file_dpi:.0f} mm"
+                )
+            st.caption(source_info)
+    
+        with col2:
+            st.markdown("### ✨ Wynik")
+            ratio = full_width * full_height / (target_width * target_height)
+            st.metric("Rozmiar", f"{target_width} x {target_height} px")
+            if target_dpi:
+                st.metric(
+                    "Wydruk", f"{target_width * MM_PER_INCH / target_dpi:.0f} x "
+                    f"{target_height * MM_PER_INCH / target_dpi:.0f} mm przy {target_dpi:.0f} DPI"
+                )
+            if ratio >= 1:
+                st.caption(f"⚡ {ratio:.1f} razy mniej pikseli - szybkie zmniejszenie (reduce + jedno próbkowanie)")
+            else:
+                st.caption(f"🔍 Powiększenie - {1 / ratio:.1f} razy więcej pikseli")
+            if too_large:
+                st.error(f"❌ Wynik ponad {MAX_OUTPUT_PIXELS // 1_000_000} MP - sprawdź DPI źródła")
+    
+        st.divider()
+    
+        extension = {'PNG': '.png', 'JPEG': '.jpg', 'TIFF': '.tif'}[resize_format]
+        st.download_button(
+            label=f"⬇️ Pobierz {resize_format}",
+            data=make_resize_payload(cache, upload_digest, uploaded_file, resize, resize_format),
+            file_name=uploaded_file.name.rsplit('.', 1)[0] + '_resized' + extension,
+            mime={'PNG': 'image/png', 'JPEG': 'image/jpeg', 'TIFF': 'image/tiff'}[resize_format],
+            disabled=too_large,
+            use_container_width=True,
+            type="primary"
+        )
+    
+    else:
+        st.info("👆 Wgraj obraz powyżej, aby rozpocząć")
+
+# ============================================================================
+# NARZĘDZIE 5: BATCH PROCESSING
+# ============================================================================
+
+elif tool == "🔄 Batch processing":
+    st.markdown("## 🔄 Batch processing")
+    st.markdown("Wyczyść wiele plików naraz i pobierz wyniki w jednym archiwum ZIP")
+    
+    st.divider()
+    
+    uploaded_files = st.file_uploader(
+        "📁 Wgraj obrazy lub archiwum ZIP",
+        type=['png', 'jpg', 'jpeg', 'bmp', 'zip'],
+        accept_multiple_files=True,
+        help="Obsługiwane formaty: PNG, JPG, BMP oraz ZIP z obrazami"
+    )
+    
+    if uploaded_files:
+        sources = list_batch_sources(uploaded_files)
+        
+        with st.expander("⚙️ Ustawienia", expanded=True):
+            col_set1, col_set2 = st.columns(2)
+            
+            with col_set1:
+                threshold_mode = st.radio(
+                    "Próg binaryzacji",
+                    options=["Stały", "Automatyczny (Otsu)", "Automatyczny (trójkąt)", "Lokalny (Sauvola)"],
+                    help="Automatyczny próg jest dobierany osobno dla każdego pliku, "
+                         "lokalny - dla otoczenia każdego piksela (zdjęcia z cieniem)"
+                )
+                threshold = st.slider(
+                    "Próg (0-255)",
+                    min_value=0,
+                    max_value=255,
+                    value=128,
+                    disabled=threshold_mode != "Stały"
+                )
+            
+            with col_set2:
+                batch_format = st.radio(
+                    "Format wyjściowy",
+                    options=["PNG", "PBM"],
+                    horizontal=True,
+                    help="PNG - z przezroczystością, PBM - do wektoryzacji"
+                )
+                batch_png_preset = st.selectbox(
+                    "Zapis PNG",
+                    options=list(PNG_PRESET_LABELS),
+                    format_func=PNG_PRESET_LABELS.get,
+                    help=PNG_PRESET_HELP
+                )
+                st.caption(f"🧮 Plików do przetworzenia: {len(sources)} | Procesy: {get_worker_pool().max_workers}")
+        
+        threshold_method = {
+            "Automatyczny (Otsu)": "otsu",
+            "Automatyczny (trójkąt)": "triangle",
+        }.get(threshold_mode)
+        batch_local = {"method": "sauvola", "window": DEFAULT_WINDOW} if threshold_mode == "Lokalny (Sauvola)" else None
+        
+        if st.button("🚀 Przetwórz wszystkie", type="primary", use_container_width=True, disabled=not sources):
+            # Poprzednie archiwum nie jest już potrzebne
+            previous = st.session_state.pop("batch_result", None)
+            if previous is not None and os.path.exists(previous["path"]):
+                os.remove(previous["path"])
+            
+            progress = st.progress(0.0, text="Start...")
+            
+            def show_progress(done, total, summary):
+                seconds = max(summary["seconds"], 1e-9)
+                progress.progress(
+                    done / total,
+                    text=f"{done}/{total} plików | {done / seconds:.1f} plików/s | "
+                         f"{summary['megapixels'] / seconds:.1f} MP/s"
+                )
+            
+            # ZIP zapisywany na dysk na bieżąco - w pamięci są tylko pliki w obróbce.
+            # Pliki liczy wspólna pula procesów; przy pełnej kolejce partia czeka na miejsce
+            worker_pool = get_worker_pool()
+            zip_file = new_batch_archive()
+            try:
+                with zip_file:
+                    summary = run_batch(
+                        sources, zip_file,
+                        threshold=threshold,
+                        format=batch_format,
+                        threshold_method=threshold_method,
+                        local=batch_local,
+                        max_workers=worker_pool.max_workers,
+                        on_progress=show_progress,
+                        executor=worker_pool.as_executor(get_session_id()),
+                        png_preset=batch_png_preset
+                    )
+            except BaseException:
+                # Także przerwanie skryptu (StopException/RerunException) - niepełny ZIP nie zostaje na dysku
+                os.remove(zip_file.name)
+                raise
+            
+            st.session_state.batch_result = {"path": zip_file.name, "summary": summary}
+        
+        if "batch_result" in st.session_state:
+            result = st.session_state.batch_result
+            summary = result["summary"]
+            ok_count = summary["done"] - len(summary["failed"])
+            seconds = max(summary["seconds"], 1e-9)
+            
+            st.success(
+                f"✅ Przetworzono {ok_count} plików w {summary['seconds']:.1f} s "
+                f"({summary['done'] / seconds:.1f} plików/s, {summary['megapixels'] / seconds:.1f} MP/s)"
+            )
+            for name, error in summary["failed"]:
+                st.warning(f"⚠️ {name}: {error}")
+            
+            if os.path.exists(result["path"]):
+                # Archiwum czytane dopiero po kliknięciu, a nie przy każdym przebiegu skryptu
+                st.download_button(
+                    label="⬇️ Pobierz ZIP",
+                    data=lambda path=result["path"]: read_batch_archive(path),
+                    file_name="papercraft_batch.zip",
+                    mime="application/zip",
+                    use_container_width=True,
+                    type="primary"
+                )
+            else:
+                st.info("⌛ Archiwum wygasło - przetwórz pliki ponownie")
+    
+    else:
+        st.info("👆 Wgraj obrazy powyżej, aby rozpocząć")
+
+# ============================================================================
+# PANEL DEBUG (opcjonalny)
+# ============================================================================
+
+if show_debug:
+    with st.sidebar:
+        st.markdown("### 🐞 Etapy przetwarzania")
+        profiler = st.session_state.get("profiler")
+        if profiler is None or not profiler.records:
+            st.caption("Brak pomiarów w tej sesji")
+        else:
+            # Najnowsze na górze; etapy zagnieżdżone z nazwą etapu nadrzędnego.
+            # "wynik MB" to rozmiar zwróconego wyniku, a nie pamięć zużyta przez etap
+            st.dataframe([
+                {
+                    "etap": record["stage"] if record["parent"] is None else f"{record['parent']} › {record['stage']}",
+                    "ms": round(record["ms"], 1),
+                    "wynik MB": round(record.get("bytes", 0) / 1024**2, 1),
+                    "wymiary": f"{record['width']} x {record['height']}" if "width" in record else "",
+                }
+                for record in reversed(profiler.records)
+            ], hide_index=True)
+        
+        st.caption("Cały proces (wszystkie sesje):")
+        st.dataframe([
+            {"etap": stage, "n": row["count"], "p50 ms": round(row["p50_ms"], 1), "p95 ms": round(row["p95_ms"], 1)}
+            for stage, row in get_stage_metrics().summary().items()
+        ], hide_index=True)
 
 # ============================================================================
 # SEKCJA WSPARCIA (zawsze na dole)
@@ -0,0 +1,77 @@
+"""
+Próg lokalny z obrazu całkowego kontra naiwna średnia i odchylenie okna
+"""
+
+import numpy as np
+import pytest
+
+from papercraft.adaptive import BAND_ROWS, LOCAL_METHODS, SAUVOLA_RANGE, local_gray, local_threshold_mask
+
+
+def uneven_scan(height, width, seed=0):
+    """Szum na tle z gradientem oświetlenia - progi lokalne mają co robić"""
+    rng = np.random.default_rng(seed)
+    light = np.linspace(90, 230, width)[None, :] * np.linspace(0.8, 1.0, height)[:, None]
+    ink = rng.random((height, width)) < 0.15
+    noise = rng.normal(0, 12, (height, width))
+    return np.clip(np.where(ink, light * 0.35, light) + noise, 0, 255).astype(np.uint8)
+
+
+def reference_thresholds(gray, method, window, k):
+    """Próg dla każdego piksela z okna przyciętego do obrazu - float64, piksel po pikselu"""
+    k = LOCAL_METHODS[method] if k is None else k
+    radius = max(window // 2, 1)
+    height, width = gray.shape
+    values = gray.astype(np.float64)
+    thresholds = np.empty((height, width))
+    for y in range(height):
+        for x in range(width):
+            block = values[max(y - radius, 0):y + radius + 1, max(x - radius, 0):x + radius + 1]
+            mean = block.mean()
+            if method == "sauvola":
+                thresholds[y, x] = mean * (1 + k * (block.std() / SAUVOLA_RANGE - 1))
+            elif method == "bradley":
+                thresholds[y, x] = mean * (1 - k)
+            else:
+                thresholds[y, x] = mean - k
+    return thresholds
+
+
+def assert_matches_reference(gray, method, window, k=None):
+    thresholds = reference_thresholds(gray, method, window, k)
+    mask = local_threshold_mask(gray, method, window, k)
+    # float32 w implementacji - piksele tuż przy progu mogą wypaść w obie strony
+    decided = np.abs(gray - thresholds) > 1e-3
+    assert np.array_equal(mask[decided], (gray <= thresholds)[decided])
+    assert decided.mean() > 0.99
+
+
+@pytest.mark.parametrize("method", list(LOCAL_METHODS))
+@pytest.mark.parametrize("window", [3, 15, 51])
+def test_local_threshold_matches_naive_window(method, window):
+    assert_matches_reference(uneven_scan(37, 53, window), method, window)
+
+
+@pytest.mark.parametrize("method", list(LOCAL_METHODS))
+def test_band_seams(method):
+    # Wyższy niż pas - okna na styku pasów muszą widzieć wiersze sąsiedniego pasu
+    assert_matches_reference(uneven_scan(BAND_ROWS + 45, 23), method, 21)
+
+
+def test_window_larger_than_image_and_custom_k():
+    # Okno 301: sumy kwadratów nie mieszczą się w uint32 - ścieżka uint64
+    assert_matches_reference(uneven_scan(29, 31), "sauvola", 301, k=0.35)
+    assert_matches_reference(uneven_scan(29, 31), "mean", 301, k=-4.0)
+
+
+def test_local_gray_is_black_and_white():
+    gray = uneven_scan(40, 60)
+    result = local_gray(gray, {"method": "bradley", "window": 25})
+    assert set(np.unique(result)) <= {0, 255}
+    assert np.array_equal(result == 0, local_threshold_mask(gray, "bradley", 25))
+    assert local_gray(gray, None) is gray
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        local_threshold_mask(uneven_scan(8, 8), "niblack")
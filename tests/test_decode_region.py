@@ -0,0 +1,87 @@
+"""
+Dekodowanie fragmentu (decode_region, iter_gray_bands) kontra pełne
+dekodowanie i crop
+"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from papercraft.streaming import decode_region, iter_gray_bands
+
+WIDTH, HEIGHT = 67, 301
+
+BOXES = [
+    (0, 0, WIDTH, HEIGHT),
+    (5, 17, 40, 120),
+    (0, 200, WIDTH, HEIGHT),
+    (13, 0, 14, 1),
+    (30, 299, 67, 301),
+]
+
+
+def make_source(mode):
+    """Obraz z gradientem i szumem - różne wiersze i kolumny mają różne piksele"""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:HEIGHT, 0:WIDTH]
+    rgb = np.stack([x * 3, y % 256, (x * y) % 256], axis=-1) + rng.integers(0, 40, (HEIGHT, WIDTH, 3))
+    img = Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), mode='RGB')
+    if mode == 'RGBA':
+        img.putalpha(Image.fromarray((y * 7 % 256).astype(np.uint8), mode='L'))
+        return img
+    if mode == 'P':
+        return img.quantize(32)
+    return img.convert(mode)
+
+
+def encode(img, format, **options):
+    buf = io.BytesIO()
+    img.save(buf, format=format, **options)
+    return buf.getvalue()
+
+
+SOURCES = [
+    ('BMP', 'RGB', {}),
+    ('BMP', 'L', {}),
+    ('BMP', '1', {}),
+    ('PPM', 'RGB', {}),
+    ('PPM', 'L', {}),
+    ('TIFF', 'RGB', {}),
+    ('TIFF', 'L', {}),
+    ('PNG', 'L', {}),
+    ('PNG', 'RGB', {}),
+    ('PNG', 'RGBA', {}),
+    ('PNG', 'P', {}),
+    ('JPEG', 'RGB', {"quality": 85}),
+    ('JPEG', 'RGB', {"quality": 85, "subsampling": 0}),
+    ('JPEG', 'L', {"quality": 85}),
+]
+
+
+@pytest.fixture(params=SOURCES, ids=lambda source: f"{source[0]}-{source[1]}-{len(source[2])}")
+def source(request):
+    format, mode, options = request.param
+    return encode(make_source(mode), format, **options)
+
+
+@pytest.mark.parametrize("box", BOXES)
+def test_decode_region_matches_full_crop(source, box):
+    expected = Image.open(io.BytesIO(source))
+    expected.load()
+    expected = expected.crop(box)
+    region = decode_region(source, box)
+    assert region.mode == expected.mode
+    assert region.size == expected.size
+    assert region.tobytes() == expected.tobytes()
+
+
+@pytest.mark.parametrize("box", [None] + BOXES)
+@pytest.mark.parametrize("band_height", [1, 64, 256])
+def test_iter_gray_bands_matches_full_crop(source, box, band_height):
+    full = Image.open(io.BytesIO(source))
+    expected = np.asarray(full.convert('L').crop(box or (0, 0) + full.size))
+    bands = list(iter_gray_bands(source, box, band_height))
+    assert all(len(band) <= band_height for band in bands)
+    assert np.array_equal(np.concatenate(bands), expected)
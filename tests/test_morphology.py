@@ -0,0 +1,162 @@
+"""
+Czyszczenie maski (serie + union-find, bity spakowane) kontra proste wzorce:
+flood fill piksel po pikselu i min/max po oknie
+"""
+
+from collections import deque
+
+import numpy as np
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+
+from papercraft.morphology import (
+    pack_mask, unpack_mask, binary_dilation, binary_erosion, binary_opening, binary_closing,
+    mask_runs, label_runs, remove_small_components, fill_small_holes,
+)
+
+
+def random_mask(height, width, density, seed):
+    return np.random.default_rng(seed).random((height, width)) < density
+
+
+def flood_labels(mask, connectivity):
+    """Etykiety składowych (0 = tło) - BFS piksel po pikselu"""
+    if connectivity == 8:
+        steps = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+    else:
+        steps = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    height, width = mask.shape
+    labels = np.zeros(mask.shape, dtype=np.int64)
+    count = 0
+    for y, x in zip(*np.nonzero(mask)):
+        if labels[y, x]:
+            continue
+        count += 1
+        labels[y, x] = count
+        queue = deque([(y, x)])
+        while queue:
+            cy, cx = queue.popleft()
+            for dy, dx in steps:
+                ny, nx = cy + dy, cx + dx
+                if 0 <= ny < height and 0 <= nx < width and mask[ny, nx] and not labels[ny, nx]:
+                    labels[ny, nx] = count
+                    queue.append((ny, nx))
+    return labels
+
+
+def run_labels(mask, connectivity):
+    """Etykiety z label_runs rozpisane z powrotem na piksele (0 = tło)"""
+    rows, starts, ends = mask_runs(mask)
+    roots = label_runs(rows, starts, ends, mask.shape[1], connectivity)
+    labels = np.zeros(mask.shape, dtype=np.int64)
+    for row, start, end, root in zip(rows, starts, ends, roots):
+        labels[row, start:end] = root + 1
+    return labels
+
+
+def same_partition(a, b):
+    """Czy dwie etykietyzacje dzielą piksele na te same składowe (numery dowolne)"""
+    pairs = np.unique(np.stack([a.ravel(), b.ravel()]), axis=1)
+    return len(np.unique(pairs[0])) == len(np.unique(pairs[1])) == pairs.shape[1]
+
+
+def window_reduce(mask, radius, outside, reduce):
+    padded = np.pad(mask, radius, constant_values=outside)
+    return reduce(sliding_window_view(padded, (2 * radius + 1, 2 * radius + 1)), axis=(2, 3))
+
+
+def reference_dilation(mask, radius):
+    return window_reduce(mask, radius, False, np.any)
+
+
+def reference_erosion(mask, radius):
+    # Poza obrazem "czarno" - kształty przy krawędzi nie są zjadane
+    return window_reduce(mask, radius, True, np.all)
+
+
+@pytest.mark.parametrize("width", [1, 7, 8, 9, 31])
+def test_mask_runs_and_packing_round_trip(width):
+    mask = random_mask(11, width, 0.5, width)
+    rows, starts, ends = mask_runs(mask)
+    rebuilt = np.zeros_like(mask)
+    for row, start, end in zip(rows, starts, ends):
+        rebuilt[row, start:end] = True
+    assert np.array_equal(rebuilt, mask)
+    assert np.array_equal(unpack_mask(pack_mask(mask), width), mask)
+
+
+@pytest.mark.parametrize("connectivity", [4, 8])
+@pytest.mark.parametrize("density", [0.3, 0.5, 0.7])
+@pytest.mark.parametrize("seed", range(3))
+def test_label_runs_matches_flood_fill(connectivity, density, seed):
+    mask = random_mask(29, 37, density, seed)
+    assert same_partition(run_labels(mask, connectivity), flood_labels(mask, connectivity))
+
+
+def spiral_mask(size):
+    """Prostokątna spirala o ścieżce szerokości 1 px i odstępie 1 px"""
+    mask = np.zeros((size, size), dtype=bool)
+    y, x = 0, 0
+    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    length = size - 1
+    turn = 0
+    mask[0, 0] = True
+    while length > 0:
+        dy, dx = directions[turn % 4]
+        for _ in range(length):
+            y, x = y + dy, x + dx
+            mask[y, x] = True
+        # Boki n-1, n-1, n-3, n-3, ... - co dwa boki krótsze o 2 (odstęp 1 px)
+        if turn % 2 == 1:
+            length -= 2
+        turn += 1
+    return mask
+
+
+def test_label_runs_spiral():
+    # Jedna składowa, której serie łączą się dopiero przez wiele rund union-find
+    mask = spiral_mask(41)
+    assert flood_labels(mask, 4).max() == 1
+    for connectivity in (4, 8):
+        assert np.array_equal(run_labels(mask, connectivity) > 0, mask)
+        assert len(np.unique(run_labels(mask, connectivity)[mask])) == 1
+
+
+@pytest.mark.parametrize("connectivity", [4, 8])
+@pytest.mark.parametrize("min_size", [2, 5, 20])
+def test_remove_small_components_matches_flood_fill(connectivity, min_size):
+    mask = random_mask(31, 43, 0.35, min_size)
+    labels = flood_labels(mask, connectivity)
+    sizes = np.bincount(labels.ravel())
+    expected = mask & (sizes[labels] >= min_size)
+    assert np.array_equal(remove_small_components(mask, min_size, connectivity), expected)
+
+
+@pytest.mark.parametrize("max_size", [2, 5, 20])
+def test_fill_small_holes_matches_flood_fill(max_size):
+    mask = random_mask(31, 43, 0.65, max_size)
+    # Tło 4-spójne dla czerni 8-spójnej; tło przy krawędzi nie jest dziurką
+    labels = flood_labels(~mask, 4)
+    sizes = np.bincount(labels.ravel())
+    border = np.unique(np.concatenate([labels[0], labels[-1], labels[:, 0], labels[:, -1]]))
+    hole = ~mask & (sizes[labels] < max_size) & ~np.isin(labels, border)
+    assert np.array_equal(fill_small_holes(mask, max_size), mask | hole)
+
+
+@pytest.mark.parametrize("width", [5, 8, 13, 64, 70])
+@pytest.mark.parametrize("radius", [1, 2, 5, 9])
+def test_morphology_matches_window_reference(width, radius):
+    mask = random_mask(23, width, 0.5, radius)
+    dilated = reference_dilation(mask, radius)
+    eroded = reference_erosion(mask, radius)
+    assert np.array_equal(binary_dilation(mask, radius), dilated)
+    assert np.array_equal(binary_erosion(mask, radius), eroded)
+    assert np.array_equal(binary_opening(mask, radius), reference_dilation(eroded, radius))
+    assert np.array_equal(binary_closing(mask, radius), reference_erosion(dilated, radius))
+
+
+def test_packed_input_stays_packed():
+    mask = random_mask(17, 21, 0.5, 0)
+    packed = binary_dilation(pack_mask(mask), 2, width=21)
+    assert packed.dtype == np.uint8
+    assert np.array_equal(unpack_mask(packed, 21), binary_dilation(mask, 2))
@@ -0,0 +1,116 @@
+"""
+Części arkusza kontra wzorzec: flood fill, ramki składowych i łączenie
+przecinających się ramek para po parze
+"""
+
+import io
+import zipfile
+from collections import deque
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from papercraft.morphology import mask_runs
+from papercraft.parts import clean_parts_bytes, find_parts, gray_runs
+from papercraft.streaming import encode_pbm
+
+
+def component_boxes(mask):
+    """Ramki (x1, y1, x2, y2) i pola składowych 8-spójnych - BFS piksel po pikselu"""
+    height, width = mask.shape
+    seen = np.zeros(mask.shape, dtype=bool)
+    boxes = []
+    for y, x in zip(*np.nonzero(mask)):
+        if seen[y, x]:
+            continue
+        seen[y, x] = True
+        queue = deque([(y, x)])
+        x1, y1, x2, y2, area = x, y, x + 1, y + 1, 0
+        while queue:
+            cy, cx = queue.popleft()
+            area += 1
+            x1, y1, x2, y2 = min(x1, cx), min(y1, cy), max(x2, cx + 1), max(y2, cy + 1)
+            for ny in range(max(cy - 1, 0), min(cy + 2, height)):
+                for nx in range(max(cx - 1, 0), min(cx + 2, width)):
+                    if mask[ny, nx] and not seen[ny, nx]:
+                        seen[ny, nx] = True
+                        queue.append((ny, nx))
+        boxes.append(((int(x1), int(y1), int(x2), int(y2)), area))
+    return boxes
+
+
+def reference_parts(gray, threshold, min_area, padding):
+    boxes = [box for box, area in component_boxes(gray <= threshold) if area >= min_area]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    boxes[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    height, width = gray.shape
+    padded = [
+        (max(x1 - padding, 0), max(y1 - padding, 0), min(x2 + padding, width), min(y2 + padding, height))
+        for x1, y1, x2, y2 in boxes
+    ]
+    return sorted(padded, key=lambda box: (box[1], box[0]))
+
+
+def template_sheet():
+    """Arkusz z częściami: prostokąt z napisem w środku, pierścień, ukośna kreska, plamki"""
+    gray = np.full((120, 160), 240, dtype=np.uint8)
+    gray[10:50, 10:70] = 20
+    gray[25:35, 30:50] = 240
+    gray[28:32, 35:45] = 30                       # "napis" wewnątrz prostokąta - osobna składowa
+    gray[60:110, 90:150] = 10
+    gray[70:100, 100:140] = 240                   # pierścień
+    for i in range(40):
+        gray[65 + i, 10 + i] = 0                  # kreska 8-spójna po przekątnej
+    gray[5, 150] = gray[115, 5] = 0               # plamki poniżej min_area
+    gray[0:6, 80:88] = 50                         # część przy krawędzi - padding przycięty
+    return gray
+
+
+@pytest.mark.parametrize("min_area, padding", [(1, 0), (20, 4), (400, 8)])
+def test_template_sheet_matches_reference(min_area, padding):
+    gray = template_sheet()
+    assert find_parts(gray, 128, min_area, padding) == reference_parts(gray, 128, min_area, padding)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_random_blobs_match_reference(seed):
+    rng = np.random.default_rng(seed)
+    gray = np.where(rng.random((60, 80)) < 0.12, 0, 255).astype(np.uint8)
+    for min_area, padding in [(1, 0), (3, 2)]:
+        assert find_parts(gray, 128, min_area, padding) == reference_parts(gray, 128, min_area, padding)
+
+
+def test_gray_runs_across_bands():
+    gray = template_sheet()
+    expected = mask_runs(gray <= 128)
+    for actual, reference in zip(gray_runs(gray, 128, band_rows=7), expected):
+        assert np.array_equal(actual, reference)
+
+
+def test_empty_sheet():
+    assert find_parts(np.full((20, 30), 255, dtype=np.uint8)) == []
+
+
+def test_parts_zip_holds_crops_of_the_sheet():
+    gray = template_sheet()
+    buf = io.BytesIO()
+    Image.fromarray(gray, mode='L').save(buf, format='PNG')
+    boxes = find_parts(gray, 128, 20, 4)
+
+    archive = zipfile.ZipFile(io.BytesIO(clean_parts_bytes(buf.getvalue(), 128, 'PBM', min_area=20, padding=4)))
+    names = archive.namelist()
+    assert names == [f"sheet_part{index:02d}.pbm" for index in range(1, len(boxes) + 1)]
+    for name, (x1, y1, x2, y2) in zip(names, boxes):
+        assert archive.read(name) == encode_pbm(gray[y1:y2, x1:x2], 128)
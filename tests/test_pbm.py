@@ -0,0 +1,63 @@
+"""
+encode_pbm (strumieniowy PBM) kontra dotychczasowa ścieżka
+binarize_to_transparent + convert_image_to_bytes(..., 'PBM')
+"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from papercraft.core import binarize_to_transparent, convert_image_to_bytes
+from papercraft.streaming import encode_pbm
+
+
+def make_image(mode, width, height, seed=0):
+    """Losowy obraz w danym trybie - z szumem, żeby trafić w oba kolory po progu"""
+    rng = np.random.default_rng(seed)
+    if mode == '1':
+        return Image.fromarray(rng.random((height, width)) > 0.5)
+    if mode == 'L':
+        return Image.fromarray(rng.integers(0, 256, (height, width), dtype=np.uint8), mode='L')
+    rgba = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    if mode == 'RGBA':
+        return Image.fromarray(rgba, mode='RGBA')
+    rgb = Image.fromarray(rgba[..., :3], mode='RGB')
+    if mode == 'P':
+        return rgb.quantize(64)
+    return rgb
+
+
+def reference_pbm(img, threshold):
+    return convert_image_to_bytes(binarize_to_transparent(img, threshold), 'PBM')
+
+
+def streamed_pbm(img, threshold, dpi=None):
+    gray = np.asarray(img.convert('L'))
+    return encode_pbm(gray, threshold, dpi)
+
+
+@pytest.mark.parametrize("mode", ['RGB', 'L', 'P', '1', 'RGBA'])
+@pytest.mark.parametrize("width", [1, 7, 8, 9, 33])
+@pytest.mark.parametrize("threshold", [0, 128, 254])
+def test_encode_pbm_matches_reference(mode, width, threshold):
+    img = make_image(mode, width, 5)
+    assert streamed_pbm(img, threshold) == reference_pbm(img, threshold)
+
+
+def test_encode_pbm_multiple_chunks():
+    # Wysokość większa niż porcja wierszy iter_black_mask
+    img = make_image('L', 13, 1500, seed=1)
+    assert streamed_pbm(img, 100) == reference_pbm(img, 100)
+
+
+def test_encode_pbm_dpi_comment_is_the_only_difference():
+    # Jedyny wyjątek od zgodności: z dpi nagłówek dostaje komentarz "# dpi N"
+    img = make_image('RGB', 11, 6)
+    expected = reference_pbm(img, 128)
+    output = streamed_pbm(img, 128, dpi=300)
+
+    assert output.startswith(b'P4\n# dpi 300\n')
+    assert output.replace(b'# dpi 300\n', b'', 1) == expected
+    assert Image.open(io.BytesIO(output)).tobytes() == Image.open(io.BytesIO(expected)).tobytes()
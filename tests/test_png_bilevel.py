@@ -0,0 +1,60 @@
+"""
+PNG 1-bit z tRNS kontra dotychczasowy RGBA 8-bit - po dekodowaniu te same piksele
+"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from papercraft.core import binarize_to_transparent
+from papercraft.streaming import PNG_PRESETS, encode_clean_png, encode_png_bilevel, stream_clean_image
+
+
+def random_gray(height, width, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (height, width), dtype=np.uint8)
+
+
+def reference_rgba(gray, threshold):
+    return np.asarray(binarize_to_transparent(Image.fromarray(gray, mode='L'), threshold))
+
+
+def decoded_rgba(data):
+    return np.asarray(Image.open(io.BytesIO(data)).convert('RGBA'))
+
+
+@pytest.mark.parametrize("preset", list(PNG_PRESETS))
+@pytest.mark.parametrize("width", [1, 7, 8, 9, 33])
+@pytest.mark.parametrize("threshold", [0, 128, 254])
+def test_presets_decode_to_reference_rgba(preset, width, threshold):
+    gray = random_gray(11, width, width)
+    assert np.array_equal(decoded_rgba(encode_clean_png(gray, threshold, preset)), reference_rgba(gray, threshold))
+
+
+@pytest.mark.parametrize("filter", ["none", "up", ("none", "up")])
+def test_filters_decode_to_reference_rgba(filter):
+    gray = random_gray(40, 21)
+    # Pasy z powtarzanymi wierszami - filtr "up" ma co kodować
+    gray[10:20] = gray[10]
+    assert np.array_equal(decoded_rgba(encode_png_bilevel(gray, 100, filter=filter)), reference_rgba(gray, 100))
+
+
+def test_bilevel_png_is_one_bit_palette():
+    img = Image.open(io.BytesIO(encode_clean_png(random_gray(5, 9), 128, "balanced", dpi=300)))
+    assert img.mode in ('1', 'P')
+    assert img.info.get('transparency') is not None
+    assert round(img.info['dpi'][0]) == 300
+
+
+@pytest.mark.parametrize("preset", list(PNG_PRESETS))
+def test_streamed_png_matches_reference(preset):
+    gray = random_gray(300, 45, 3)
+    source = io.BytesIO()
+    Image.fromarray(gray, mode='L').save(source, format='PNG')
+    box = (3, 10, 40, 290)
+
+    output = io.BytesIO()
+    stream_clean_image(source.getvalue(), output, 128, 'PNG', box=box, band_height=64, png_preset=preset)
+    x1, y1, x2, y2 = box
+    assert np.array_equal(decoded_rgba(output.getvalue()), reference_rgba(gray[y1:y2, x1:x2], 128))
@@ -0,0 +1,57 @@
+"""
+fast_resize - całkowite współczynniki DPI bez dodatkowego przebiegu LANCZOS
+"""
+
+from unittest import mock
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from papercraft.resize import fast_resize, target_size
+
+
+def resize_calls(img, size):
+    """Wynik fast_resize i liczba wywołań Image.resize (pełnego resample)"""
+    with mock.patch.object(Image.Image, 'resize', autospec=True, side_effect=Image.Image.resize) as resize:
+        result = fast_resize(img, size)
+    return result, resize.call_count
+
+
+@pytest.mark.parametrize("source", [(4000, 3000), (4003, 3001), (4001, 2999), (3997, 3003)])
+def test_integer_dpi_ratio_needs_no_resample(source):
+    # 1200 -> 300 DPI: target_size zaokrągla, rozmiar źródła nie musi być wielokrotnością 4
+    size, _ = target_size(source, {"dpi": 300, "source_dpi": 1200})
+    result, calls = resize_calls(Image.new('L', source, 200), size)
+    assert result.size == size
+    assert calls == 0
+
+
+def test_edge_blocks_keep_uniform_colour():
+    # Niepełny blok na krawędzi jest uśredniany albo pomijany - bez ciemnej ramki
+    result = fast_resize(Image.new('RGB', (4003, 2999), (90, 120, 200)), (1001, 750))
+    assert np.all(np.asarray(result) == (90, 120, 200))
+
+
+def test_reduce_matches_block_mean():
+    rng = np.random.default_rng(0)
+    gray = rng.integers(0, 256, (403, 301), dtype=np.uint8)
+    result = np.asarray(fast_resize(Image.fromarray(gray), (75, 101)))
+    # 301 -> 75 i 403 -> 101 przy współczynniku 4: ostatni wiersz bloków ma tylko 3 wiersze
+    padded = np.full((404, 300), np.nan)
+    padded[:403] = gray[:, :300]
+    expected = np.nanmean(padded.reshape(101, 4, 75, 4), axis=(1, 3))
+    assert np.abs(result.astype(np.float64) - expected).max() <= 1
+
+
+@pytest.mark.parametrize("source, size", [((1000, 800), (300, 240)), ((3000, 4000), (700, 1000))])
+def test_non_integer_ratio_still_resamples(source, size):
+    result, calls = resize_calls(Image.new('L', source, 200), size)
+    assert result.size == size
+    assert calls == 1
+
+
+def test_upscale_resamples():
+    result, calls = resize_calls(Image.new('L', (100, 80), 200), (250, 200))
+    assert result.size == (250, 200)
+    assert calls == 1